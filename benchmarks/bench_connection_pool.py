@@ -0,0 +1,78 @@
+"""
+Compares opening a connection per call against the shared connection pool.
+
+Each simulated session runs the fixed `get_all_data` queries repeatedly from its own thread.
+
+    python benchmarks/bench_connection_pool.py --sessions 40 --iterations 25
+"""
+import argparse
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / 'streamlit_app'))
+
+from db import (ALERTED_SKUS_QUERY, ALERTS_QUERY, ALL_SKUS_QUERY,  # noqa: E402
+                DOCK_STATUS_QUERY, PRODUCTION_PIPELINE_QUERY, ConnectionPool)
+
+QUERIES = [ALERTS_QUERY, ALERTED_SKUS_QUERY, DOCK_STATUS_QUERY, ALL_SKUS_QUERY, PRODUCTION_PIPELINE_QUERY]
+
+
+def run_queries(connection):
+    for query in QUERIES:
+        connection.execute(query).fetchall()
+
+
+def open_per_call(database, iterations):
+    for _ in range(iterations):
+        connection = sqlite3.connect(database)
+        try:
+            run_queries(connection)
+        finally:
+            connection.close()
+
+
+def pooled(pool, iterations):
+    for _ in range(iterations):
+        with pool.connection() as connection:
+            run_queries(connection)
+
+
+def timed(sessions, work):
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions) as executor:
+        for future in [executor.submit(work) for _ in range(sessions)]:
+            future.result()
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--database', default=str(ROOT / 'warehouse_data.db'), help='database to copy and query')
+    parser.add_argument('--sessions', type=int, default=40)
+    parser.add_argument('--iterations', type=int, default=25)
+    parser.add_argument('--pool-size', type=int, default=8)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as scratch:
+        database = str(Path(scratch) / 'warehouse_data.db')
+        shutil.copy(args.database, database)
+        pool = ConnectionPool(database, read_only=True, size=args.pool_size)
+
+        calls = args.sessions * args.iterations
+        baseline = timed(args.sessions, lambda: open_per_call(database, args.iterations))
+        candidate = timed(args.sessions, lambda: pooled(pool, args.iterations))
+        pool.close()
+
+    print(f"{args.sessions} sessions x {args.iterations} loads ({calls} total)")
+    print(f"open-per-call: {baseline:8.3f}s  {calls / baseline:10.1f} loads/s")
+    print(f"pooled:        {candidate:8.3f}s  {calls / candidate:10.1f} loads/s  ({baseline / candidate:.2f}x)")
+
+
+if __name__ == '__main__':
+    main()
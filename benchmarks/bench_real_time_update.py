@@ -0,0 +1,71 @@
+"""
+Per-tick latency of the real-time update engine at increasing dock_status sizes.
+
+    python benchmarks/bench_real_time_update.py --rows 10000 100000 1000000 --batch 1 100 10000
+"""
+import argparse
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / 'streamlit_app'))
+
+import pages.alerts  # noqa: E402
+from db import TIME_CREATED_END, TIME_CREATED_START, WarehouseData, close_pools, random_times  # noqa: E402
+from updates import real_time_update  # noqa: E402
+
+
+def make_data(rows, rng):
+    """Builds a dock_status frame with the dtypes produced by `db.format_dock_status`."""
+    dock_status = pd.DataFrame({
+        'sku_id': np.arange(1, rows + 1),
+        'dock_id': np.arange(1, rows + 1),
+        'Product Number': pd.Series([f'P-{i % 1000}' for i in range(rows)]),
+        'Product Name': pd.Series([f'Product {i % 1000}' for i in range(rows)]),
+        'Last Refresh': pd.to_datetime(random_times(TIME_CREATED_START, TIME_CREATED_END, rows, rng)).as_unit('ns'),
+        'Days of Service': rng.integers(1, 21, size=rows),
+        'Time Created': pd.to_datetime(random_times(TIME_CREATED_START, TIME_CREATED_END, rows, rng)).as_unit('ns'),
+    })
+    alerts = pd.DataFrame({'alert_id': [1], 'sku_id': [1]})
+    return WarehouseData(alerts=alerts, dock_status=dock_status)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--batch', type=int, nargs='+', default=[1, 100, 10_000], help='updates applied per tick')
+    parser.add_argument('--ticks', type=int, default=20)
+    args = parser.parse_args()
+
+    # Alerts raised by the simulation must not reach ServiceNow
+    pages.alerts.create_SN_incident = lambda alert_info: None
+
+    rng = np.random.default_rng(42)
+    with tempfile.TemporaryDirectory() as scratch:
+        # Raised alerts are persisted, so write them to a scratch copy of the database
+        database = str(Path(scratch) / 'warehouse_data.db')
+        shutil.copy(ROOT / 'warehouse_data.db', database)
+
+        print(f"{'rows':>10} {'batch':>7} {'median ms':>10} {'p95 ms':>8}")
+        for rows in args.rows:
+            data = make_data(rows, rng)
+            for batch in args.batch:
+                timings = []
+                for _ in range(args.ticks):
+                    started = time.perf_counter()
+                    real_time_update(data, count=batch, rng=rng, database=database)
+                    timings.append((time.perf_counter() - started) * 1000)
+                p95 = statistics.quantiles(timings, n=20)[-1]
+                print(f"{rows:>10} {batch:>7} {statistics.median(timings):>10.2f} {p95:>8.2f}")
+        close_pools()
+
+
+if __name__ == '__main__':
+    main()
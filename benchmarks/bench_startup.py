@@ -0,0 +1,57 @@
+"""
+Import-time profile of the app's entry points, from `python -X importtime` in a fresh interpreter.
+
+Prints the total import time of each entry point and the modules that contribute most to it.
+
+    python benchmarks/bench_startup.py --modules app pages.dashboard --top 15 --repeat 5
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+APP = ROOT / 'streamlit_app'
+
+
+def import_profile(module):
+    """
+    Imports `module` in a fresh interpreter with `-X importtime`.
+
+    Returns:
+        tuple[float, dict[str, float]]: Total seconds (the sum of the top-level imports) and the
+        self time in seconds of every module that was imported.
+    """
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=APP, capture_output=True, text=True, check=True)
+    total, own = 0.0, {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        if not name.startswith('  '):
+            total += int(cumulative_us) / 1e6
+        own[name.strip()] = int(self_us) / 1e6
+    return total, own
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--modules', nargs='+', default=['app', 'pages.dashboard', 'pages.diagnostics', 'pages.alerts'])
+    parser.add_argument('--top', type=int, default=10, help='slowest modules to list per entry point')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per entry point; the median is reported')
+    args = parser.parse_args()
+
+    for module in args.modules:
+        runs = [import_profile(module) for _ in range(args.repeat)]
+        totals = [total for total, _ in runs]
+        print(f"{module}: {statistics.median(totals) * 1000:.0f} ms (min {min(totals) * 1000:.0f} ms)")
+        # Self times of the median run, slowest first
+        _, own = sorted(runs, key=lambda run: run[0])[len(runs) // 2]
+        for name, seconds in sorted(own.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+            print(f"  {seconds * 1000:8.1f} ms  {name}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""
+Fixtures for the pytest-benchmark suite: synthetic warehouse databases at several scales.
+
+Every benchmark that takes `scale` runs once per scale in `--scales`. The databases are
+generated once per session with `synthetic.generate`, so the committed warehouse_data.db is
+never touched.
+
+Runs are compared against the newest baseline stored for this machine (see pytest.ini).
+Baselines are kept under a fingerprint of the machine (`machine_key`), not only its platform
+and Python version, so a baseline is only ever compared with runs on the hardware it was
+recorded on; on a machine without one the comparison is skipped, since timings from other
+hardware would only produce false regressions.
+"""
+import hashlib
+import os
+import platform
+from pathlib import Path
+
+import cpuinfo
+import numpy as np
+import pandas as pd
+import pytest
+from pytest_benchmark.utils import get_machine_id
+
+import db
+import pages.alerts
+from synthetic import generate
+
+# As in app.main, so the benchmarks see the same pandas semantics as the app
+pd.set_option('mode.copy_on_write', True)
+
+DEFAULT_SCALES = '1000,10000,100000'
+SEED = 42
+
+
+def pytest_addoption(parser):
+    parser.addoption('--scales', default=DEFAULT_SCALES,
+                     help=f'comma-separated SKU counts to benchmark at (default: {DEFAULT_SCALES})')
+
+
+def machine_key():
+    """
+    Fingerprint of the machine: its OS install id (where there is one), host name, CPU model,
+    CPU count and memory size.
+    """
+    machine_id = ''
+    for path in ('/etc/machine-id', '/var/lib/dbus/machine-id'):
+        try:
+            machine_id = Path(path).read_text().strip()
+            break
+        except OSError:
+            continue
+    try:
+        memory = os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
+    except (AttributeError, ValueError, OSError):
+        memory = 0
+    fingerprint = '|'.join(map(str, (machine_id, platform.node(), cpuinfo.get_cpu_info().get('brand_raw', ''),
+                                     os.cpu_count(), memory)))
+    return hashlib.sha256(fingerprint.encode()).hexdigest()[:12]
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_configure(config):
+    option = config.option
+    storage = Path(str(option.benchmark_storage).removeprefix('file://')) / machine_key()
+    option.benchmark_storage = str(storage)
+    if option.benchmark_compare and not any((storage / get_machine_id()).glob('*.json')):
+        print(f"No benchmark baseline in {storage / get_machine_id()}; "
+              "record one with --benchmark-save=baseline to enable regression checks")
+        option.benchmark_compare = None
+        option.benchmark_compare_fail = None
+
+
+def pytest_generate_tests(metafunc):
+    if 'scale' in metafunc.fixturenames:
+        scales = [int(scale) for scale in metafunc.config.getoption('--scales').split(',')]
+        metafunc.parametrize('scale', scales, ids=[f'{scale}skus' for scale in scales], scope='session')
+
+
+@pytest.fixture(scope='session', autouse=True)
+def _no_servicenow():
+    """Alerts raised while benchmarking must not reach ServiceNow."""
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(pages.alerts, 'create_SN_incident', lambda alert_info: None)
+        yield
+
+
+@pytest.fixture(scope='session')
+def database(scale, tmp_path_factory):
+    """A synthetic database with `scale` SKUs, dock rows and pipeline rows."""
+    path = str(tmp_path_factory.mktemp('synthetic') / 'warehouse_data.db')
+    generate(path, skus=scale, seed=SEED)
+    yield path
+    db.close_pools()
+
+
+@pytest.fixture(scope='session')
+def use_database(database):
+    """Points the module-level default database (used by `get_all_data`) at `database`."""
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(db, 'database_file', database)
+        yield database
+
+
+@pytest.fixture
+def warehouse_data(use_database):
+    """A freshly loaded WarehouseData, so benchmarks that mutate it do not leak into others."""
+    return db.get_all_data()
+
+
+@pytest.fixture
+def rng():
+    return np.random.default_rng(SEED)
@@ -0,0 +1,138 @@
+"""
+Benchmarks of the data and rendering hot paths at several synthetic scales.
+
+    python -m pytest benchmarks                          # compare against the stored baseline
+    python -m pytest benchmarks --benchmark-save=baseline  # record a new baseline
+    python -m pytest benchmarks --scales 1000,1000000
+
+See benchmarks/pytest.ini for the baseline location and the regression threshold.
+"""
+import sqlite3
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from aggregates import WarehouseAggregates
+from alert_engine import AlertEngine
+from components.DOS_bar_chart import get_recs_with_eligible_DOS
+from components.PP_pie_chart import get_production_status_counts
+from components.severity_table import DEFAULT_PAGE_SIZE, get_page, severity_styles
+from db import WarehouseData, get_all_data
+from filters import FilterIndex
+from history import DockHistory
+from pages.alerts import alert_threshold, flag_hot_sku
+from updates import real_time_update
+
+
+def test_get_all_data(benchmark, use_database):
+    data = benchmark(get_all_data)
+    assert len(data.dock_status)
+
+
+@pytest.mark.parametrize('count', [100, 10_000])
+def test_real_time_update(benchmark, warehouse_data, database, rng, count):
+    warehouse_data.aggregates = WarehouseAggregates.from_data(warehouse_data)
+    benchmark(real_time_update, warehouse_data, count=count, rng=rng, database=database)
+
+
+def test_severity_styles_page(benchmark, warehouse_data):
+    # The dashboard styles one page of the dock status table per render
+    page = get_page(warehouse_data.dock_status, 1)
+    styles = benchmark(severity_styles, page)
+    assert styles.shape == (min(DEFAULT_PAGE_SIZE, len(warehouse_data.dock_status)), page.shape[1])
+
+
+def test_severity_styles_full(benchmark, warehouse_data):
+    benchmark(severity_styles, warehouse_data.dock_status)
+
+
+def test_flag_hot_sku_page(benchmark, warehouse_data):
+    # The row-wise Styler.apply that severity_styles replaced, on the same page. Styler.apply is
+    # lazy, so the styles are computed the way rendering would
+    page = get_page(warehouse_data.dock_status, 1)
+    benchmark(lambda: page.style.apply(flag_hot_sku, axis=1)._compute())
+
+
+def test_eligible_DOS_scan(benchmark, warehouse_data):
+    benchmark(get_recs_with_eligible_DOS, warehouse_data.dock_status)
+
+
+def test_eligible_DOS_aggregates(benchmark, warehouse_data):
+    aggregates = WarehouseAggregates.from_data(warehouse_data)
+    benchmark(get_recs_with_eligible_DOS, warehouse_data.dock_status, aggregates)
+
+
+def test_production_status_scan(benchmark, warehouse_data):
+    benchmark(get_production_status_counts, warehouse_data)
+
+
+def test_production_status_aggregates(benchmark, warehouse_data):
+    warehouse_data.aggregates = WarehouseAggregates.from_data(warehouse_data)
+    benchmark(get_production_status_counts, warehouse_data)
+
+
+def test_filter_index_build(benchmark, warehouse_data):
+    benchmark(FilterIndex, warehouse_data.dock_status)
+
+
+@pytest.mark.parametrize('urgency', ['All', 'Urgent'])
+def test_dashboard_filter(benchmark, warehouse_data, urgency):
+    dock_status = warehouse_data.dock_status
+    # No memo, so every round does the lookup a newly chosen filter combination does
+    index = FilterIndex(dock_status, memo_size=0)
+    filters = {'Destination': dock_status['Destination'].iloc[0], 'Dock Location': dock_status['Dock Location'].iloc[0],
+               'Urgency': urgency}
+    selected = benchmark(index.select, filters)
+    assert len(selected) <= len(dock_status)
+
+
+def _alerts_per_second(benchmark, alerts):
+    """Records the throughput of the median round, in alerts raised per second."""
+    benchmark.extra_info['alerts_per_second'] = round(alerts / benchmark.stats.stats.median)
+
+
+def test_alert_detection(benchmark, warehouse_data):
+    # Every row crosses the threshold; a fresh engine per round has no open alert to dedupe against
+    dock_status = warehouse_data.dock_status
+    previous = np.full(len(dock_status), alert_threshold + 1)
+    current = np.full(len(dock_status), alert_threshold)
+    alerts = benchmark.pedantic(lambda engine: engine.evaluate(dock_status, previous, current),
+                                setup=lambda: ((AlertEngine(),), {}), rounds=10)
+    assert len(alerts) == dock_status['sku_id'].nunique()
+    _alerts_per_second(benchmark, len(alerts))
+
+
+def test_alert_emission(benchmark, warehouse_data, database, tmp_path):
+    # Detection plus persistence of a batch of 1000 crossing rows. Every round starts from its own
+    # copy of the data and of the database, so each one persists the same 1000 alerts
+    rows = warehouse_data.dock_status.iloc[:1000]
+    previous = np.full(len(rows), alert_threshold + 1)
+    current = np.full(len(rows), alert_threshold)
+    rounds = iter(range(10))
+    raised = []
+
+    def setup():
+        copy = str(tmp_path / f'round{next(rounds)}.db')
+        with sqlite3.connect(database) as source, sqlite3.connect(copy) as target:
+            source.backup(target)
+        return (AlertEngine(), WarehouseData(**warehouse_data.frames()), copy), {}
+
+    def emit(engine, data, copy):
+        raised.append(len(engine.raise_alerts(data, rows, previous, current, copy)))
+
+    benchmark.pedantic(emit, setup=setup, rounds=10)
+    assert len(set(raised)) == 1 and raised[0]
+    _alerts_per_second(benchmark, raised[0])
+
+
+def test_history_trend_query(benchmark, tmp_path):
+    # Four weeks of samples of 20 docks every 10 minutes, read back as one trend for the changed docks
+    history = DockHistory(str(tmp_path / 'history.db'), capacity=100_000, batch_size=20_000)
+    start = datetime(2025, 8, 1)
+    docks = np.arange(1, 21)
+    for step in range(4 * 7 * 24 * 6):
+        history.record(start + timedelta(minutes=10 * step), docks, np.full(len(docks), step % 20 + 1), np.full(len(docks), step // 6))
+    history.flush()
+    trend = benchmark(history.query, start, start + timedelta(weeks=4))
+    assert len(trend) == 28
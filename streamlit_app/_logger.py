@@ -1,9 +1,14 @@
 import logging
 import logging.config
 
+from pythonjsonlogger.json import JsonFormatter
+
 from config import config
 
 log = logging.getLogger(config.LOGGER_NAME)
+# Structured stage timings from `instrumentation`; silent unless `config.TIMINGS_LOG_FILE` is set
+timing_log = logging.getLogger('timings')
+timing_log.propagate = False
 
 
 def logging_config() -> None:
@@ -17,4 +22,15 @@ def logging_config() -> None:
     log_level = config.LOG_LEVEL if config.LOG_LEVEL else logging.INFO
     log.setLevel(log_level)
     root_handler.setLevel(log_level)
+    if config.TIMINGS_LOG_FILE:
+        timings_config(config.TIMINGS_LOG_FILE)
+
 
+def timings_config(path) -> None:
+    """
+    Writes every stage timing to `path` as one JSON object per line.
+    """
+    handler = logging.FileHandler(path)
+    handler.setFormatter(JsonFormatter('%(asctime)s %(name)s %(process)d %(thread)d %(message)s'))
+    timing_log.handlers = [handler]
+    timing_log.setLevel(logging.DEBUG)
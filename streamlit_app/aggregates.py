@@ -0,0 +1,121 @@
+"""
+Incrementally maintained aggregates behind the dashboard charts.
+
+The urgent items bar chart needs dock counts per Days of Service and the production pie chart
+needs pipeline counts per status. Instead of rescanning the frames on every render, the counts
+are built once at load (from the frames or with SQL `GROUP BY`) and then adjusted by the update
+engine and the loader with only the old and new values of the rows they change.
+"""
+from collections import Counter
+
+import pandas as pd
+
+PRODUCTION_STATUSES = ['Backlog', 'In Production', 'Ready to Ship']
+
+
+class CountAggregate:
+    """
+    Row counts per value of one column.
+
+    Updating costs O(k) for k changed rows, independent of the size of the frame.
+    """
+
+    def __init__(self, values=()):
+        self._counts = Counter()
+        self.add(values)
+
+    def add(self, values):
+        """Counts new rows with the given values."""
+        self._counts.update(pd.Series(values).value_counts(dropna=False).to_dict() if len(values) > 64 else values)
+
+    def remove(self, values):
+        """Uncounts removed rows with the given values."""
+        self._counts.subtract(values)
+        for value in set(values):
+            if self._counts[value] <= 0:
+                del self._counts[value]
+
+    def update(self, old_values, new_values):
+        """Moves changed rows from their old values to their new ones."""
+        self.remove(list(old_values))
+        self.add(list(new_values))
+
+    def counts(self):
+        """Returns a copy of the counts as a dict."""
+        return dict(self._counts)
+
+    def copy(self):
+        """Returns an independent copy."""
+        other = CountAggregate()
+        other._counts = self._counts.copy()
+        return other
+
+
+class WarehouseAggregates:
+    """
+    The aggregates kept alongside a `WarehouseData` snapshot.
+
+    Attributes:
+        days_of_service (CountAggregate): Dock rows per Days of Service.
+        production_status (CountAggregate): Production pipeline rows per status.
+    """
+
+    def __init__(self, days_of_service=None, production_status=None):
+        self.days_of_service = days_of_service or CountAggregate()
+        self.production_status = production_status or CountAggregate()
+
+    @classmethod
+    def from_data(cls, data):
+        """Builds the aggregates with one pass over the loaded frames."""
+        return cls(CountAggregate(data.dock_status['Days of Service'].to_numpy()),
+                   CountAggregate(data.production_pipeline['status'].to_numpy()))
+
+    @classmethod
+    def from_sql(cls, connection):
+        """
+        Builds the aggregates with `GROUP BY` queries, without loading any rows.
+
+        Dock rows are counted over the same join `db.get_all_data` uses for dock_status.
+        """
+        days_of_service = CountAggregate()
+        days_of_service._counts.update(dict(connection.execute("""
+            SELECT d.days_of_service, COUNT(*)
+            FROM dock_status AS d
+            INNER JOIN skus AS s ON d.sku_id = s.sku_id
+            INNER JOIN production_pipeline AS p ON s.sku_id = p.sku_id
+            GROUP BY d.days_of_service""").fetchall()))
+        production_status = CountAggregate()
+        production_status._counts.update(dict(connection.execute(
+            'SELECT status, COUNT(*) FROM production_pipeline GROUP BY status').fetchall()))
+        return cls(days_of_service, production_status)
+
+    def copy(self):
+        """Returns an independent copy, cheap enough to take on every publish."""
+        return WarehouseAggregates(self.days_of_service.copy(), self.production_status.copy())
+
+    def days_of_service_frame(self, max_days=None):
+        """
+        Returns dock counts per Days of Service.
+
+        Args:
+            max_days: Only include values up to and including this one.
+
+        Returns:
+            pd.DataFrame: Columns ['Days of Service', 'count'], most common first.
+        """
+        counts = self.days_of_service.counts()
+        df = pd.DataFrame({'Days of Service': list(counts.keys()), 'count': list(counts.values())}, dtype='int64')
+        if max_days is not None:
+            df = df[df['Days of Service'] <= max_days]
+        return df.sort_values('count', ascending=False, kind='stable').reset_index(drop=True)
+
+    def production_status_frame(self):
+        """
+        Returns production pipeline counts per status.
+
+        Returns:
+            pd.DataFrame: Columns ['Status', 'Count'] with one row per known status.
+        """
+        counts = self.production_status.counts()
+        return pd.DataFrame({'Status': PRODUCTION_STATUSES,
+                             'Count': [counts.get(status, 0) for status in PRODUCTION_STATUSES]})
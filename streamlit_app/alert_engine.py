@@ -0,0 +1,180 @@
+"""
+Rule-based alert detection over batches of Days of Service changes.
+
+Every path that changes dock rows (the real-time simulation, the incremental loader) hands
+the engine the changed rows with their previous and new Days of Service. Each rule is
+evaluated over the whole batch with NumPy, candidates are deduplicated against the open
+alerts with a (sku_id, alert_type) set and the new alerts are emitted in one batch. Each alert
+carries an urgency derived from `alert_severity_map`, which is sent as the ServiceNow incident
+urgency.
+
+An alert stays open while its SKU is at or below the rule's threshold; a row of the SKU
+rising back above it closes the alert, so the next crossing raises a new one.
+"""
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from db import database_file
+from instrumentation import metrics, timed
+from pages.alerts import add_new_alerts, alert_severity_map, alert_threshold
+
+ENGINE_COLUMNS = ['sku_id', 'product_number', 'product_name', 'alert_type', 'alert_message', 'days_of_service', 'urgency']
+
+
+@dataclass(frozen=True)
+class ThresholdRule:
+    """
+    Raises an alert when Days of Service drops to or below a threshold.
+
+    Attributes:
+        alert_type (str): Type of the alerts raised, part of the deduplication key.
+        alert_message (str): Message of the alerts raised.
+        threshold (int): Days of Service at or below which the SKU is alerted.
+    """
+    alert_type: str = 'Urgent SKU'
+    alert_message: str = 'Low days of service'
+    threshold: int = alert_threshold
+
+    def crossed(self, previous, current):
+        """Returns a mask of the rows that dropped to or below the threshold."""
+        return (current <= self.threshold) & (previous > self.threshold)
+
+    def recovered(self, previous, current):
+        """Returns a mask of the rows that rose back above the threshold."""
+        return (current > self.threshold) & (previous <= self.threshold)
+
+
+def urgency(days_of_service, severity_map=alert_severity_map):
+    """
+    Ranks each Days of Service value by the severity band it falls in.
+
+    Every distinct color of `severity_map` is a band, and bands are ranked from the one
+    holding the lowest Days of Service: 1 is the most urgent. With the dashboard's map
+    that is 1 for red, 2 for orange and 3 for yellow, matching ServiceNow's urgency scale.
+    Values outside the map are clipped to its range.
+    """
+    keys = np.array(sorted(severity_map))
+    ranks = {}
+    for key in keys:
+        ranks.setdefault(severity_map[key], len(ranks) + 1)
+    key_ranks = np.array([ranks[severity_map[key]] for key in keys])
+    return key_ranks[np.searchsorted(keys, np.clip(days_of_service, keys[0], keys[-1]))]
+
+
+class AlertEngine:
+    """
+    Evaluates alert rules over batches of changed dock rows.
+
+    Attributes:
+        rules (tuple[ThresholdRule]): Rules evaluated for every batch; defaults to one `ThresholdRule`.
+        severity_map (dict[int, str]): Severity color per Days of Service, see `urgency`.
+    """
+
+    def __init__(self, rules=None, severity_map=alert_severity_map):
+        self.rules = tuple(rules) if rules is not None else (ThresholdRule(),)
+        self.severity_map = severity_map
+        self._open = None
+        self._lock = threading.Lock()
+
+    def sync(self, data):
+        """
+        Indexes the open alerts of `data`: the alerts of SKUs still at or below their rule's threshold.
+
+        Called on the first evaluation; call again after alerts are raised or closed elsewhere.
+        """
+        open_keys = set()
+        alerts, dock_status = data.alerts, data.dock_status
+        if alerts is not None and len(alerts) and 'alert_type' in alerts and dock_status is not None:
+            for rule in self.rules:
+                low = dock_status.loc[dock_status['Days of Service'].to_numpy() <= rule.threshold, 'sku_id'].unique()
+                alerted = alerts.loc[(alerts['alert_type'] == rule.alert_type).to_numpy() & alerts['sku_id'].isin(low).to_numpy(), 'sku_id']
+                open_keys.update((int(sku_id), rule.alert_type) for sku_id in alerted.unique())
+        with self._lock:
+            self._open = open_keys
+
+    def open_alerts(self):
+        """Returns the (sku_id, alert_type) keys of the open alerts."""
+        with self._lock:
+            return set(self._open or ())
+
+    def evaluate(self, rows, previous, current):
+        """
+        Finds the alerts a batch of changes raises and marks them open.
+
+        Args:
+            rows: Changed dock rows, with 'sku_id', 'Product Number' and 'Product Name' columns.
+            previous: Days of Service of each row before the change.
+            current: Days of Service of each row after the change.
+
+        Returns:
+            pd.DataFrame: One row per new alert, with columns `ENGINE_COLUMNS`.
+        """
+        previous = np.asarray(previous, dtype=np.float64)
+        current = np.asarray(current, dtype=np.float64)
+        sku_ids = rows['sku_id'].to_numpy()
+        candidates = []
+        with self._lock:
+            if self._open is None:
+                self._open = set()
+            for rule in self.rules:
+                for sku_id in np.unique(sku_ids[rule.recovered(previous, current)]).tolist():
+                    self._open.discard((sku_id, rule.alert_type))
+
+                crossed = np.flatnonzero(rule.crossed(previous, current))
+                if not len(crossed):
+                    continue
+                # First crossing row of each SKU in the batch that has no open alert
+                _, first = np.unique(sku_ids[crossed], return_index=True)
+                crossed = np.sort(crossed[first])
+                new = [position for position, sku_id in zip(crossed.tolist(), sku_ids[crossed].tolist(), strict=True)
+                       if (sku_id, rule.alert_type) not in self._open]
+                self._open.update((int(sku_id), rule.alert_type) for sku_id in sku_ids[new].tolist())
+                if new:
+                    candidates.append(pd.DataFrame({
+                        'sku_id': sku_ids[new],
+                        'product_number': rows['Product Number'].to_numpy()[new],
+                        'product_name': rows['Product Name'].to_numpy()[new],
+                        'alert_type': rule.alert_type,
+                        'alert_message': rule.alert_message,
+                        'days_of_service': current[new].astype(np.int64),
+                        'urgency': urgency(current[new], self.severity_map),
+                    }))
+        if not candidates:
+            return pd.DataFrame(columns=ENGINE_COLUMNS)
+        return pd.concat(candidates, ignore_index=True)
+
+    @timed('alerts.detect')
+    def raise_alerts(self, data, rows, previous, current, database=None):
+        """
+        Evaluates a batch of changes to `data` and raises every new alert in one batch.
+
+        The alerts are persisted and appended to `data.alerts` before this returns.
+
+        Returns:
+            pd.DataFrame: The alerts raised, see `evaluate`.
+        """
+        if self._open is None:
+            self.sync(data)
+        alerts = self.evaluate(rows, previous, current)
+        if len(alerts):
+            metrics.count('alerts.raised', len(alerts))
+            add_new_alerts(alerts, data, database)
+        return alerts
+
+
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+def get_alert_engine(database=None):
+    """Returns the process-wide alert engine for `database`, creating it on first use."""
+    key = str(Path(database or database_file).resolve())
+    with _engines_lock:
+        engine = _engines.get(key)
+        if engine is None:
+            engine = _engines[key] = AlertEngine()
+        return engine
@@ -0,0 +1,159 @@
+"""
+Durable, append-optimized storage for alerts.
+
+`AlertStore.add` only buffers an alert. `flush` writes every buffered alert to the `alerts`
+table in one transaction with a single `executemany`, assigns their ids from the database
+and appends them to the in-memory `WarehouseData` they were raised against.
+"""
+import atexit
+import threading
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+from _logger import log
+from config import config
+from db import database_file, pooled_connection
+from instrumentation import timer
+
+ALERT_COLUMNS = ['alert_id', 'sku_id', 'product_number', 'product_name', 'alert_type', 'alert_message', 'timestamp']
+
+
+class AlertStore:
+    """
+    Buffers alerts and persists them in batches.
+
+    Attributes:
+        database (str): Path to the database file.
+        batch_size (int): Buffered alerts that trigger an automatic flush.
+    """
+
+    def __init__(self, database=None, batch_size=config.ALERT_BATCH_SIZE):
+        self.database = database
+        self.batch_size = batch_size
+        self._buffer = []
+        self._lock = threading.Lock()
+
+    def add(self, sku_id, product_number, product_name, alert_type, alert_message, data=None, timestamp=None):
+        """
+        Buffers an alert for the next flush.
+
+        Args:
+            sku_id: SKU the alert is for.
+            product_number: Product number shown with the alert.
+            product_name: Product name shown with the alert.
+            alert_type: Alert type, e.g. 'Urgent SKU'.
+            alert_message: Alert message.
+            data: Optional WarehouseData to append the alert to once it is persisted.
+            timestamp: Alert time as 'YYYY-MM-DD HH:MM:SS'; defaults to now.
+        """
+        record = {
+            'sku_id': int(sku_id),
+            'product_number': product_number,
+            'product_name': product_name,
+            'alert_type': alert_type,
+            'alert_message': alert_message,
+            'timestamp': timestamp or datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        }
+        with self._lock:
+            self._buffer.append((record, data))
+            full = len(self._buffer) >= self.batch_size
+        if full:
+            self.flush()
+
+    def add_many(self, records, data=None, timestamp=None):
+        """
+        Buffers a batch of alerts for the next flush under a single lock acquisition.
+
+        Args:
+            records: dicts with the 'sku_id', 'product_number', 'product_name', 'alert_type' and
+                'alert_message' arguments of `add`.
+            data: Optional WarehouseData to append the alerts to once they are persisted.
+            timestamp: Alert time as 'YYYY-MM-DD HH:MM:SS'; defaults to now.
+        """
+        timestamp = timestamp or datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        batch = [({'sku_id': int(record['sku_id']),
+                   'product_number': record['product_number'],
+                   'product_name': record['product_name'],
+                   'alert_type': record['alert_type'],
+                   'alert_message': record['alert_message'],
+                   'timestamp': timestamp}, data) for record in records]
+        with self._lock:
+            self._buffer.extend(batch)
+            full = len(self._buffer) >= self.batch_size
+        if full:
+            self.flush()
+
+    def pending(self):
+        """Returns the number of buffered alerts."""
+        with self._lock:
+            return len(self._buffer)
+
+    def flush(self):
+        """
+        Writes every buffered alert in one transaction.
+
+        Ids are reserved from the table's current maximum while holding the write lock, so
+        they are unique across every process writing to the database.
+
+        Returns:
+            pd.DataFrame: The persisted alerts, with their assigned ids.
+        """
+        with self._lock:
+            buffer, self._buffer = self._buffer, []
+        if not buffer:
+            return pd.DataFrame(columns=ALERT_COLUMNS)
+
+        with timer('sql.alerts_flush'), pooled_connection(self.database) as connection:
+            connection.execute('BEGIN IMMEDIATE')
+            try:
+                first_id = connection.execute('SELECT COALESCE(MAX(alert_id), 0) + 1 FROM alerts').fetchone()[0]
+                rows = [(first_id + offset, record['sku_id'], record['alert_type'], record['alert_message'], record['timestamp'])
+                        for offset, (record, _) in enumerate(buffer)]
+                connection.executemany(
+                    'INSERT INTO alerts (alert_id, sku_id, alert_type, alert_message, timestamp) VALUES (?, ?, ?, ?, ?)', rows)
+                connection.commit()
+            except Exception:
+                connection.rollback()
+                with self._lock:
+                    self._buffer[:0] = buffer
+                raise
+
+        persisted = pd.DataFrame([record for record, _ in buffer])
+        persisted.insert(0, 'alert_id', range(first_id, first_id + len(buffer)))
+        persisted = persisted[ALERT_COLUMNS]
+
+        # Hand each target its own rows as a single chunk
+        targets = {}
+        for position, (_, data) in enumerate(buffer):
+            if data is not None:
+                targets.setdefault(id(data), (data, []))[1].append(position)
+        for data, positions in targets.values():
+            data.append_alerts(persisted.iloc[positions].reset_index(drop=True))
+
+        log.debug("Persisted %d alerts", len(persisted))
+        return persisted
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_alert_store(database=None):
+    """Returns the process-wide alert store for `database`, creating it on first use."""
+    key = str(Path(database or database_file).resolve())
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = _stores[key] = AlertStore(database)
+        return store
+
+
+@atexit.register
+def _flush_all():
+    for store in list(_stores.values()):
+        try:
+            store.flush()
+        except Exception:
+            log.exception("Could not flush buffered alerts on exit")
@@ -1,5 +1,6 @@
 import traceback
 
+import pandas as pd
 import streamlit as st
 
 from _logger import log, logging_config
@@ -11,12 +12,17 @@ def _configure_logging() -> None:
     log.info("Starting application...")
 
 def main() -> None:
+    # Published snapshots hand sessions views that rely on copy-on-write to stay independent
+    pd.set_option('mode.copy_on_write', True)
     dashboard = st.Page("pages/dashboard.py", title="Dashboard", icon=":material/home:", default=True)
+    # Stage timings for troubleshooting; reachable at /diagnostics but not listed in the menu
+    diagnostics = st.Page("pages/diagnostics.py", title="Diagnostics", icon=":material/monitoring:")
 
     pg = st.navigation(
         {
-            "App": [dashboard],
-        }
+            "App": [dashboard, diagnostics],
+        },
+        position="hidden",
     )
 
     pg.run()
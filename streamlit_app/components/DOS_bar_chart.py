@@ -2,31 +2,38 @@
 import altair as alt  # Altair for charting
 from pages.alerts import alert_severity_map  # Color mapping for alert severity
 from db import WarehouseData  # Warehouse data structure (not used directly here)
+from instrumentation import timed  # Stage timings
 
-def get_recs_with_eligible_DOS(df):
+def get_recs_with_eligible_DOS(df, aggregates=None):
     """
     Returns a DataFrame of SKUs with Days of Service <= 7, grouped and counted by value.
     Args:
         df: DataFrame containing 'Days of Service' column.
+        aggregates: Optional WarehouseAggregates; when given the counts are read from it instead of scanning `df`.
     Returns:
         DataFrame with columns ['Days of Service', 'count'] for eligible SKUs.
     """
+    if aggregates is not None:
+        # Counts are maintained incrementally, so no scan of the dock status table is needed
+        return aggregates.days_of_service_frame(max_days=7)
     # Count occurrences of each Days of Service value
     res = df["Days of Service"].value_counts().reset_index()
     # Filter for urgent SKUs (<= 7 days of service)
     res = res[res["Days of Service"] <= 7]
     return res
 
-def fetch_DOS_count(dock_status):
+@timed('chart.days_of_service')
+def fetch_DOS_count(dock_status, aggregates=None):
     """
     Builds an Altair bar chart showing count of SKUs by Days of Service (<= 7).
     Args:
         dock_status: DataFrame containing dock status info.
+        aggregates: Optional WarehouseAggregates to read the counts from.
     Returns:
         Altair Chart object for visualization in Streamlit.
     """
     # Prepare data for chart (only urgent SKUs)
-    eligible_df = get_recs_with_eligible_DOS(dock_status)
+    eligible_df = get_recs_with_eligible_DOS(dock_status, aggregates)
     # Create Altair bar chart
     chart = alt.Chart(eligible_df).mark_bar(size=150).encode(
         x=alt.X('Days of Service', axis=alt.Axis(format='d')), # X-axis: Days of Service (integer)
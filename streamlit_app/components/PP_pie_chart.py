@@ -2,7 +2,38 @@
 import pandas as pd  # Pandas for data manipulation
 from pages.alerts import alert_severity_map  # (Unused here, but imported for possible future severity mapping)
 import streamlit as st  # Streamlit for UI rendering
+from instrumentation import timed  # Stage timings
 
+def get_production_status_counts(data):
+    """
+    Returns the number of production pipeline rows per status.
+    Args:
+        data: WarehouseData object containing production_pipeline DataFrame.
+    Returns:
+        DataFrame with columns ['Status', 'Count'], one row per status.
+    """
+    if data.aggregates is not None:
+        # Status counts are maintained incrementally alongside the data
+        df = data.aggregates.production_status_frame()
+    else:
+        # Extract status column from production pipeline data
+        prod_status = data.production_pipeline['status']
+        # Define possible status labels for the pie chart
+        status_labels = ['Backlog', 'In Production', 'Ready to Ship']
+        # Count occurrences of each status
+        status_counts = [
+            (prod_status == 'Backlog').sum(),
+            (prod_status == 'In Production').sum(),
+            (prod_status == 'Ready to Ship').sum()
+        ]
+        # Build DataFrame for charting
+        df = pd.DataFrame({
+            'Status': status_labels,
+            'Count': status_counts
+        })
+    return df
+
+@timed('chart.production_status')
 def production_pipeline_pie_chart_altair(data, title='Production Status Overview', key=None):
     """
     Renders a pie chart summarizing the production pipeline status using Altair and Streamlit.
@@ -11,21 +42,8 @@ def production_pipeline_pie_chart_altair(data, title='Production Status Overview
         title: Title for the chart.
         key: Optional Streamlit key for widget uniqueness.
     """
-    # Extract status column from production pipeline data
-    prod_status = data.production_pipeline['status']
-    # Define possible status labels for the pie chart
-    status_labels = ['Backlog', 'In Production', 'Ready to Ship']
-    # Count occurrences of each status
-    status_counts = [
-        (prod_status == 'Backlog').sum(),
-        (prod_status == 'In Production').sum(),
-        (prod_status == 'Ready to Ship').sum()
-    ]
-    # Build DataFrame for charting
-    df = pd.DataFrame({
-        'Status': status_labels,
-        'Count': status_counts
-    })
+    # Count rows per status for the chart
+    df = get_production_status_counts(data)
     # Create Altair pie chart (arc) with color and tooltips
     chart = alt.Chart(df).mark_arc(innerRadius=0).encode(
         theta=alt.Theta(field="Count", type="quantitative"),  # Pie slice size by count
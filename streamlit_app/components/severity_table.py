@@ -0,0 +1,78 @@
+import numpy as np  # NumPy for vectorized severity lookup
+import pandas as pd  # Pandas for data manipulation
+import streamlit as st  # Streamlit for UI rendering
+from pages.alerts import alert_threshold, alert_severity_map  # Threshold and color mapping for alert severity
+from instrumentation import timed  # Stage timings
+
+# Rows per page when a table is too large to style in one go
+DEFAULT_PAGE_SIZE = 500
+
+# Color for each Days of Service value from 0 to the alert threshold; '' means not urgent
+_SEVERITY_COLORS = pd.CategoricalDtype([''] + sorted(set(alert_severity_map.values())))
+_SEVERITY_LOOKUP = np.array([
+    _SEVERITY_COLORS.categories.get_loc(alert_severity_map.get(max(days, min(alert_severity_map)), ''))
+    for days in range(alert_threshold + 1)
+], dtype=np.int8)
+
+def severity_colors(days_of_service):
+    """
+    Computes the severity color of every row in one vectorized pass.
+    Args:
+        days_of_service: Series or array of Days of Service values.
+    Returns:
+        Categorical Series of background colors ('' for rows above the alert threshold).
+    """
+    days = np.asarray(days_of_service, dtype=np.int64)
+    # Look up urgent rows by their (clipped) Days of Service; everything else gets code 0 ('')
+    codes = np.where(days <= alert_threshold, _SEVERITY_LOOKUP[np.clip(days, 0, alert_threshold)], 0)
+    index = days_of_service.index if isinstance(days_of_service, pd.Series) else None
+    return pd.Series(pd.Categorical.from_codes(codes, dtype=_SEVERITY_COLORS), index=index)
+
+@timed('style.severity')
+def severity_styles(df):
+    """
+    Builds the CSS for every cell of `df` at once, for use with `Styler.apply(axis=None)`.
+    Args:
+        df: DataFrame containing a 'Days of Service' column.
+    Returns:
+        DataFrame of CSS strings shaped like `df`.
+    """
+    colors = severity_colors(df['Days of Service'])
+    # One CSS string per distinct color, broadcast across the columns of each row
+    css = colors.cat.rename_categories(lambda color: f'background-color: {color}' if color else '')
+    values = np.repeat(css.astype(object).to_numpy()[:, None], len(df.columns), axis=1)
+    return pd.DataFrame(values, index=df.index, columns=df.columns)
+
+def style_severity(df):
+    """
+    Returns a Styler that colors each row of `df` by severity, computed column-wise.
+    """
+    return df.style.apply(severity_styles, axis=None)
+
+def page_count(rows, page_size=DEFAULT_PAGE_SIZE):
+    """Returns the number of pages needed to show `rows` rows."""
+    return max(1, -(-rows // page_size))
+
+def get_page(df, page, page_size=DEFAULT_PAGE_SIZE):
+    """
+    Returns the rows of `df` on 1-based page `page`.
+    """
+    start = (page - 1) * page_size
+    return df.iloc[start:start + page_size]
+
+def render_severity_table(df, page_size=DEFAULT_PAGE_SIZE, key=None):
+    """
+    Renders `df` in Streamlit with severity coloring, one page at a time.
+    Only the visible page is styled and sent to the browser, so the cost of rendering does
+    not grow with the size of the table.
+    Args:
+        df: DataFrame containing a 'Days of Service' column.
+        page_size: Rows per page.
+        key: Optional Streamlit key for widget uniqueness.
+    """
+    pages = page_count(len(df), page_size)
+    page = 1
+    if pages > 1:
+        # Page selector only shows up when the table does not fit on one page
+        page = st.number_input(f'Page (of {pages})', min_value=1, max_value=pages, value=1, step=1, key=key)
+    st.dataframe(style_severity(get_page(df, page, page_size)))
@@ -18,5 +18,62 @@ class Config():
     LOGGING_CONFIG_FILE = os.environ.get('LOGGING_CONFIG_FILE', './logging.config')
     DEBUG = os.environ.get('DEBUG')
 
+    # Warehouse database; defaults to warehouse_data.db at the repository root, wherever the app is started from
+    WAREHOUSE_DATABASE = os.environ.get('WAREHOUSE_DATABASE', '')
+
+    # Stage timings: JSON event log (one line per timing) and batched persistence to times.db
+    TIMINGS_LOG_FILE = os.environ.get('TIMINGS_LOG_FILE', '')
+    TIMES_DATABASE = os.environ.get('TIMES_DATABASE', '')
+    TIMES_BATCH_SIZE = int(os.environ.get('TIMES_BATCH_SIZE', '200'))
+
+    # Rows fetched per chunk by the streaming loader
+    STREAM_CHUNK_ROWS = int(os.environ.get('STREAM_CHUNK_ROWS', '50000'))
+
+    # Columnar snapshots for fast cold starts, rewritten every SNAPSHOT_INTERVAL_CHANGES changes;
+    # SNAPSHOT_DIR defaults to '<database>.snapshots'
+    SNAPSHOTS_ENABLED = os.environ.get('SNAPSHOTS_ENABLED', 'true').lower() == 'true'
+    SNAPSHOT_DIR = os.environ.get('SNAPSHOT_DIR', '')
+    SNAPSHOT_INTERVAL_CHANGES = int(os.environ.get('SNAPSHOT_INTERVAL_CHANGES', '50000'))
+
+    # Change-log entries kept behind the newest watermark when pruning, so loaders in other
+    # processes can catch up without a full reload
+    CHANGE_LOG_KEEP = int(os.environ.get('CHANGE_LOG_KEEP', '10000'))
+
+    # Dashboard refresh: producer tick and how often sessions check for a new version
+    REFRESH_INTERVAL_SECONDS = float(os.environ.get('REFRESH_INTERVAL_SECONDS', '5'))
+    REFRESH_POLL_SECONDS = float(os.environ.get('REFRESH_POLL_SECONDS', '2'))
+    SIMULATED_UPDATES_PER_TICK = int(os.environ.get('SIMULATED_UPDATES_PER_TICK', '1'))
+
+    # Standalone data service (see data_service.py): 'host:port' or a socket path; empty runs
+    # the change feed inside the Streamlit process. DATA_SERVICE_DIR defaults to '<database>.service'.
+    # DATA_SERVICE_AUTHKEY has no default: messages are pickles, so the key must be a shared secret
+    DATA_SERVICE_ADDRESS = os.environ.get('DATA_SERVICE_ADDRESS', '')
+    DATA_SERVICE_AUTHKEY = os.environ.get('DATA_SERVICE_AUTHKEY', '')
+    DATA_SERVICE_DIR = os.environ.get('DATA_SERVICE_DIR', '')
+
+    # Dock history (see history.py): samples kept in memory, samples per spill to SQLite, days of
+    # raw samples and minute rollups kept on disk, days of hour rollups kept on disk (day rollups
+    # are kept forever) and the bucket budget of trend queries. HISTORY_DATABASE defaults to
+    # '<database>.history.db'
+    HISTORY_ENABLED = os.environ.get('HISTORY_ENABLED', 'true').lower() == 'true'
+    HISTORY_DATABASE = os.environ.get('HISTORY_DATABASE', '')
+    HISTORY_CAPACITY = int(os.environ.get('HISTORY_CAPACITY', '100000'))
+    HISTORY_BATCH_SIZE = int(os.environ.get('HISTORY_BATCH_SIZE', '5000'))
+    HISTORY_RETENTION_DAYS = float(os.environ.get('HISTORY_RETENTION_DAYS', '7'))
+    HISTORY_HOUR_RETENTION_DAYS = float(os.environ.get('HISTORY_HOUR_RETENTION_DAYS', '90'))
+    HISTORY_MAX_POINTS = int(os.environ.get('HISTORY_MAX_POINTS', '500'))
+
+    # Alerts buffered before the alert store flushes on its own
+    ALERT_BATCH_SIZE = int(os.environ.get('ALERT_BATCH_SIZE', '100'))
+
+    # ServiceNow incident dispatch
+    SERVICENOW_URL = os.environ.get('SERVICENOW_URL', 'https://dev223874.service-now.com/api/now/table/incident')
+    # Incidents are only sent when both credentials are set
+    SERVICENOW_USER = os.environ.get('SERVICENOW_USER', '')
+    SERVICENOW_PASSWORD = os.environ.get('SERVICENOW_PASSWORD', '')
+    SERVICENOW_WORKERS = int(os.environ.get('SERVICENOW_WORKERS', '2'))
+    SERVICENOW_TIMEOUT_SECONDS = float(os.environ.get('SERVICENOW_TIMEOUT_SECONDS', '5'))
+    SERVICENOW_MAX_RETRIES = int(os.environ.get('SERVICENOW_MAX_RETRIES', '3'))
+
 
 config = Config()
@@ -0,0 +1,317 @@
+"""
+Standalone data service shared by any number of Streamlit server processes.
+
+`DataService` runs a `ChangeFeed` in its own process. That process owns the SQLite
+connections, the real-time simulation and the alert generation. The Streamlit processes use
+a `ServiceFeed`, which has the same `snapshot` / `since` / `wait` interface as `ChangeFeed`,
+so the dashboard's sessions do not need to know where the data comes from. The CPU-bound
+work then stays off the UI processes.
+
+Readers long-poll the service over a `multiprocessing.connection` socket. The reply is one of:
+- deltas, when the only changes since the reader's version are simulated dock updates, which
+  the reader replays onto its own copy with `updates.apply_updates`;
+- a snapshot, otherwise: the service writes the current frames as an Arrow snapshot (see
+  `snapshot.SnapshotStore`) and every reader memory-maps the same files, so the data is shared
+  through the page cache instead of being copied through the socket.
+
+    python streamlit_app/data_service.py --address localhost:6010
+    DATA_SERVICE_ADDRESS=localhost:6010 streamlit run streamlit_app/app.py
+
+`multiprocessing.connection` unpickles every message, so anyone who can connect with the
+authkey can run code in the service or in the readers. Both sides refuse to start without an
+explicit `DATA_SERVICE_AUTHKEY`; use a long random secret.
+"""
+import argparse
+import multiprocessing
+import shutil
+import threading
+import time
+from multiprocessing.connection import Client, Listener
+
+import pandas as pd
+
+from _logger import log
+from aggregates import WarehouseAggregates
+from config import config
+from db import WarehouseData, database_file
+from events import TOPICS, ChangeFeed, SnapshotPublisher
+from snapshot import SnapshotStore
+from updates import apply_updates, refresh_dock_aging
+
+
+def require_authkey(authkey):
+    """Returns `authkey` as bytes; raises ValueError if it is empty."""
+    if not authkey:
+        raise ValueError("The data service needs a shared secret: set DATA_SERVICE_AUTHKEY")
+    return authkey.encode() if isinstance(authkey, str) else authkey
+
+
+def parse_address(address):
+    """Returns a `multiprocessing.connection` address: (host, port) for 'host:port', else a socket path."""
+    host, separator, port = address.rpartition(':')
+    if separator and port.isdigit():
+        return host or 'localhost', int(port)
+    return address
+
+
+class DataService:
+    """
+    Owns a `ChangeFeed` and serves its snapshots and deltas to `ServiceFeed` readers.
+
+    Attributes:
+        address: Address the service listens on, see `parse_address`.
+        feed (ChangeFeed): The producer.
+        store (SnapshotStore): Where snapshots for readers are written.
+        ready (threading.Event): Set once the service accepts readers.
+    """
+
+    def __init__(self, address=config.DATA_SERVICE_ADDRESS, database=None, directory=config.DATA_SERVICE_DIR,
+                 authkey=config.DATA_SERVICE_AUTHKEY, interval=config.REFRESH_INTERVAL_SECONDS, simulate=True):
+        self.address = parse_address(address)
+        self.authkey = require_authkey(authkey)
+        self.feed = ChangeFeed(database, interval, simulate, prune=True)
+        self.store = SnapshotStore(database, directory or f'{database or database_file}.service')
+        self._written = None
+        self._write_lock = threading.Lock()
+        self._listener = None
+        self._closed = threading.Event()
+        self.ready = threading.Event()
+
+    def serve_forever(self):
+        """Starts the feed and answers readers until `close` is called."""
+        # Versions restart with the service, so snapshots of a previous run must not be served
+        shutil.rmtree(self.store.directory, ignore_errors=True)
+        self.feed.start()
+        self._listener = Listener(self.address, authkey=self.authkey)
+        log.info("Data service listening on %s", self._listener.address)
+        self.ready.set()
+        try:
+            while True:
+                try:
+                    connection = self._listener.accept()
+                except (OSError, multiprocessing.AuthenticationError):
+                    if self._closed.is_set():
+                        break
+                    log.exception("Rejected data service reader")
+                    continue
+                if self._closed.is_set():
+                    connection.close()
+                    break
+                threading.Thread(target=self._serve, args=(connection,), name='data-service-reader', daemon=True).start()
+        finally:
+            self._listener.close()
+            self.feed.stop()
+
+    def close(self):
+        """Stops accepting readers and stops the feed."""
+        self._closed.set()
+        if self._listener is not None:
+            # accept() cannot be interrupted, so wake it with a last connection
+            try:
+                Client(self._listener.address, authkey=self.authkey).close()
+            except OSError:
+                pass
+
+    def _serve(self, connection):
+        with connection:
+            while True:
+                try:
+                    request, version, timeout = connection.recv()
+                except (EOFError, OSError):
+                    return
+                if request != 'poll':
+                    log.warning("Unknown data service request %r", request)
+                    return
+                try:
+                    connection.send(self.poll(version, timeout))
+                except (BrokenPipeError, OSError):
+                    return
+
+    def poll(self, version, timeout=None):
+        """
+        Answers a reader that is current up to `version`.
+
+        Args:
+            version: Latest service version the reader has applied; 0 for a new reader.
+            timeout: Seconds to wait for a newer version.
+
+        Returns:
+            tuple: ('idle', version), ('deltas', [Delta, ...]) or
+            ('snapshot', version, topic_versions, directory).
+        """
+        snapshot = self.feed.wait(version, timeout)
+        if snapshot.version <= version:
+            return 'idle', snapshot.version
+        deltas = self.feed.since(version)
+        if version and deltas and all(delta.replayable for delta in deltas):
+            return 'deltas', deltas
+        return ('snapshot', *self._write_snapshot(), str(self.store.directory))
+
+    def _write_snapshot(self):
+        """Writes the latest published version for readers, once per version."""
+        with self._write_lock:
+            snapshot = self.feed.snapshot()
+            if self._written != snapshot.version:
+                self.store.write(snapshot.data.frames(), snapshot.version)
+                self._written = snapshot.version
+        return snapshot.version, snapshot.topic_versions
+
+
+class ServiceFeed(SnapshotPublisher):
+    """
+    Change feed of a Streamlit process, mirrored from a `DataService`.
+
+    Versions are numbered locally, so they keep increasing when the service restarts.
+
+    Attributes:
+        address: Address of the service, see `parse_address`.
+        poll_timeout (float): Seconds each long poll waits for the service.
+    """
+
+    def __init__(self, address=config.DATA_SERVICE_ADDRESS, authkey=config.DATA_SERVICE_AUTHKEY,
+                 poll_timeout=config.REFRESH_POLL_SECONDS, history=256):
+        super().__init__(history)
+        self.address = parse_address(address)
+        self.authkey = require_authkey(authkey)
+        self.poll_timeout = poll_timeout
+        self._connection = None
+        self._remote_version = 0
+        self._remote_topics = {}
+        self._store = None
+        self._data = None
+        self._dock_index = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self, timeout=30.0):
+        """Waits for the first snapshot from the service and starts following it."""
+        if self._thread is not None:
+            return self
+        deadline = time.monotonic() + timeout
+        while self._remote_version == 0:
+            try:
+                self.sync(self.poll_timeout)
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.2)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='service-feed', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stops following the service."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._disconnect()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.sync(self.poll_timeout)
+            except (OSError, EOFError) as e:
+                # Keep serving the last snapshot until the service is back
+                log.warning("Data service unavailable: %r", e)
+                self._disconnect()
+                self._stop.wait(self.poll_timeout)
+            except Exception:
+                log.exception("Service feed sync failed")
+                self._stop.wait(self.poll_timeout)
+
+    def _disconnect(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+            # A restarted service numbers its versions from scratch
+            self._remote_version = 0 if self._data is None else -1
+
+    def sync(self, timeout=None):
+        """
+        Long-polls the service once and publishes what it returns.
+
+        Returns:
+            int: Number of versions published.
+        """
+        if self._connection is None:
+            self._connection = Client(self.address, authkey=self.authkey)
+        # -1 (after a reconnect) asks for a snapshot without discarding the data being served
+        self._connection.send(('poll', max(self._remote_version, 0), timeout))
+        reply = self._connection.recv()
+        if reply[0] == 'deltas':
+            for delta in reply[1]:
+                self._replay(delta)
+            return len(reply[1])
+        if reply[0] == 'snapshot':
+            return self._load(*reply[1:])
+        return 0
+
+    def _replay(self, delta):
+        dock_status = self._data.dock_status
+        if self._dock_index is None:
+            self._dock_index = pd.Index(dock_status['dock_id'])
+        positions = self._dock_index.get_indexer(list(delta.dock_ids))
+        apply_updates(dock_status, positions, delta.days_of_service, delta.refreshed, self._data.aggregates)
+        refresh_dock_aging(dock_status, delta.refreshed)
+        self._remote_version = delta.version
+        self._remote_topics.update({topic: delta.version for topic in delta.topics})
+        self._publish(delta.topics, self._data, dock_ids=delta.dock_ids, days_of_service=delta.days_of_service,
+                      refreshed=delta.refreshed, replayable=True)
+
+    def _load(self, version, topic_versions, directory):
+        if self._store is None or str(self._store.directory) != directory:
+            self._store = SnapshotStore(directory=directory)
+        # The service may already have replaced `version` with a newer snapshot
+        snapshot = self._store.read(float('inf'))
+        if snapshot is None:
+            return 0
+        loaded, frames = snapshot
+        if loaded == version and self._remote_version > 0:
+            topics = {topic for topic in TOPICS if topic_versions[topic] > self._remote_topics.get(topic, 0)}
+        else:
+            topics = set(TOPICS)
+        self._data = WarehouseData(**frames, version=loaded)
+        self._data.aggregates = WarehouseAggregates.from_data(self._data)
+        self._dock_index = None
+        self._remote_version = loaded
+        self._remote_topics = dict(topic_versions) if loaded == version else {topic: loaded for topic in TOPICS}
+        self._publish(frozenset(topics), self._data)
+        return 1
+
+
+def run_service(address=config.DATA_SERVICE_ADDRESS, database=None, **kwargs):
+    """Runs a `DataService` in the current process until it is interrupted."""
+    # Published snapshots are copy-on-write views of the live frames
+    pd.set_option('mode.copy_on_write', True)
+    service = DataService(address, database, **kwargs)
+    try:
+        service.serve_forever()
+    except KeyboardInterrupt:
+        service.close()
+
+
+def start_service(address=config.DATA_SERVICE_ADDRESS, database=None, **kwargs):
+    """
+    Starts a `DataService` in a child process.
+
+    Returns:
+        multiprocessing.Process: The started service process; terminate it to stop the service.
+    """
+    process = multiprocessing.get_context('spawn').Process(
+        target=run_service, args=(address, database), kwargs=kwargs, name='data-service', daemon=True)
+    process.start()
+    return process
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--address', default=config.DATA_SERVICE_ADDRESS or 'localhost:6010')
+    parser.add_argument('--database', default=None, help='defaults to db.database_file')
+    parser.add_argument('--interval', type=float, default=config.REFRESH_INTERVAL_SECONDS)
+    parser.add_argument('--no-simulate', dest='simulate', action='store_false')
+    args = parser.parse_args()
+    if not config.DATA_SERVICE_AUTHKEY:
+        parser.error("set DATA_SERVICE_AUTHKEY to a shared secret; the readers must use the same one")
+    run_service(args.address, args.database, interval=args.interval, simulate=args.simulate)
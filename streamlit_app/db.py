@@ -1,9 +1,31 @@
+import queue
 import sqlite3
+import threading
+from contextlib import contextmanager
 from datetime import datetime, timedelta
+from pathlib import Path
+import numpy as np
 import pandas as pd
 import random
 
-database_file = 'warehouse_data.db'
+from config import config
+from instrumentation import timed, timer
+
+from schema import align_categories, compact_frames, conform
+
+# Resolved against the repository, not the working directory, so starting the app from another
+# directory never makes sqlite3.connect create an empty database in its place
+database_file = config.WAREHOUSE_DATABASE or str(Path(__file__).resolve().parents[1] / 'warehouse_data.db')
+
+# Pragmas applied to every pooled connection
+CONNECTION_PRAGMAS = {
+    'synchronous': 'NORMAL',    # safe with WAL, avoids an fsync per transaction
+    'mmap_size': 268435456,     # memory-map up to 256 MB of the database file
+    'cache_size': -65536,       # 64 MB page cache per connection
+    'temp_store': 'MEMORY',
+}
+# Prepared statements kept per connection; covers every fixed query in this module
+STATEMENT_CACHE_SIZE = 256
 
 class WarehouseData:
     """
@@ -15,15 +37,52 @@ class WarehouseData:
         dock_status (pd.DataFrame): DataFrame containing dock status information.
         skus_all (pd.DataFrame): DataFrame containing all SKU records.
         production_pipeline (pd.DataFrame): DataFrame containing production pipeline data.
+        version (int): Database change id the datasets are current up to.
+        aggregates (aggregates.WarehouseAggregates): Optional precomputed chart counts.
     """
     def __init__(self, alerts: pd.DataFrame=None, skus: pd.DataFrame=None,
                  dock_status: pd.DataFrame=None, skus_all: pd.DataFrame=None,
-                 production_pipeline: pd.DataFrame=None):
+                 production_pipeline: pd.DataFrame=None, version: int=0, aggregates=None):
         self.alerts = alerts
         self.skus = skus
         self.dock_status = dock_status
         self.skus_all = skus_all
         self.production_pipeline = production_pipeline
+        self.version = version
+        self.aggregates = aggregates
+
+    @property
+    def alerts(self):
+        """Alerts frame; chunks added by `append_alerts` are combined on first read."""
+        if len(self._alert_chunks) > 1:
+            self._alert_chunks = [pd.concat(align_categories(self._alert_chunks), ignore_index=True)]
+        return self._alert_chunks[0] if self._alert_chunks else None
+
+    @alerts.setter
+    def alerts(self, value):
+        self._alert_chunks = [value] if value is not None else []
+
+    def append_alerts(self, new_alerts: pd.DataFrame):
+        """
+        Appends alerts without copying the existing frame.
+
+        New rows are kept as a separate chunk until the alerts are next read, so raising many
+        alerts between reads costs a single concat instead of one per alert. New rows are cast
+        to the dtypes of the existing alerts.
+        """
+        if self._alert_chunks:
+            new_alerts = conform(new_alerts, self._alert_chunks[0])
+        self._alert_chunks.append(new_alerts)
+
+    def frames(self):
+        """Returns a dict of the datasets keyed by attribute name."""
+        return {
+            'alerts': self.alerts,
+            'skus': self.skus,
+            'dock_status': self.dock_status,
+            'skus_all': self.skus_all,
+            'production_pipeline': self.production_pipeline,
+        }
 
 def random_time(start, end):
         """Generate a random datetime between `start` and `end`."""
@@ -31,94 +90,262 @@ def random_time(start, end):
         random_seconds = random.randint(0, int(delta.total_seconds()))
         return start + timedelta(seconds=random_seconds)
 
-def connect_to_db():
+def connect_to_db(database=None):
     """
     Establishes a connection to the SQLite database.
 
+    Args:
+        database: Optional path to the database file. Defaults to `database_file`.
+
     Returns:
         tuple: A tuple containing the SQLite connection object and cursor.
     """
-    connection = sqlite3.connect(database_file)
+    connection = sqlite3.connect(database or database_file)
     c = connection.cursor()
     return connection, c
 
-def get_all_data():
+class ConnectionPool:
     """
-    Retrieves and processes all relevant warehouse data from the database.
+    A fixed-size pool of SQLite connections to one database file.
 
-    This function:
-    - Connects to the SQLite database.
-    - Queries multiple tables: alerts, skus, dock_status, skus_all, and production_pipeline.
-    - Joins and formats the dock_status data for display.
-    - Converts date strings to datetime objects and renames columns for clarity.
-    - Returns a WarehouseData object containing all the retrieved DataFrames.
+    Connections are opened lazily, tuned with `CONNECTION_PRAGMAS` and handed out one
+    caller at a time, so each keeps its prepared-statement cache warm across calls.
+    Read-only pools open the file with `mode=ro`; writable pools switch the database to
+    WAL so readers are never blocked by a writer.
+
+    Attributes:
+        database (str): Path to the database file.
+        read_only (bool): Whether connections are opened read-only.
+        size (int): Maximum number of open connections.
+    """
+    def __init__(self, database: str=None, read_only: bool=False, size: int=8, timeout: float=30.0):
+        self.database = database or database_file
+        self.read_only = read_only
+        self.size = size
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._opened = 0
+        self._lock = threading.Lock()
+
+    def _open(self):
+        if self.read_only:
+            connection = sqlite3.connect(f"{Path(self.database).resolve().as_uri()}?mode=ro", uri=True,
+                                         check_same_thread=False, cached_statements=STATEMENT_CACHE_SIZE)
+        else:
+            connection = sqlite3.connect(self.database, check_same_thread=False, cached_statements=STATEMENT_CACHE_SIZE)
+            connection.execute('PRAGMA journal_mode=WAL')
+        for pragma, value in CONNECTION_PRAGMAS.items():
+            connection.execute(f'PRAGMA {pragma}={value}')
+        return connection
+
+    @contextmanager
+    def connection(self):
+        """
+        Checks a connection out of the pool for the duration of the `with` block.
+
+        Yields:
+            sqlite3.Connection: A connection owned by the caller until the block exits.
+        """
+        try:
+            connection = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                can_open = self._opened < self.size
+                if can_open:
+                    self._opened += 1
+            if can_open:
+                try:
+                    connection = self._open()
+                except Exception:
+                    with self._lock:
+                        self._opened -= 1
+                    raise
+            else:
+                connection = self._idle.get(timeout=self.timeout)
+        try:
+            yield connection
+        finally:
+            if connection.in_transaction:
+                connection.rollback()
+            self._idle.put(connection)
+
+    def close(self):
+        """Closes every idle connection in the pool."""
+        while True:
+            try:
+                connection = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            connection.close()
+            with self._lock:
+                self._opened -= 1
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+def get_pool(database: str=None, read_only: bool=False) -> ConnectionPool:
+    """
+    Returns the process-wide pool for `database`, creating it on first use.
+
+    Args:
+        database: Optional path to the database file. Defaults to `database_file`.
+        read_only: Whether to return the read-only pool.
 
     Returns:
-        WarehouseData: An object containing all the warehouse-related datasets.
+        ConnectionPool: The shared pool.
+    """
+    key = (str(Path(database or database_file).resolve()), read_only)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = ConnectionPool(database, read_only=read_only)
+        return pool
+
+@contextmanager
+def pooled_connection(database: str=None, read_only: bool=False):
     """
-    conn_ref, cursor = connect_to_db()
-    
-    alerts_df = pd.read_sql_query("""SELECT
-                                  a.alert_id,
-                                  s.sku_id, 
-                                  s.product_number,
-                                  s.product_name,
-                                  a.alert_type,
-                                  a.alert_message,
-                                  a.timestamp
-                                  FROM alerts as a INNER JOIN skus as s ON a.sku_id = s.sku_id;""", conn_ref)
-
-    skus_df = pd.read_sql('SELECT * FROM skus WHERE sku_id IN (SELECT sku_id FROM alerts);', conn_ref)
-    
-    dock_status_df = pd.read_sql("""
+    Checks a connection out of the shared pool for `database`.
+
+    Args:
+        database: Optional path to the database file. Defaults to `database_file`.
+        read_only: Use a read-only connection (the dashboard never writes through these).
+
+    Yields:
+        sqlite3.Connection: A pooled connection.
+    """
+    with get_pool(database, read_only).connection() as connection:
+        yield connection
+
+def close_pools():
+    """Closes the idle connections of every shared pool."""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
+
+ALERTS_QUERY = """SELECT
+                  a.alert_id,
+                  s.sku_id,
+                  s.product_number,
+                  s.product_name,
+                  a.alert_type,
+                  a.alert_message,
+                  a.timestamp
+                  FROM alerts as a INNER JOIN skus as s ON a.sku_id = s.sku_id"""
+
+DOCK_STATUS_QUERY = """
         SELECT
             s.sku_id,
-            d.dock_id, 
-            s.product_number, 
+            d.dock_id,
+            s.product_number,
             s.product_name,
             d.staging_lane,
             p.status,
-            p.estimated_completion, 
-            d.dock_location, 
-            d.last_refresh, 
+            p.estimated_completion,
+            d.dock_location,
+            d.last_refresh,
             d.days_of_service,
-            s.destination, 
-            s.remortgage_gallons, 
-            s.pallets, 
-            s.weight_lbs 
+            s.destination,
+            s.remortgage_gallons,
+            s.pallets,
+            s.weight_lbs
         FROM dock_status AS d
         INNER JOIN skus AS s ON d.sku_id = s.sku_id
-        INNER JOIN production_pipeline as p on s.sku_id = p.sku_id
-    """, conn_ref)
+        INNER JOIN production_pipeline as p on s.sku_id = p.sku_id"""
+
+ALERTED_SKUS_QUERY = 'SELECT * FROM skus WHERE sku_id IN (SELECT sku_id FROM alerts);'
+ALL_SKUS_QUERY = 'SELECT * FROM skus;'
+PRODUCTION_PIPELINE_QUERY = 'SELECT * FROM production_pipeline;'
+
+DOCK_STATUS_COLUMNS = {
+    'staging_lane': 'Staging Lane',
+    'dock_location': 'Dock Location',
+    'last_refresh': 'Last Refresh',
+    'status': 'Status',
+    'estimated_completion': 'Estimated Completion',
+    'product_name': 'Product Name',
+    'product_number': 'Product Number',
+    'days_of_service': 'Days of Service',
+    'dock_aging_hours': 'Dock Aging Hours',
+    'destination': 'Destination',
+    'remortgage_gallons': 'Remortgage Gallons',
+    'pallets': 'Pallets',
+    'weight_lbs': 'Weight (lbs)',
+}
+
+# Window used to simulate when each dock record was created
+TIME_CREATED_START = datetime.strptime("2025-08-01 03:00:00", "%Y-%m-%d %H:%M:%S")
+TIME_CREATED_END = datetime.strptime("2025-08-07 23:59:59", "%Y-%m-%d %H:%M:%S")
+
+def random_times(start, end, size, rng=None):
+    """Generate `size` random datetime64 values between `start` and `end` in one vectorized pass."""
+    rng = rng or np.random.default_rng()
+    seconds = rng.integers(0, int((end - start).total_seconds()), size=size, endpoint=True)
+    return np.datetime64(start, 's') + seconds.astype('timedelta64[s]')
+
+def format_dock_status(dock_status_df):
+    """
+    Converts a raw dock_status query result into the display frame used by the dashboard.
+
+    Parses `last_refresh`, attaches a simulated `Time Created` column and renames
+    columns to their display names.
 
+    Args:
+        dock_status_df: DataFrame returned by `DOCK_STATUS_QUERY`.
+
+    Returns:
+        pd.DataFrame: The formatted dock status frame.
+    """
     dock_status_df['last_refresh'] = pd.to_datetime(dock_status_df['last_refresh'], format='%Y-%m-%d %H:%M:%S')
-    dock_status_df['days_of_service'].astype(int)
-
-    # Define your time range and random time in that range
-    start_time = datetime.strptime("2025-08-01 03:00:00", "%Y-%m-%d %H:%M:%S")
-    end_time = datetime.strptime("2025-08-07 23:59:59", "%Y-%m-%d %H:%M:%S")
-    rand_time = random_time(start_time, end_time)
-    dock_status_df["Time Created"] = [random_time(start_time, end_time) for row in range(len(dock_status_df))]
-
-    dock_status_df.rename(columns={
-        'staging_lane': 'Staging Lane', 
-        'dock_location': 'Dock Location', 
-        'last_refresh': 'Last Refresh',
-        'status': 'Status',
-        'estimated_completion': 'Estimated Completion',
-        'product_name': 'Product Name',
-        'product_number': 'Product Number',
-        'days_of_service': 'Days of Service',
-        'dock_aging_hours': 'Dock Aging Hours',
-        'destination': 'Destination',
-        'remortgage_gallons': 'Remortgage Gallons',
-        'pallets': 'Pallets',
-        'weight_lbs': 'Weight (lbs)',
-    }, inplace=True)
-
-    skus_all_df = pd.read_sql('SELECT * FROM skus;', conn_ref)
-    production_pipeline_df = pd.read_sql('SELECT * FROM production_pipeline;', conn_ref)
-
-    data = WarehouseData(alerts_df, skus_df, dock_status_df, skus_all_df, production_pipeline_df)
-    
+    dock_status_df['days_of_service'] = dock_status_df['days_of_service'].astype(int)
+
+    dock_status_df["Time Created"] = pd.to_datetime(random_times(TIME_CREATED_START, TIME_CREATED_END, len(dock_status_df))).as_unit('ns')
+
+    dock_status_df.rename(columns=DOCK_STATUS_COLUMNS, inplace=True)
+    return dock_status_df
+
+@timed('get_all_data')
+def get_all_data(compact=True):
+    """
+    Retrieves and processes all relevant warehouse data from the database.
+
+    This function:
+    - Checks a read-only connection out of the shared pool.
+    - Queries multiple tables: alerts, skus, dock_status, skus_all, and production_pipeline.
+    - Joins and formats the dock_status data for display.
+    - Converts date strings to datetime objects and renames columns for clarity.
+    - Converts the frames to the compact dtypes of `schema.FRAME_SCHEMAS`, unless `compact` is False.
+    - Returns a WarehouseData object containing all the retrieved DataFrames.
+
+    Args:
+        compact: Whether to apply the compact dtypes.
+
+    Returns:
+        WarehouseData: An object containing all the warehouse-related datasets.
+    """
+    with pooled_connection(read_only=True) as conn_ref:
+        with timer('sql.alerts'):
+            alerts_df = pd.read_sql_query(ALERTS_QUERY, conn_ref)
+
+        with timer('sql.skus'):
+            skus_df = pd.read_sql(ALERTED_SKUS_QUERY, conn_ref)
+
+        with timer('sql.dock_status'):
+            dock_status_df = format_dock_status(pd.read_sql(DOCK_STATUS_QUERY, conn_ref))
+
+        with timer('sql.skus_all'):
+            skus_all_df = pd.read_sql(ALL_SKUS_QUERY, conn_ref)
+        with timer('sql.production_pipeline'):
+            production_pipeline_df = pd.read_sql(PRODUCTION_PIPELINE_QUERY, conn_ref)
+
+    frames = {
+        'alerts': alerts_df,
+        'skus': skus_df,
+        'dock_status': dock_status_df,
+        'skus_all': skus_all_df,
+        'production_pipeline': production_pipeline_df,
+    }
+    data = WarehouseData(**(compact_frames(frames) if compact else frames))
+
     return data
@@ -0,0 +1,232 @@
+"""
+Change notification for the dashboard.
+
+A single `ChangeFeed` producer per process merges database changes into its snapshot with an
+`IncrementalLoader`, applies the real-time simulation and publishes immutable, versioned snapshots together with
+a delta describing what changed. Sessions read the latest snapshot and only rebuild what
+belongs to a topic whose version moved, instead of each running its own polling loop.
+
+`SnapshotPublisher` holds the publishing side so `data_service.ServiceFeed` can republish
+snapshots received from a data service process through the same interface.
+"""
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from _logger import log
+from alert_engine import get_alert_engine
+from config import config
+from db import WarehouseData
+from history import get_dock_history
+from loader import IncrementalLoader, prepare_database
+from schema import shared_copy
+from snapshot import snapshot_store
+from updates import simulate_updates
+
+TOPICS = ('dock_status', 'alerts', 'production_pipeline', 'skus')
+# Topic published for each frame reported by the loader
+DELTA_TOPICS = {'skus_all': 'skus', 'skus': 'skus', 'dock_status': 'dock_status',
+                'production_pipeline': 'production_pipeline', 'alerts': 'alerts'}
+
+
+def shared_view(data: WarehouseData) -> WarehouseData:
+    """
+    Returns a `WarehouseData` whose frames share memory with `data` until written to, see
+    `schema.shared_copy`.
+
+    Sessions modifying a published frame copy only the columns they touch, so the producer's
+    frames are never changed from the outside and idle sessions hold no private copy.
+    """
+    views = {name: shared_copy(frame) if frame is not None else None for name, frame in data.frames().items()}
+    aggregates = data.aggregates.copy() if data.aggregates is not None else None
+    return WarehouseData(**views, version=data.version, aggregates=aggregates)
+
+
+@dataclass(frozen=True)
+class Delta:
+    """
+    What changed between two published versions.
+
+    Attributes:
+        version (int): Version published with this delta.
+        topics (frozenset[str]): Topics whose data changed.
+        dock_ids (tuple[int]): Dock rows changed by the simulation.
+        days_of_service (tuple[int]): New Days of Service of each row in `dock_ids`.
+        refreshed (datetime): Time the simulation stamped the rows with.
+        replayable (bool): Whether the simulated dock updates are the only change, so a copy
+            of the previous version can be brought up to date with `updates.apply_updates`.
+    """
+    version: int
+    topics: frozenset
+    dock_ids: tuple = ()
+    days_of_service: tuple = ()
+    refreshed: datetime = None
+    replayable: bool = False
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """
+    An immutable view of the data published by the feed.
+
+    Attributes:
+        version (int): Monotonic publish counter.
+        topic_versions (dict[str, int]): Version at which each topic last changed.
+        data (WarehouseData): Copy-on-write views of the frames; treat as read-only.
+    """
+    version: int
+    topic_versions: dict = field(default_factory=dict)
+    data: WarehouseData = None
+
+
+class SnapshotPublisher:
+    """
+    Publishes immutable, versioned snapshots and keeps a bounded history of their deltas.
+
+    Subclasses produce the data and call `_publish`; readers use `snapshot`, `since` and `wait`.
+    """
+
+    def __init__(self, history=256):
+        self._deltas = deque(maxlen=history)
+        self._condition = threading.Condition()
+        self._snapshot = Snapshot(0, {topic: 0 for topic in TOPICS})
+
+    def _publish(self, topics, data, **changes):
+        """Publishes copy-on-write views of `data` as the next version, with `topics` changed."""
+        with self._condition:
+            version = self._snapshot.version + 1
+            topic_versions = dict(self._snapshot.topic_versions)
+            topic_versions.update({topic: version for topic in topics})
+            delta = Delta(version, topics, **changes)
+            self._snapshot = Snapshot(version, topic_versions, shared_view(data))
+            self._deltas.append(delta)
+            self._condition.notify_all()
+        return delta
+
+    def snapshot(self):
+        """Returns the latest published snapshot."""
+        with self._condition:
+            return self._snapshot
+
+    def since(self, version):
+        """
+        Returns the deltas published after `version`.
+
+        Returns:
+            list[Delta]: Deltas in publish order, or None if `version` is older than the
+            retained history and the caller must treat everything as changed.
+        """
+        with self._condition:
+            if self._deltas and version < self._deltas[0].version - 1:
+                return None
+            return [delta for delta in self._deltas if delta.version > version]
+
+    def wait(self, version, timeout=None):
+        """
+        Blocks until a snapshot newer than `version` is published or `timeout` expires.
+
+        Returns:
+            Snapshot: The latest snapshot.
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self._snapshot.version > version, timeout)
+            return self._snapshot
+
+
+class ChangeFeed(SnapshotPublisher):
+    """
+    Background producer of versioned warehouse snapshots.
+
+    Attributes:
+        interval (float): Seconds between producer ticks.
+        simulate (bool): Whether each tick applies `updates.simulate_updates`.
+        dock_history (history.DockHistory): Where every changed dock row is sampled, if anywhere.
+
+    The dashboard's in-process feed reads through read-only connections; pass `prune=True` only
+    where the feed owns the database (the data service), to keep pruning the change log.
+    """
+
+    def __init__(self, database=None, interval=config.REFRESH_INTERVAL_SECONDS, simulate=True, history=256, prune=False):
+        super().__init__(history)
+        self.database = database
+        self.loader = IncrementalLoader(database, snapshot_store(database), prune=prune)
+        self.interval = interval
+        self.simulate = simulate
+        self.dock_history = get_dock_history(database) if config.HISTORY_ENABLED else None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Prepares the database, publishes an initial snapshot and starts the producer thread."""
+        if self._thread is not None:
+            return self
+        prepare_database(self.database, self.loader.snapshots)
+        self.tick()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='change-feed', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stops the producer thread and spills the dock history."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self.dock_history is not None:
+            self.dock_history.flush()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.tick()
+            except Exception:
+                log.exception("Change feed tick failed")
+
+    def tick(self):
+        """
+        Runs one producer step and publishes a new snapshot if anything changed.
+
+        Returns:
+            Delta: The published delta, or None if nothing changed.
+        """
+        first = self.loader.data is None
+        report = self.loader.refresh()
+        if first or report.reloaded:
+            topics = set(TOPICS)
+        else:
+            topics = {DELTA_TOPICS[delta.table] for delta in report.deltas if delta.upserted or delta.deleted}
+        replayable = not topics
+        simulated = {}
+
+        now = datetime.now()
+        if report.dock_changes is not None:
+            # Rows changed in the database can cross the alert threshold as well
+            changes = report.dock_changes
+            raised = get_alert_engine(self.database).raise_alerts(
+                self.loader.data, changes, changes['previous'].fillna(float('inf')), changes['Days of Service'], self.database)
+            if len(raised):
+                topics.update(('alerts', 'skus'))
+            if self.dock_history is not None:
+                # Sampled from the merged frame, which keeps the rows' creation times
+                dock_status = self.loader.data.dock_status
+                self.dock_history.record_rows(dock_status[dock_status['dock_id'].isin(changes['dock_id'])], now)
+
+        if self.simulate:
+            data = self.loader.data
+            alert_count = len(data.alerts)
+            positions = simulate_updates(data, now=now, database=self.database)
+            if self.dock_history is not None:
+                self.dock_history.record_rows(data.dock_status.iloc[positions], now)
+            simulated = {'dock_ids': tuple(data.dock_status['dock_id'].to_numpy()[positions].tolist()),
+                         'days_of_service': tuple(data.dock_status['Days of Service'].to_numpy()[positions].tolist()),
+                         'refreshed': now}
+            topics.add('dock_status')
+            if len(data.alerts) != alert_count:
+                topics.update(('alerts', 'skus'))
+                replayable = False
+
+        if not topics:
+            return None
+        return self._publish(frozenset(topics), self.loader.data, replayable=replayable, **simulated)
@@ -0,0 +1,123 @@
+"""
+Indexed filtering for the dock status table.
+
+`FilterIndex` factorizes each filterable column of a frame once and keeps, for every value, the
+sorted row positions that hold it. A combined filter is answered by intersecting those position
+arrays, smallest first, so a filter never rescans the frame and extra dimensions cost nothing
+until they are used. An index belongs to one version of the data and memoizes its results per
+filter combination, which makes the results memoized per (filters, data version) overall.
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# Selectbox value that disables a filter
+ALL = 'All'
+
+# Urgency bands over Days of Service as (exclusive lower bound, inclusive upper bound)
+URGENCY_BANDS = {'Urgent': (None, 7), 'Not-Urgent': (7, None)}
+
+# Columns of the dock status table that can be filtered by value
+DOCK_STATUS_DIMENSIONS = ('Dock Location', 'Destination', 'Staging Lane', 'Status', 'Product Name')
+# Dimensions derived from bands over a numeric column
+DOCK_STATUS_BANDS = {'Urgency': ('Days of Service', URGENCY_BANDS)}
+
+_EMPTY = np.empty(0, dtype=np.intp)
+
+
+def _value_positions(column):
+    """Returns {value: sorted row positions} for every distinct non-null value of `column`."""
+    codes, uniques = pd.factorize(column, sort=False)
+    if not len(uniques):
+        # np.split would still return one (empty) group
+        return {}
+    order = np.argsort(codes, kind='stable')
+    # Null values get code -1 and sort first; they never match a filter
+    start = np.searchsorted(codes[order], 0)
+    counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+    return dict(zip(uniques.tolist(), np.split(order[start:], np.cumsum(counts)[:-1]), strict=True))
+
+
+def _band_positions(column, bands):
+    """Returns {label: sorted row positions} for every band of `column`."""
+    values = np.asarray(column)
+    positions = {}
+    for label, (lower, upper) in bands.items():
+        mask = np.ones(len(values), dtype=bool)
+        if lower is not None:
+            mask &= values > lower
+        if upper is not None:
+            mask &= values <= upper
+        positions[label] = np.flatnonzero(mask)
+    return positions
+
+
+class FilterIndex:
+    """
+    Per-value row positions for the filterable dimensions of a frame.
+
+    Attributes:
+        df (pd.DataFrame): The indexed frame; treat as read-only.
+        dimensions (tuple[str]): Names that can be passed to `select` and `options`.
+    """
+
+    def __init__(self, df, dimensions=DOCK_STATUS_DIMENSIONS, bands=DOCK_STATUS_BANDS, memo_size=64):
+        self.df = df
+        self._positions = {column: _value_positions(df[column]) for column in dimensions if column in df}
+        self._positions.update({name: _band_positions(df[column], column_bands)
+                                for name, (column, column_bands) in bands.items() if column in df})
+        self.dimensions = tuple(self._positions)
+        self._memo = OrderedDict()
+        self._memo_size = memo_size
+        self._lock = threading.Lock()
+
+    def options(self, dimension):
+        """Returns the selectbox options for `dimension`: 'All' followed by its values in order of appearance."""
+        return [ALL, *self._positions[dimension]]
+
+    def positions(self, filters):
+        """
+        Returns the row positions matching every filter.
+
+        Args:
+            filters: dict of dimension to selected value; None and 'All' match every row.
+
+        Returns:
+            np.ndarray: Sorted positions, or None if no filter is active.
+        """
+        active = [(dimension, value) for dimension, value in filters.items() if value not in (None, ALL)]
+        if not active:
+            return None
+        # Intersect from the most selective filter so each step shrinks the working set
+        sets = sorted((self._positions[dimension].get(value, _EMPTY) for dimension, value in active), key=len)
+        result = sets[0]
+        for other in sets[1:]:
+            if not len(result):
+                break
+            result = np.intersect1d(result, other, assume_unique=True)
+        return result
+
+    def select(self, filters):
+        """
+        Returns the rows of `df` matching every filter, memoized per filter combination.
+
+        Args:
+            filters: dict of dimension to selected value; None and 'All' match every row.
+
+        Returns:
+            pd.DataFrame: The matching rows in their original order.
+        """
+        key = tuple(sorted((dimension, value) for dimension, value in filters.items() if value not in (None, ALL)))
+        with self._lock:
+            if key in self._memo:
+                self._memo.move_to_end(key)
+                return self._memo[key]
+        positions = self.positions(dict(key))
+        result = self.df if positions is None else self.df.iloc[positions]
+        with self._lock:
+            self._memo[key] = result
+            while len(self._memo) > self._memo_size:
+                self._memo.popitem(last=False)
+        return result
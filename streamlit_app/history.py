@@ -0,0 +1,330 @@
+"""
+Time-windowed history of per-dock Days of Service and Dock Aging Hours.
+
+The dashboard frames only hold the latest value of every dock, so `DockHistory` keeps the
+samples the producer sees. Samples are appended to fixed-size NumPy arrays used as a ring
+buffer and spilled to SQLite in batches. Every spill also folds the batch into per-minute,
+per-hour and per-day rollups, per dock and for the changed docks together, so a trend over
+weeks is read from a bounded number of precomputed buckets instead of from the raw samples.
+
+Docks are sampled when they change, not on a schedule, so the `CHANGED_DOCKS` rollups are
+means over the changed rows of each bucket rather than over the whole fleet.
+
+Every spill also drops what has aged out, in the same transaction: raw samples and minute
+rollups after `HISTORY_RETENTION_DAYS`, hour rollups after `HISTORY_HOUR_RETENTION_DAYS`.
+Day rollups are kept forever. History is best effort: a spill that fails is logged and
+retried with the next one, and never raises into the producer.
+
+Samples that have not been spilled yet live only in the memory of the producing process,
+and are merged into the results of `query` there.
+
+Usage:
+    history.record(now, dock_ids, days_of_service, aging_hours)
+    history.query(start, end)                   # changed docks, resolution picked for the range
+    history.query(start, end, dock_ids=[3, 4], resolution='hour')
+"""
+import atexit
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from _logger import log
+from config import config
+from db import database_file, pooled_connection
+from instrumentation import timer
+
+# Seconds per bucket of each precomputed rollup, finest first
+RESOLUTIONS = {'minute': 60, 'hour': 3600, 'day': 86400}
+# Rollup rows with this dock_id aggregate the samples of every dock in the bucket, i.e. of the
+# rows that changed, not of the whole fleet; real dock ids start at 1
+CHANGED_DOCKS = 0
+HISTORY_COLUMNS = ['time', 'dock_id', 'Days of Service', 'Dock Aging Hours']
+TREND_COLUMNS = ['time', 'dock_id', 'samples', 'Days of Service', 'Min Days of Service', 'Max Days of Service',
+                 'Dock Aging Hours']
+_ROLLUP_COLUMNS = ['bucket', 'dock_id', 'samples', 'dos_sum', 'dos_min', 'dos_max', 'aging_max']
+
+
+def _seconds(times):
+    """Converts datetimes to float seconds on the same (naive) clock `query` converts back from."""
+    return np.asarray(times, dtype='datetime64[ns]').astype(np.int64) / 1e9
+
+
+def rollup(seconds, dock_ids, days_of_service, aging_hours, step):
+    """
+    Aggregates samples into buckets of `step` seconds, per dock and for `CHANGED_DOCKS`.
+
+    Returns:
+        pd.DataFrame: Columns `_ROLLUP_COLUMNS`, one row per (bucket, dock_id).
+    """
+    samples = pd.DataFrame({'bucket': (np.floor_divide(seconds, step) * step).astype(np.int64), 'dock_id': dock_ids,
+                            'dos': days_of_service, 'aging': aging_hours})
+    per_dock = samples.groupby(['bucket', 'dock_id'], sort=False).agg(
+        samples=('dos', 'size'), dos_sum=('dos', 'sum'), dos_min=('dos', 'min'), dos_max=('dos', 'max'),
+        aging_max=('aging', 'max'))
+    return pd.concat([combine(per_dock.reset_index().assign(dock_id=CHANGED_DOCKS)), per_dock.reset_index()],
+                     ignore_index=True)[_ROLLUP_COLUMNS]
+
+
+def combine(rollups):
+    """Merges rollup rows of the same (bucket, dock_id), e.g. stored buckets and not yet spilled ones."""
+    return rollups.groupby(['bucket', 'dock_id'], as_index=False, sort=False).agg(
+        samples=('samples', 'sum'), dos_sum=('dos_sum', 'sum'), dos_min=('dos_min', 'min'), dos_max=('dos_max', 'max'),
+        aging_max=('aging_max', 'max'))
+
+
+class DockHistory:
+    """
+    In-memory ring buffer of dock samples that spills to SQLite in batches.
+
+    Attributes:
+        database (str): Path to the history database.
+        capacity (int): Samples kept in memory, so also the most samples waiting for a spill.
+        batch_size (int): Unspilled samples that trigger a spill.
+        retention (timedelta): How long raw samples and minute rollups are kept on disk.
+        hour_retention (timedelta): How long hour rollups are kept on disk; day rollups are kept forever.
+    """
+
+    def __init__(self, database, capacity=config.HISTORY_CAPACITY, batch_size=config.HISTORY_BATCH_SIZE,
+                 retention=timedelta(days=config.HISTORY_RETENTION_DAYS),
+                 hour_retention=timedelta(days=config.HISTORY_HOUR_RETENTION_DAYS)):
+        self.database = database
+        self.capacity = capacity
+        self.batch_size = min(batch_size, capacity)
+        self.retention = retention
+        self.hour_retention = hour_retention
+        self._seconds = np.zeros(capacity, dtype=np.float64)
+        self._dock_ids = np.zeros(capacity, dtype=np.int64)
+        self._days_of_service = np.zeros(capacity, dtype=np.int32)
+        self._aging_hours = np.zeros(capacity, dtype=np.int32)
+        # Samples ever appended, and how many of them have been spilled
+        self._appended = 0
+        self._spilled = 0
+        self._lock = threading.RLock()
+        self._prepared = False
+
+    def record(self, times, dock_ids, days_of_service, aging_hours):
+        """
+        Appends one sample per dock, spilling full batches to SQLite.
+
+        Args:
+            times: Sample time, one datetime for the whole batch or one per sample.
+            dock_ids: Dock of each sample.
+            days_of_service: Days of Service of each sample.
+            aging_hours: Dock Aging Hours of each sample.
+        """
+        dock_ids = np.asarray(dock_ids, dtype=np.int64)
+        seconds = np.broadcast_to(_seconds(times), dock_ids.shape)
+        days_of_service = np.asarray(days_of_service, dtype=np.int32)
+        aging_hours = np.asarray(aging_hours, dtype=np.int32)
+        with self._lock:
+            for start in range(0, len(dock_ids), self.capacity):
+                end = start + self.capacity
+                if self._appended - self._spilled + len(dock_ids[start:end]) > self.capacity:
+                    self.flush()
+                self._write(seconds[start:end], dock_ids[start:end], days_of_service[start:end], aging_hours[start:end])
+            full = self._appended - self._spilled >= self.batch_size
+        if full:
+            self.flush()
+
+    def record_rows(self, rows, now=None):
+        """Appends a sample of each dock row, with its Dock Aging Hours as of `now`."""
+        now = np.datetime64(now or datetime.now(), 'ns')
+        aging_hours = (now - rows['Time Created'].to_numpy(dtype='datetime64[ns]')) // np.timedelta64(1, 'h')
+        self.record(now, rows['dock_id'].to_numpy(), rows['Days of Service'].to_numpy(), aging_hours)
+
+    def _write(self, seconds, dock_ids, days_of_service, aging_hours):
+        slots = (self._appended + np.arange(len(dock_ids))) % self.capacity
+        self._seconds[slots] = seconds
+        self._dock_ids[slots] = dock_ids
+        self._days_of_service[slots] = days_of_service
+        self._aging_hours[slots] = aging_hours
+        self._appended += len(dock_ids)
+
+    def _buffered(self, first):
+        """Returns the (seconds, dock_ids, days_of_service, aging_hours) of samples `first` onwards still in memory."""
+        slots = np.arange(max(first, self._appended - self.capacity), self._appended) % self.capacity
+        return self._seconds[slots], self._dock_ids[slots], self._days_of_service[slots], self._aging_hours[slots]
+
+    def pending(self):
+        """Returns the number of samples not spilled yet."""
+        with self._lock:
+            return self._appended - self._spilled
+
+    def flush(self):
+        """
+        Spills every unspilled sample and its rollups in one transaction, and drops the samples
+        and rollups past their retention.
+
+        A spill that fails is logged and the samples stay buffered for the next one; samples
+        the ring buffer overwrites meanwhile are lost.
+
+        Returns:
+            int: Samples spilled.
+        """
+        with self._lock:
+            first, last = self._spilled, self._appended
+            if first == last:
+                return 0
+            seconds, dock_ids, days_of_service, aging_hours = self._buffered(first)
+            try:
+                self._spill(seconds, dock_ids, days_of_service, aging_hours)
+            except sqlite3.Error as e:
+                # History is best effort and must never break the producer that records it
+                log.warning("Could not spill %d dock history samples to %s: %s", len(seconds), self.database, e)
+                return 0
+            self._spilled = last
+        log.debug("Spilled %d dock history samples", last - first)
+        return last - first
+
+    def _spill(self, seconds, dock_ids, days_of_service, aging_hours):
+        with timer('history.flush'), pooled_connection(self.database) as connection:
+            self._prepare(connection)
+            with connection:
+                connection.executemany(
+                    'INSERT INTO dock_history (time, dock_id, days_of_service, aging_hours) VALUES (?, ?, ?, ?)',
+                    zip(seconds.tolist(), dock_ids.tolist(), days_of_service.tolist(), aging_hours.tolist(), strict=True))
+                for resolution, step in RESOLUTIONS.items():
+                    rows = rollup(seconds, dock_ids, days_of_service, aging_hours, step)
+                    connection.executemany(f"""
+                        INSERT INTO dock_history_{resolution} ({', '.join(_ROLLUP_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?, ?)
+                        ON CONFLICT (bucket, dock_id) DO UPDATE SET
+                            samples = samples + excluded.samples,
+                            dos_sum = dos_sum + excluded.dos_sum,
+                            dos_min = MIN(dos_min, excluded.dos_min),
+                            dos_max = MAX(dos_max, excluded.dos_max),
+                            aging_max = MAX(aging_max, excluded.aging_max)""",
+                        rows.to_numpy().tolist())
+                newest = seconds.max()
+                connection.execute('DELETE FROM dock_history WHERE time < ?', (newest - self.retention.total_seconds(),))
+                for resolution, retention in (('minute', self.retention), ('hour', self.hour_retention)):
+                    # Only buckets that ended before the cutoff
+                    cutoff = newest - retention.total_seconds() - RESOLUTIONS[resolution]
+                    connection.execute(f'DELETE FROM dock_history_{resolution} WHERE bucket < ?', (cutoff,))
+
+    def _prepare(self, connection):
+        if self._prepared:
+            return
+        with connection:
+            connection.execute('CREATE TABLE IF NOT EXISTS dock_history '
+                               '(time REAL NOT NULL, dock_id INTEGER NOT NULL, days_of_service INTEGER, aging_hours INTEGER)')
+            connection.execute('CREATE INDEX IF NOT EXISTS idx_dock_history_dock_time ON dock_history(dock_id, time)')
+            connection.execute('CREATE INDEX IF NOT EXISTS idx_dock_history_time ON dock_history(time)')
+            for resolution in RESOLUTIONS:
+                connection.execute(f"""CREATE TABLE IF NOT EXISTS dock_history_{resolution} (
+                    bucket INTEGER NOT NULL, dock_id INTEGER NOT NULL, samples INTEGER, dos_sum INTEGER,
+                    dos_min INTEGER, dos_max INTEGER, aging_max INTEGER,
+                    PRIMARY KEY (dock_id, bucket)) WITHOUT ROWID""")
+            for resolution in ('minute', 'hour'):
+                # For the retention deletes
+                connection.execute(f'CREATE INDEX IF NOT EXISTS idx_dock_history_{resolution}_bucket '
+                                   f'ON dock_history_{resolution}(bucket)')
+        self._prepared = True
+
+    @staticmethod
+    def resolution_for(start, end, max_points=config.HISTORY_MAX_POINTS):
+        """Returns the finest rollup with at most `max_points` buckets between `start` and `end`."""
+        span = (end - start).total_seconds()
+        for resolution, step in RESOLUTIONS.items():
+            if span / step <= max_points:
+                return resolution
+        return 'day'
+
+    def query(self, start, end, dock_ids=None, resolution=None, max_points=config.HISTORY_MAX_POINTS):
+        """
+        Reads the history between `start` (inclusive) and `end` (exclusive).
+
+        Args:
+            start: Start of the range.
+            end: End of the range.
+            dock_ids: Docks to read; None for the trend of the changed docks together.
+            resolution: 'raw', 'minute', 'hour' or 'day'; None picks `resolution_for` the range.
+            max_points: Bucket budget used to pick the resolution.
+
+        Returns:
+            pd.DataFrame: Raw samples with columns `HISTORY_COLUMNS`, or one row per bucket
+            and dock with columns `TREND_COLUMNS` ('Days of Service' is the bucket mean). The
+            dock_id of rows for the changed docks together is `CHANGED_DOCKS`.
+        """
+        resolution = resolution or self.resolution_for(start, end, max_points)
+        low, high = _seconds(start).item(), _seconds(end).item()
+        if resolution != 'raw':
+            # The bucket holding `start` is returned whole
+            low = low // RESOLUTIONS[resolution] * RESOLUTIONS[resolution]
+        docks = [CHANGED_DOCKS] if dock_ids is None and resolution != 'raw' else dock_ids
+        with self._lock:
+            stored = self._read(resolution, low, high, docks)
+            seconds, ids, days_of_service, aging_hours = self._buffered(self._spilled)
+
+        recent = (seconds >= low) & (seconds < high)
+        if docks is not None and CHANGED_DOCKS not in docks:
+            recent &= np.isin(ids, docks)
+        if resolution == 'raw':
+            buffered = pd.DataFrame({'time': seconds[recent], 'dock_id': ids[recent], 'Days of Service': days_of_service[recent],
+                                     'Dock Aging Hours': aging_hours[recent]})
+            history = pd.concat([frame for frame in (stored, buffered) if len(frame)] or [stored], ignore_index=True)
+            history['time'] = pd.to_datetime(history['time'], unit='s')
+            return history.sort_values(['dock_id', 'time'], kind='stable').reset_index(drop=True)[HISTORY_COLUMNS]
+
+        if recent.any():
+            buffered = rollup(seconds[recent], ids[recent], days_of_service[recent], aging_hours[recent], RESOLUTIONS[resolution])
+            if docks is not None:
+                buffered = buffered[buffered['dock_id'].isin(docks)]
+            stored = combine(pd.concat([frame for frame in (stored, buffered) if len(frame)], ignore_index=True))
+        trend = pd.DataFrame({
+            'time': pd.to_datetime(stored['bucket'], unit='s'),
+            'dock_id': stored['dock_id'].astype(np.int64),
+            'samples': stored['samples'].astype(np.int64),
+            'Days of Service': stored['dos_sum'] / stored['samples'],
+            'Min Days of Service': stored['dos_min'],
+            'Max Days of Service': stored['dos_max'],
+            'Dock Aging Hours': stored['aging_max'],
+        })
+        return trend.sort_values(['dock_id', 'time'], kind='stable').reset_index(drop=True)[TREND_COLUMNS]
+
+    def _read(self, resolution, low, high, docks):
+        """Reads the spilled rows of one resolution in [low, high)."""
+        if resolution == 'raw':
+            query = ('SELECT time, dock_id, days_of_service AS "Days of Service", aging_hours AS "Dock Aging Hours" '
+                     'FROM dock_history WHERE time >= ? AND time < ?')
+            key = 'time'
+        else:
+            query = f'SELECT {", ".join(_ROLLUP_COLUMNS)} FROM dock_history_{resolution} WHERE bucket >= ? AND bucket < ?'
+            key = 'bucket'
+        params = [low, high]
+        if docks is not None:
+            query += f' AND dock_id IN ({",".join("?" * len(docks))})'
+            params += list(docks)
+        with timer(f'history.query.{resolution}'), pooled_connection(self.database) as connection:
+            self._prepare(connection)
+            return pd.read_sql_query(f'{query} ORDER BY dock_id, {key}', connection, params=params)
+
+
+_histories = {}
+_histories_lock = threading.Lock()
+
+
+def get_dock_history(database=None):
+    """
+    Returns the process-wide dock history of `database`, creating it on first use.
+
+    The history is stored in `config.HISTORY_DATABASE`, defaulting to '<database>.history.db'.
+    """
+    key = str(Path(database or database_file).resolve())
+    with _histories_lock:
+        history = _histories.get(key)
+        if history is None:
+            history = _histories[key] = DockHistory(config.HISTORY_DATABASE or f'{key}.history.db')
+        return history
+
+
+@atexit.register
+def _flush_all():
+    for history in list(_histories.values()):
+        try:
+            history.flush()
+        except Exception:
+            log.exception("Could not spill dock history on exit")
@@ -0,0 +1,242 @@
+"""
+Timing and counting of the hot paths.
+
+Stages are timed with the `timed` decorator or the `timer` context manager and recorded into
+fixed-bucket histograms, so recording is a constant-time bucket increment and percentiles
+are read back without keeping the samples. Counters track how often things happen.
+
+Every timing is also:
+- logged as a structured JSON event on the `timings` logger when it is enabled for DEBUG
+  (see `_logger.logging_config` and `config.TIMINGS_LOG_FILE`), and
+- buffered for `times.db` when `config.TIMES_DATABASE` is set, and written in batches.
+
+Usage:
+    @timed('get_all_data')
+    def get_all_data(): ...
+
+    with timer('sql.alerts'):
+        connection.execute(...)
+
+    metrics.summary()  # count, mean, p50, p95, p99 and max per stage
+"""
+import atexit
+import functools
+import logging
+import math
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+from _logger import log, timing_log
+from config import config
+
+# Buckets grow by 2**(1/8) (about 9%) from 1 microsecond to about 4.5 minutes, so a percentile
+# read from the buckets is within one bucket width of the exact value
+_BUCKETS_PER_DOUBLING = 8
+_MIN_SECONDS = 1e-6
+_BUCKET_COUNT = 28 * _BUCKETS_PER_DOUBLING
+_UPPER_BOUNDS = [_MIN_SECONDS * 2 ** ((bucket + 1) / _BUCKETS_PER_DOUBLING) for bucket in range(_BUCKET_COUNT)]
+
+PERCENTILES = (50, 95, 99)
+
+
+class Histogram:
+    """
+    Log-bucketed histogram of durations in seconds.
+
+    Attributes:
+        count (int): Samples recorded.
+        total (float): Sum of the samples.
+        max (float): Largest sample.
+    """
+
+    def __init__(self):
+        self._buckets = [0] * _BUCKET_COUNT
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        """Adds one sample."""
+        if seconds <= _MIN_SECONDS:
+            bucket = 0
+        else:
+            bucket = min(int(math.log2(seconds / _MIN_SECONDS) * _BUCKETS_PER_DOUBLING), _BUCKET_COUNT - 1)
+        with self._lock:
+            self._buckets[bucket] += 1
+            self.count += 1
+            self.total += seconds
+            if seconds > self.max:
+                self.max = seconds
+
+    def percentile(self, percent):
+        """
+        Returns the upper bound of the bucket holding the `percent`th percentile, capped at the maximum.
+
+        Returns:
+            float: Seconds, or 0.0 if nothing has been recorded.
+        """
+        with self._lock:
+            buckets, count, largest = list(self._buckets), self.count, self.max
+        if not count:
+            return 0.0
+        rank = math.ceil(count * percent / 100)
+        seen = 0
+        for bucket, samples in enumerate(buckets):
+            seen += samples
+            if seen >= rank:
+                return min(_UPPER_BOUNDS[bucket], largest)
+        return largest
+
+    def summary(self):
+        """Returns count, mean, percentiles and max, in seconds."""
+        summary = {'count': self.count, 'mean': self.total / self.count if self.count else 0.0}
+        summary.update({f'p{percent}': self.percentile(percent) for percent in PERCENTILES})
+        summary['max'] = self.max
+        return summary
+
+
+class TimesStore:
+    """
+    Buffers stage timings and writes them to the `times` table of `times.db` in batches.
+
+    The table is extended with `stage` and `seconds` columns on first use; `time` holds
+    when the stage finished.
+
+    Attributes:
+        database (str): Path to the timings database.
+        batch_size (int): Buffered timings that trigger a write.
+    """
+
+    def __init__(self, database, batch_size=config.TIMES_BATCH_SIZE):
+        self.database = database
+        self.batch_size = batch_size
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._prepared = False
+
+    def add(self, stage, seconds):
+        """Buffers one timing, writing the batch once it is full."""
+        with self._lock:
+            self._buffer.append((datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f'), stage, seconds))
+            full = len(self._buffer) >= self.batch_size
+        if full:
+            self.flush()
+
+    def flush(self):
+        """
+        Writes every buffered timing in one transaction.
+
+        Returns:
+            int: Timings written.
+        """
+        with self._lock:
+            buffer, self._buffer = self._buffer, []
+        if not buffer:
+            return 0
+        try:
+            with sqlite3.connect(self.database) as connection:
+                self._prepare(connection)
+                connection.executemany('INSERT INTO times (time, stage, seconds) VALUES (?, ?, ?)', buffer)
+        except sqlite3.Error as e:
+            # Timings are best effort and must never break the code being timed
+            log.warning("Could not write %d timings to %s: %s", len(buffer), self.database, e)
+            return 0
+        return len(buffer)
+
+    def _prepare(self, connection):
+        if self._prepared:
+            return
+        connection.execute('CREATE TABLE IF NOT EXISTS times (id INTEGER PRIMARY KEY AUTOINCREMENT, time TEXT)')
+        columns = {row[1] for row in connection.execute('PRAGMA table_info(times)')}
+        for column, kind in (('stage', 'TEXT'), ('seconds', 'REAL')):
+            if column not in columns:
+                connection.execute(f'ALTER TABLE times ADD COLUMN {column} {kind}')
+        self._prepared = True
+
+
+class Metrics:
+    """
+    Process-wide registry of stage histograms and counters.
+
+    Attributes:
+        store (TimesStore): Where timings are persisted, if anywhere.
+    """
+
+    def __init__(self, store=None):
+        self.store = store
+        self._histograms = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, stage):
+        """Returns the histogram for `stage`, creating it on first use."""
+        histogram = self._histograms.get(stage)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(stage, Histogram())
+        return histogram
+
+    def record(self, stage, seconds):
+        """Records one timing of `stage`."""
+        self.histogram(stage).record(seconds)
+        if timing_log.isEnabledFor(logging.DEBUG):
+            timing_log.debug('timing', extra={'stage': stage, 'seconds': seconds})
+        if self.store is not None:
+            self.store.add(stage, seconds)
+
+    def count(self, name, amount=1):
+        """Adds `amount` to counter `name`."""
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    @contextmanager
+    def timer(self, stage):
+        """Times the body of a `with` block as `stage`, including when it raises."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - started)
+
+    def timed(self, stage):
+        """Decorator timing every call of the function as `stage`."""
+        def decorator(function):
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return function(*args, **kwargs)
+                finally:
+                    self.record(stage, time.perf_counter() - started)
+            return wrapper
+        return decorator
+
+    def summary(self):
+        """
+        Returns the timings and counters recorded so far.
+
+        Returns:
+            tuple[dict[str, dict], dict[str, int]]: Per-stage `Histogram.summary` and the counters.
+        """
+        with self._lock:
+            histograms, counters = dict(self._histograms), dict(self._counters)
+        return {stage: histograms[stage].summary() for stage in sorted(histograms)}, counters
+
+    def reset(self):
+        """Forgets every timing and counter."""
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+
+metrics = Metrics(TimesStore(config.TIMES_DATABASE) if config.TIMES_DATABASE else None)
+timed = metrics.timed
+timer = metrics.timer
+count = metrics.count
+
+if metrics.store is not None:
+    atexit.register(metrics.store.flush)
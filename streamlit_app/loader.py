@@ -0,0 +1,454 @@
+"""
+Incremental loading of warehouse data.
+
+`get_all_data` rebuilds every frame from scratch. `IncrementalLoader` does that once and
+then keeps the resulting `WarehouseData` snapshot current by pulling only the rows that
+changed since its last refresh. Changes are tracked in the `change_log` table created by
+`migrations`, which is fed by triggers on the source tables, so updates and deletes are
+picked up as well as inserts.
+
+Loaders only read through read-only connections. Schema migrations and change-log pruning
+need write access, so the producer runs them once at startup with `prepare_database`, and only
+the data service's loader (`prune=True`) keeps pruning as it refreshes. Entries every reader
+has consumed are pruned (see `prune_point`); a loader that falls behind the pruned point
+reloads in full instead of missing changes.
+"""
+import logging
+import sqlite3
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import pandas as pd
+
+from _logger import log
+from aggregates import WarehouseAggregates
+from config import config
+from db import (ALERTS_QUERY, ALL_SKUS_QUERY,
+                DOCK_STATUS_QUERY, PRODUCTION_PIPELINE_QUERY, WarehouseData,
+                database_file, format_dock_status, pooled_connection)
+from instrumentation import metrics, timed
+from migrations import LATEST_VERSION, TRACKED_TABLES, database_id, migrate, schema_version
+from schema import Dimensions, align_categories, apply_schema, compact_frames, memory_usage, shared_copy
+from streaming import concat_chunks, stream_query
+
+@dataclass
+class TableDelta:
+    """
+    Size and cost of the delta applied to one frame during a refresh.
+
+    Attributes:
+        table (str): Name of the frame that was updated.
+        upserted (int): Number of rows inserted or replaced.
+        deleted (int): Number of rows removed.
+        seconds (float): Wall time spent querying and merging.
+    """
+    table: str
+    upserted: int = 0
+    deleted: int = 0
+    seconds: float = 0.0
+
+
+@dataclass
+class RefreshReport:
+    """
+    Summary of a single `IncrementalLoader.refresh` call.
+
+    Attributes:
+        watermark (int): `change_id` the snapshot is current up to.
+        deltas (list[TableDelta]): Per-frame delta sizes and timings.
+        seconds (float): Total wall time of the refresh.
+        dock_changes (pd.DataFrame): Dock rows re-read by the refresh, with their Days of Service
+            before it in 'previous' (NaN for new rows); None if no dock row changed.
+        reloaded (bool): Whether the changes had been pruned from the change log, so every
+            frame was reloaded and must be treated as changed.
+    """
+    watermark: int
+    deltas: list = field(default_factory=list)
+    seconds: float = 0.0
+    dock_changes: pd.DataFrame = None
+    reloaded: bool = False
+
+    @property
+    def changed(self):
+        """True if any frame received rows during the refresh."""
+        return any(delta.upserted or delta.deleted for delta in self.deltas)
+
+
+def merge_rows(df, delta, key, deleted_ids=()):
+    """
+    Merges `delta` into `df` by `key`, replacing matching rows and appending new ones.
+
+    Rows whose key is in `deleted_ids` are dropped. Existing rows are overwritten in place
+    so the frame keeps its column order and index; only new rows cause an append.
+
+    Args:
+        df: The frame to update.
+        delta: Rows to upsert; must contain `key` and a subset of `df`'s columns.
+        key: Name of the primary key column.
+        deleted_ids: Keys of rows to remove.
+
+    Returns:
+        pd.DataFrame: The merged frame (the same object unless rows were added or removed).
+    """
+    if len(deleted_ids):
+        df = df[~df[key].isin(deleted_ids)].reset_index(drop=True)
+    if delta.empty:
+        return df
+    # Categorical columns must agree on their categories before values move between frames
+    df, delta = align_categories([df, delta])
+
+    positions = pd.Index(df[key]).get_indexer(delta[key])
+    existing = positions >= 0
+    if existing.any():
+        columns = [column for column in delta.columns if column in df.columns]
+        target = df.index[positions[existing]]
+        for column in columns:
+            df.loc[target, column] = delta[column].to_numpy()[existing]
+    if (~existing).any():
+        df = pd.concat([df, delta[~existing].reindex(columns=df.columns)], ignore_index=True)
+    return df
+
+
+def read_frames(connection, dimensions=None):
+    """
+    Reads every WarehouseData frame with the full-load queries.
+
+    Results are streamed in chunks and converted to the compact dtypes as they arrive, so a
+    large table is never held as raw Python rows all at once. `skus` is derived from
+    `skus_all` instead of being queried a second time.
+
+    Returns:
+        dict[str, pd.DataFrame]: The frames keyed by attribute name.
+    """
+    frames = {
+        'alerts': concat_chunks(stream_query(connection, ALERTS_QUERY, frame='alerts', dimensions=dimensions)),
+        'dock_status': concat_chunks(apply_schema(format_dock_status(chunk), 'dock_status', dimensions)
+                                     for chunk in stream_query(connection, DOCK_STATUS_QUERY)),
+        'skus_all': concat_chunks(stream_query(connection, ALL_SKUS_QUERY, frame='skus_all', dimensions=dimensions)),
+        'production_pipeline': concat_chunks(stream_query(connection, PRODUCTION_PIPELINE_QUERY,
+                                                          frame='production_pipeline', dimensions=dimensions)),
+    }
+    alerted = frames['skus_all']['sku_id'].isin(frames['alerts']['sku_id'])
+    frames['skus'] = frames['skus_all'][alerted].reset_index(drop=True)
+    return frames
+
+
+def shared_view_frames(data):
+    """Returns copies of the frames of `data` unaffected by later in-place changes, see `schema.shared_copy`."""
+    return {name: shared_copy(frame) for name, frame in data.frames().items()}
+
+
+def track_changes(aggregate, frame, key, column, ids, new_values):
+    """
+    Moves the counts of rows `ids` in `aggregate` from their current values in `frame` to `new_values`.
+
+    Must be called before the merge, while `frame` still holds the old values.
+    """
+    old_values = frame.loc[frame[key].isin(ids), column].to_numpy()
+    aggregate.update(old_values, new_values)
+
+
+def prune_change_log(connection, through):
+    """
+    Deletes the change-log entries up to and including `through`.
+
+    The pruned point is recorded in the `meta` table, so a loader whose watermark is older can
+    tell that it missed changes.
+
+    Args:
+        connection: An open SQLite connection with write access.
+        through: Newest `change_id` to delete.
+    """
+    connection.execute('BEGIN IMMEDIATE')
+    try:
+        connection.execute('DELETE FROM change_log WHERE change_id <= ?', (through,))
+        connection.execute("""
+            INSERT INTO meta (key, value) VALUES ('change_log_pruned_through', :through)
+            ON CONFLICT (key) DO UPDATE SET value = MAX(value, :through)""", {'through': through})
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+
+
+def prune_point(watermark, snapshots=None):
+    """
+    Returns the newest change-log entry no reader needs once the log reaches `watermark`.
+
+    Entries newer than the oldest snapshot (a starting worker catches up from it) and the last
+    `config.CHANGE_LOG_KEEP` entries (for loaders in other processes) are kept.
+    """
+    through = watermark - config.CHANGE_LOG_KEEP
+    if snapshots is not None:
+        versions = [version for version in snapshots.versions() if version <= watermark]
+        through = min(through, versions[0] if versions else 0)
+    return through
+
+
+def prepare_database(database=None, snapshots=None):
+    """
+    Migrates the schema of `database` and prunes its change log, once at startup.
+
+    Runs on a connection of its own, so the loaders never need write access.
+
+    Args:
+        database: Path to the database file. Defaults to `db.database_file`.
+        snapshots: The `snapshot.SnapshotStore` loaders start from, if any; see `prune_point`.
+
+    Raises:
+        FileNotFoundError: If the database does not exist, instead of creating an empty one.
+    """
+    database = database or database_file
+    if not Path(database).is_file():
+        raise FileNotFoundError(f"Warehouse database {database} does not exist")
+    connection = sqlite3.connect(database)
+    try:
+        migrate(connection)
+        through = prune_point(IncrementalLoader._current_watermark(connection), snapshots)
+        if through > IncrementalLoader._pruned_through(connection):
+            prune_change_log(connection, through)
+    finally:
+        connection.close()
+
+
+class IncrementalLoader:
+    """
+    Keeps a `WarehouseData` snapshot in sync with the database using change-log deltas.
+
+    The database must have been prepared with `prepare_database`.
+
+    Attributes:
+        prune (bool): Whether refreshes prune the change log, through a writable connection.
+
+    Usage:
+        loader = IncrementalLoader()
+        data = loader.load()      # full load
+        report = loader.refresh() # pull and merge only what changed
+    """
+
+    def __init__(self, database=None, snapshots=None, prune=False):
+        self.database = database
+        self.snapshots = snapshots
+        self.prune = prune
+        self.data = None
+        self.watermark = 0
+        self.last_report = None
+        # Version of the snapshot the last load started from, or None if it read SQLite
+        self.snapshot_version = None
+        # Shared categorical dtypes of every frame this loader produces
+        self.dimensions = Dimensions()
+        self._pruned = 0
+        # Id of the loaded database, recorded with the snapshots it writes
+        self.database_id = None
+
+    @timed('load')
+    def load(self):
+        """
+        Performs a full load and records the current change-log watermark.
+
+        With a `snapshot.SnapshotStore`, the newest snapshot is memory-mapped instead of
+        querying every table, and caught up through the change log if it is stale. Whenever
+        the load did not start from an up-to-date snapshot, a new one is written in the background.
+
+        Returns:
+            WarehouseData: The freshly loaded snapshot.
+
+        Raises:
+            RuntimeError: If the schema has not been migrated, see `prepare_database`.
+        """
+        with pooled_connection(self.database, read_only=True) as connection:
+            if schema_version(connection) < LATEST_VERSION:
+                raise RuntimeError(f"Schema of {self.database or database_file} is out of date; run prepare_database first")
+            # One read transaction so every frame comes from the same snapshot
+            connection.execute('BEGIN')
+            watermark = self._current_watermark(connection)
+            self.database_id = database_id(connection)
+            snapshot = self.snapshots.read(watermark, self.database_id) if self.snapshots is not None else None
+            if snapshot is not None and snapshot[0] < self._pruned_through(connection):
+                # The changes since the snapshot are gone, so it cannot be caught up
+                snapshot = None
+            if snapshot is None:
+                self.snapshot_version = None
+                self.watermark, frames = watermark, read_frames(connection, self.dimensions)
+            else:
+                self.snapshot_version, frames = snapshot
+                self.watermark = self.snapshot_version
+        self.data = WarehouseData(**compact_frames(frames, self.dimensions), version=self.watermark)
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("Loaded warehouse data, bytes per frame: %s", memory_usage(self.data.frames()))
+        self.data.aggregates = WarehouseAggregates.from_data(self.data)
+
+        if self.snapshots is not None and self.snapshot_version != watermark:
+            if self.snapshot_version is not None:
+                self.refresh()
+            self.snapshots.write_async(shared_view_frames(self.data), self.watermark, self.database_id)
+        return self.data
+
+    def refresh(self):
+        """
+        Pulls rows changed since the last watermark and merges them into the snapshot.
+
+        Performs a full `load` first if nothing has been loaded yet.
+
+        Returns:
+            RefreshReport: Per-frame delta sizes and timings.
+        """
+        if self.data is None:
+            started = time.perf_counter()
+            self.load()
+            report = RefreshReport(self.watermark, seconds=time.perf_counter() - started)
+            self.last_report = report
+            return report
+
+        started = time.perf_counter()
+        with pooled_connection(self.database, read_only=True) as connection:
+            connection.execute('BEGIN')
+            watermark = self._current_watermark(connection)
+            report = RefreshReport(watermark)
+            pruned = self._pruned_through(connection) > self.watermark
+            if watermark > self.watermark and not pruned:
+                changes = self._changes(connection, watermark)
+                report.deltas = [
+                    self._merge_table(connection, 'skus_all', 'SELECT * FROM skus', 'sku_id', changes['skus']),
+                    self._merge_table(connection, 'production_pipeline', 'SELECT * FROM production_pipeline', 'pipeline_id',
+                                      changes['production_pipeline'], tracked=(self.data.aggregates.production_status, 'status')),
+                    self._refresh_dock_status(connection, watermark, changes, report),
+                    self._merge_table(connection, 'alerts', ALERTS_QUERY, 'alert_id', changes['alerts'], key_column='a.alert_id'),
+                    self._refresh_skus(),
+                ]
+                self.watermark = watermark
+                self.data.version = watermark
+
+        if pruned:
+            log.info("Change log was pruned past watermark %s, reloading", self.watermark)
+            self.load()
+            report = RefreshReport(self.watermark, reloaded=True)
+        elif report.deltas:
+            self._rewrite_snapshot()
+            if self.prune:
+                self._prune()
+
+        report.seconds = time.perf_counter() - started
+        self.last_report = report
+        metrics.record('refresh', report.seconds)
+        if report.changed:
+            for delta in report.deltas:
+                metrics.record(f'refresh.{delta.table}', delta.seconds)
+            log.debug("Incremental refresh to change %s in %.4fs: %s", report.watermark, report.seconds,
+                      ', '.join(f"{d.table}=+{d.upserted}/-{d.deleted} ({d.seconds:.4f}s)" for d in report.deltas))
+        return report
+
+    def _rewrite_snapshot(self):
+        """
+        Writes a new snapshot every `config.SNAPSHOT_INTERVAL_CHANGES` changes, so the pruning
+        bound of `prune_point` keeps moving and the change log does not grow behind it.
+        """
+        if self.snapshots is None:
+            return
+        versions = [version for version in self.snapshots.versions() if version <= self.watermark]
+        if not versions or self.watermark - versions[-1] >= config.SNAPSHOT_INTERVAL_CHANGES:
+            self.snapshots.write_async(shared_view_frames(self.data), self.watermark, self.database_id)
+
+    def _prune(self):
+        """Prunes the change log up to `prune_point`."""
+        through = prune_point(self.watermark, self.snapshots)
+        if through <= self._pruned:
+            return
+        try:
+            with pooled_connection(self.database) as connection:
+                prune_change_log(connection, through)
+        except sqlite3.Error as e:
+            # Pruning is housekeeping; the next refresh tries again
+            log.warning("Could not prune the change log: %s", e)
+            return
+        self._pruned = through
+
+    @staticmethod
+    def _pruned_through(connection):
+        return connection.execute(
+            "SELECT COALESCE((SELECT value FROM meta WHERE key = 'change_log_pruned_through'), 0)").fetchone()[0]
+
+    @staticmethod
+    def _current_watermark(connection):
+        # The pruned point is the watermark once every entry has been pruned
+        return connection.execute("""
+            SELECT MAX(COALESCE((SELECT MAX(change_id) FROM change_log), 0),
+                       COALESCE((SELECT value FROM meta WHERE key = 'change_log_pruned_through'), 0))""").fetchone()[0]
+
+    def _changes(self, connection, watermark):
+        """Returns {table: (upserted ids, deleted ids)} for changes in (self.watermark, watermark]."""
+        rows = connection.execute("""
+            SELECT table_name, row_id, op FROM change_log
+            WHERE change_id > ? AND change_id <= ?
+            ORDER BY change_id""", (self.watermark, watermark)).fetchall()
+        # Only the last operation on each row matters
+        last_op = {}
+        for table, row_id, op in rows:
+            last_op[(table, row_id)] = op
+        changes = {table: (set(), set()) for table in TRACKED_TABLES}
+        for (table, row_id), op in last_op.items():
+            upserted, deleted = changes[table]
+            (deleted if op == 'D' else upserted).add(row_id)
+        return changes
+
+    def _merge_table(self, connection, name, query, key, changes, key_column=None, tracked=None):
+        """
+        Fetches the upserted rows of one table by primary key and merges them into `self.data.<name>`.
+
+        `tracked` is an optional (CountAggregate, column) pair kept in step with the merge.
+        """
+        started = time.perf_counter()
+        upserted, deleted = changes
+        frame = getattr(self.data, name)
+        delta = frame.iloc[0:0]
+        if upserted:
+            placeholders = ','.join('?' * len(upserted))
+            delta = pd.read_sql(f'{query} WHERE {key_column or key} IN ({placeholders})', connection, params=list(upserted))
+            delta = apply_schema(delta, name, self.dimensions)
+        if tracked is not None:
+            aggregate, column = tracked
+            track_changes(aggregate, frame, key, column, upserted | deleted, delta[column].to_numpy())
+        setattr(self.data, name, merge_rows(frame, delta, key, list(deleted)))
+        return TableDelta(name, len(delta), len(deleted), time.perf_counter() - started)
+
+    def _refresh_dock_status(self, connection, watermark, changes, report):
+        """
+        Re-reads every joined dock row touched by a change to dock_status, skus or production_pipeline.
+
+        The re-read rows and their previous Days of Service are left in `report.dock_changes`.
+        """
+        started = time.perf_counter()
+        deleted = changes['dock_status'][1]
+        delta = pd.read_sql(f"""{DOCK_STATUS_QUERY}
+            WHERE d.dock_id IN (SELECT row_id FROM change_log
+                                WHERE table_name = 'dock_status' AND change_id > :low AND change_id <= :high)
+               OR s.sku_id IN (SELECT row_id FROM change_log
+                               WHERE table_name = 'skus' AND change_id > :low AND change_id <= :high)
+               OR p.pipeline_id IN (SELECT row_id FROM change_log
+                                    WHERE table_name = 'production_pipeline' AND change_id > :low AND change_id <= :high)
+        """, connection, params={'low': self.watermark, 'high': watermark})
+        delta = apply_schema(format_dock_status(delta), 'dock_status', self.dimensions)
+
+        frame = self.data.dock_status
+        if len(delta):
+            changed = frame.loc[frame['dock_id'].isin(delta['dock_id']), ['dock_id', 'Days of Service']]
+            report.dock_changes = delta.assign(previous=delta['dock_id'].map(
+                pd.Series(changed['Days of Service'].to_numpy(), index=changed['dock_id'].to_numpy())))
+        if self.data.aggregates is not None:
+            track_changes(self.data.aggregates.days_of_service, frame, 'dock_id', 'Days of Service',
+                          set(delta['dock_id']) | deleted, delta['Days of Service'].to_numpy())
+        # Rows that already exist keep their simulated creation time
+        known = delta['dock_id'].isin(frame['dock_id'])
+        frame = merge_rows(frame, delta[known].drop(columns='Time Created'), 'dock_id', list(deleted))
+        self.data.dock_status = merge_rows(frame, delta[~known], 'dock_id')
+        return TableDelta('dock_status', len(delta), len(deleted), time.perf_counter() - started)
+
+    def _refresh_skus(self):
+        """Re-derives the alerted-SKU frame from the already refreshed `skus_all` and `alerts` frames."""
+        started = time.perf_counter()
+        before = len(self.data.skus)
+        alerted = self.data.skus_all['sku_id'].isin(self.data.alerts['sku_id'])
+        self.data.skus = self.data.skus_all[alerted].reset_index(drop=True)
+        after = len(self.data.skus)
+        return TableDelta('skus', max(after - before, 0), max(before - after, 0), time.perf_counter() - started)
@@ -0,0 +1,162 @@
+"""
+Versioned schema migrations for the warehouse database.
+
+The schema version is stored in SQLite's `user_version` pragma. `migrate` applies every
+migration newer than that version, in order, each in its own transaction, then refreshes
+the planner statistics with `ANALYZE`.
+
+    python streamlit_app/migrations.py [database]
+"""
+import sys
+
+from _logger import log
+from db import database_file, pooled_connection
+
+TRACKED_TABLES = {
+    'skus': 'sku_id',
+    'dock_status': 'dock_id',
+    'production_pipeline': 'pipeline_id',
+    'alerts': 'alert_id',
+}
+
+
+def _create_change_log(connection):
+    """
+    Creates the `change_log` table and the triggers that populate it.
+
+    Every insert, update and delete on a tracked table appends one row holding the table
+    name, the primary key of the affected row and the operation. `change_id` increases
+    monotonically and is used as the refresh watermark by `loader.IncrementalLoader`, which
+    also prunes the entries no reader needs any more (see `loader.prune_change_log`).
+    """
+    connection.execute("""
+        CREATE TABLE IF NOT EXISTS change_log (
+            change_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            table_name TEXT NOT NULL,
+            row_id INTEGER NOT NULL,
+            op TEXT NOT NULL CHECK(op IN ('I', 'U', 'D'))
+        )""")
+    connection.execute("CREATE INDEX IF NOT EXISTS idx_change_log_table ON change_log(table_name, change_id)")
+    for table, key in TRACKED_TABLES.items():
+        for op, event, ref in (('I', 'INSERT', 'NEW'), ('U', 'UPDATE', 'NEW'), ('D', 'DELETE', 'OLD')):
+            connection.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_{event.lower()}_log AFTER {event} ON {table}
+                BEGIN
+                    INSERT INTO change_log (table_name, row_id, op) VALUES ('{table}', {ref}.{key}, '{op}');
+                END""")
+
+
+def _create_access_path_indexes(connection):
+    """
+    Creates the secondary indexes behind the joins and filters in `db` and the dashboard.
+
+    - dock_status(sku_id): dock rows for a SKU (joins and incremental refreshes).
+    - production_pipeline(sku_id, status): covers the pipeline join and its status column.
+    - alerts(sku_id, timestamp): covers `sku_id IN (SELECT sku_id FROM alerts)` and per-SKU alert history.
+    - dock_status(days_of_service): urgency filtering and days-of-service aggregates.
+    """
+    connection.execute("CREATE INDEX IF NOT EXISTS idx_dock_status_sku ON dock_status(sku_id)")
+    connection.execute("CREATE INDEX IF NOT EXISTS idx_production_pipeline_sku_status ON production_pipeline(sku_id, status)")
+    connection.execute("CREATE INDEX IF NOT EXISTS idx_alerts_sku_timestamp ON alerts(sku_id, timestamp)")
+    connection.execute("CREATE INDEX IF NOT EXISTS idx_dock_status_days_of_service ON dock_status(days_of_service)")
+
+
+def _create_meta(connection):
+    """
+    Creates the `meta` key/value table for database-wide state.
+
+    - change_log_pruned_through: highest `change_id` deleted by `loader.prune_change_log`.
+    """
+    connection.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value) WITHOUT ROWID")
+
+
+def _create_database_id(connection):
+    """
+    Stores a random `database_id` in `meta`.
+
+    Snapshots record the id of the database they were read from, so a snapshot is never
+    caught up with the change log of a different database that replaced the file.
+    """
+    connection.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('database_id', lower(hex(randomblob(16))))")
+
+
+def database_id(connection):
+    """Returns the id stored by migration 4, or None for a database migrated to an older version."""
+    row = connection.execute("SELECT value FROM meta WHERE key = 'database_id'").fetchone()
+    return row[0] if row else None
+
+
+# (version, description, function); append only, never renumber
+MIGRATIONS = [
+    (1, 'change log table and triggers', _create_change_log),
+    (2, 'indexes for warehouse access paths', _create_access_path_indexes),
+    (3, 'meta table', _create_meta),
+    (4, 'database id', _create_database_id),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def schema_version(connection):
+    """Returns the schema version recorded in the database."""
+    return connection.execute('PRAGMA user_version').fetchone()[0]
+
+
+def migrate(connection):
+    """
+    Brings the database schema up to `LATEST_VERSION`.
+
+    Each pending migration runs in an immediate transaction together with the version bump,
+    so concurrent callers apply it exactly once. `ANALYZE` is run whenever anything changed.
+
+    Args:
+        connection: An open SQLite connection with write access.
+
+    Returns:
+        int: The schema version after migrating.
+    """
+    applied = False
+    for version, description, function in MIGRATIONS:
+        if schema_version(connection) >= version:
+            continue
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            # Another process may have migrated while we waited for the write lock
+            if schema_version(connection) < version:
+                function(connection)
+                connection.execute(f'PRAGMA user_version = {version}')
+                applied = True
+                log.info("Applied migration %d: %s", version, description)
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+    if applied:
+        analyze(connection)
+    return schema_version(connection)
+
+
+def analyze(connection):
+    """Refreshes the query planner statistics."""
+    connection.execute('ANALYZE')
+    connection.commit()
+
+
+def query_plan(connection, query, params=()):
+    """
+    Returns the `EXPLAIN QUERY PLAN` detail lines for `query`.
+
+    Args:
+        connection: An open SQLite connection.
+        query: The SQL to explain.
+        params: Parameters for the query.
+
+    Returns:
+        list[str]: One line per plan step, e.g. 'SEARCH p USING INDEX ...'.
+    """
+    return [row[3] for row in connection.execute(f'EXPLAIN QUERY PLAN {query}', params)]
+
+
+if __name__ == '__main__':
+    with pooled_connection(sys.argv[1] if len(sys.argv) > 1 else database_file) as conn:
+        print(f"Schema version {migrate(conn)}")
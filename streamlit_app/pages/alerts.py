@@ -1,8 +1,7 @@
-from db import connect_to_db, WarehouseData
-from datetime import datetime
 import pandas as pd
-import requests
-import json
+
+from db import WarehouseData
+# alert_store and servicenow (and requests with it) are imported when the first alert is raised
 
 alert_threshold = 7
 alert_severity_map = {
@@ -10,25 +9,56 @@
     4: "#FD6104", 3: "#FD0404", 2: "#FD0404", 1: "#FD0404"
 }       
 
-def add_new_alert(alert_id, sku_id, product_number, product_name, alert_type, alert_message, data: WarehouseData):
-    connection, cursor = connect_to_db()
-    current_timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-    
-    new_alert_df = pd.DataFrame([{'alert_id': alert_id, 
-                                  'sku_id': sku_id,
-                                  'product_number': product_number,
-                                  'product_name': product_name, 
-                                  'alert_type': alert_type, 
-                                  'alert_message': alert_message, 
-                                  'timestamp': current_timestamp}])
-    
-    data.alerts = pd.concat([data.alerts, new_alert_df], ignore_index=True)
-
-    # create ServiceNow ticket
-    alert_info = { "number": product_number, "name": product_name, "type": alert_type, "message": alert_message}
-    create_SN_incident(alert_info)
+def add_new_alert(sku_id, product_number, product_name, alert_type, alert_message, data: WarehouseData, database=None):
+    """
+    Raises a single alert the same way as `add_new_alerts`: persists it, appends it to
+    `data.alerts` and queues a ServiceNow incident.
+
+    Parameters:
+        sku_id (int): SKU the alert is for.
+        product_number (str): Product number shown with the alert.
+        product_name (str): Product name shown with the alert.
+        alert_type (str): Alert type, e.g. 'Urgent SKU'.
+        alert_message (str): Alert message.
+        data (WarehouseData): Data the alert is appended to once persisted.
+        database (str): Optional database file; defaults to `db.database_file`.
+
+    Returns:
+        WarehouseData: `data`, for chaining.
+    """
+    alert = pd.DataFrame([{'sku_id': sku_id, 'product_number': product_number, 'product_name': product_name,
+                           'alert_type': alert_type, 'alert_message': alert_message}])
+    return add_new_alerts(alert, data, database)
+
+def add_new_alerts(alerts, data: WarehouseData, database=None):
+    """
+    Raises a batch of alerts: buffers them for persistence in one go and queues their ServiceNow incidents.
+
+    Parameters:
+        alerts (pd.DataFrame): Alerts with 'sku_id', 'product_number', 'product_name', 'alert_type'
+            and 'alert_message' columns, e.g. from `alert_engine.AlertEngine.evaluate`. An optional
+            'urgency' column is sent to ServiceNow as the incident urgency.
+        data (WarehouseData): Data the alerts are appended to once persisted.
+        database (str): Optional database file; defaults to `db.database_file`.
+
+    Returns:
+        WarehouseData: `data`, for chaining.
+    """
+    from alert_store import get_alert_store
+    columns = ['sku_id', 'product_number', 'product_name', 'alert_type', 'alert_message']
+    records = alerts[columns].to_dict('records')
+    urgencies = alerts['urgency'].tolist() if 'urgency' in alerts else [None] * len(records)
+    store = get_alert_store(database)
+    store.add_many(records, data)
+    # Persist the whole batch in one transaction
+    store.flush()
+
+    for record, urgency in zip(records, urgencies, strict=True):
+        create_SN_incident({"number": record['product_number'], "name": record['product_name'],
+                            "type": record['alert_type'], "message": record['alert_message'],
+                            "urgency": None if urgency is None else int(urgency)})
     return data
-    
+
 def flag_hot_sku(row):
     """
     Flags a row in a DataFrame with a background color based on the 'Days of Service' value.
@@ -51,17 +81,14 @@ def flag_hot_sku(row):
         return [''] * len(row)
 
 def create_SN_incident(alert_info):
-    url = "https://dev223874.service-now.com/api/now/table/incident"
-    payload = {
-        "short_description": f"ALERT - {alert_info["message"]}, \"{alert_info["number"]} - {alert_info["name"]}\", Requires Your Attention"
-    }
-
-    response = requests.post(url, auth=("sa-HackathonTeam2", "T3sting."), json=payload)
+    """
+    Queues a ServiceNow incident for the alert; it is sent in the background by `servicenow`.
 
-    # very poor checking of response code here
-    if response.status_code == 201 or 200:
-        print("Created ServiceNow incident.")
-    else:
-        print("Error in creating ServiceNow incident.")
+    Parameters:
+        alert_info (dict): Alert with 'number', 'name', 'type' and 'message' keys.
 
-    
+    Returns:
+        bool: False if the alert was coalesced into one already queued for the same SKU.
+    """
+    from servicenow import get_dispatcher
+    return get_dispatcher().submit(alert_info)
@@ -1,50 +1,82 @@
-import sqlite3
-from datetime import datetime
-import pandas as pd
 import streamlit as st
-import sys
-import os
-import threading, time
-import random
-import numpy as np
-
-from pages.alerts import flag_hot_sku
-from streamlit_extras.stylable_container import stylable_container
-import altair as alt
-from pages.alerts import flag_hot_sku, alert_severity_map, add_new_alert # 2nd import is temporary
-from components.DOS_bar_chart import fetch_DOS_count
-from components.PP_pie_chart import production_pipeline_pie_chart_altair
-from db import get_all_data, WarehouseData
-import numpy as np
-
-def real_time_update(warehouse_data: WarehouseData):
-    random_row = warehouse_data.dock_status.sample(n=1)
-    random_index = random_row.index[0]
-
-    current_random_row = warehouse_data.dock_status.iloc[random_index]
-    
-    if current_random_row['Days of Service'] - 1 == 7:
-        new_index = warehouse_data.alerts['alert_id'].max() + 1
-        warehouse_data = add_new_alert(new_index, 
-                                       current_random_row['sku_id'],
-                                       current_random_row['Product Number'],
-                                       current_random_row['Product Name'], 
-                                       'Urgent SKU', 
-                                       'Low days of service', 
-                                       warehouse_data)
-        
-    warehouse_data.dock_status.loc[random_index, 'Days of Service'] = current_random_row['Days of Service'] - 1 if current_random_row['Days of Service'] > 1 else 20
-    warehouse_data.dock_status.loc[random_index, 'Last Refresh'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-    warehouse_data.dock_status['Dock Aging Hours'] = [int((datetime.now() - time_created).total_seconds() // 3600) for time_created in warehouse_data.dock_status['Time Created']]
-    return warehouse_data
+
+# Chart components (and Altair with them) and streamlit_extras are imported where they are
+# first used, so the page module imports quickly and hidden charts are never loaded
+from config import config
+from events import ChangeFeed
+from filters import FilterIndex
+from instrumentation import timed, timer
+
+@st.cache_resource
+def _change_feed():
+    """
+    Starts the process-wide producer that every session reads snapshots from, or follows the
+    data service process when one is configured.
+    """
+    if config.DATA_SERVICE_ADDRESS:
+        from data_service import ServiceFeed
+        return ServiceFeed().start()
+    return ChangeFeed().start()
+
+@st.cache_resource(max_entries=4)
+def _DOS_chart(dock_status_version, _dock_status, _aggregates=None):
+    """Builds the urgent items chart once per dock_status version for all sessions."""
+    from components.DOS_bar_chart import fetch_DOS_count
+    return fetch_DOS_count(_dock_status, _aggregates)
+
+@st.cache_resource(max_entries=2)
+def _dock_filter_index(dock_status_version, _dock_status):
+    """Indexes the dashboard filter dimensions once per dock_status version for all sessions."""
+    return FilterIndex(_dock_status)
+
+@st.fragment(run_every=config.REFRESH_POLL_SECONDS)
+@timed('render.charts')
+def charts_fragment():
+    """Top row: urgent items bar chart and production pipeline pie chart."""
+    from components.PP_pie_chart import production_pipeline_pie_chart_altair
+    snapshot = _change_feed().snapshot()
+    pie, bar = st.columns(2)
+    with bar:
+        # Display urgent items bar chart (Altair)
+        st.markdown('### Urgent Items')
+        st.altair_chart(_DOS_chart(snapshot.topic_versions['dock_status'], snapshot.data.dock_status,
+                                   snapshot.data.aggregates))
+    with pie:
+        # Display production pipeline pie chart (Altair)
+        production_pipeline_pie_chart_altair(snapshot.data)
+
+@st.fragment(run_every=config.REFRESH_POLL_SECONDS)
+@timed('render.tables')
+def tables_fragment(destination_filter, dock_filter, urgency_filter):
+    """Second row: alerts and filtered dock status table."""
+    from components.severity_table import render_severity_table
+    snapshot = _change_feed().snapshot()
+    data = snapshot.data
+    col1, col2 = st.columns({1, 3})
+    with col1:
+        # Display alerts table
+        st.markdown('### Alerts')
+        st.dataframe(data.alerts)
+    with col2:
+        # Display dock status table with applied filters
+        st.markdown('### Dock Status')
+        index = _dock_filter_index(snapshot.topic_versions['dock_status'], data.dock_status)
+        with timer('filter.dock_status'):
+            filtered_df = index.select({'Destination': destination_filter, 'Dock Location': dock_filter,
+                                        'Urgency': urgency_filter})
+        # Render the filtered dock status with severity coloring, one page at a time
+        render_severity_table(filtered_df, key='dock_status_page')
 
 def main():
     """
     Launches a real-time Streamlit dashboard for monitoring dock status and SKU alerts.
     """
 
-    # Retrieve all warehouse data (SKUs, dock status, alerts, etc.)
-    data = get_all_data()
+    # Latest warehouse data (SKUs, dock status, alerts, etc.) published by the change feed
+    snapshot = _change_feed().snapshot()
+    data = snapshot.data
+    # Filter options come from the shared index instead of scanning the columns on every rerun
+    filter_index = _dock_filter_index(snapshot.topic_versions['dock_status'], data.dock_status)
 
     # Sidebar navigation buttons for switching dashboard views
     home = st.sidebar.button("Home")
@@ -63,6 +95,7 @@ def main():
     )
 
     def side_buttons():
+        from streamlit_extras.stylable_container import stylable_container
         with stylable_container(
             key="sidebar_buttons",
         
@@ -106,13 +139,13 @@ def side_buttons():
     filter_col1, filter_col2, filter_col3 = st.columns(3)
     with filter_col1:
         # Filter by urgency (affects dock status table)
-        urgency_filter = st.selectbox('Select urgency', options=['All', 'Urgent', 'Not-Urgent'])
+        urgency_filter = st.selectbox('Select urgency', options=filter_index.options('Urgency'))
     with filter_col2:
         # Filter by dock location (affects dock status table)
-        dock_filter = st.selectbox('Select dock location', options=np.insert(data.dock_status['Dock Location'].unique(), 0, 'All'))
+        dock_filter = st.selectbox('Select dock location', options=filter_index.options('Dock Location'))
     with filter_col3:
         # Filter by destination (affects dock status table)
-        destination_filter = st.selectbox('Select destination', options=np.insert(data.dock_status['Destination'].unique(), 0, 'All'))
+        destination_filter = st.selectbox('Select destination', options=filter_index.options('Destination'))
 
     # Main dashboard title and placeholder for dynamic content
     st.title("Dock Status Dashboard")
@@ -132,49 +165,13 @@ def side_buttons():
         st.markdown('### Production Pipeline Overview')
         st.dataframe(data.production_pipeline)
     else:
-        # Main dashboard with real-time updates and charts
+        # Main dashboard; each fragment polls the change feed and only rebuilds what changed
         hidden = st.sidebar.checkbox("Hide graphs")
-        while True:
-            data = real_time_update(data)
-            with placeholder.container():
-                if not hidden:
-                    # Top row: urgent items bar chart and production pipeline pie chart
-                    pie, bar = st.columns(2)
-                    with bar:
-                        # Display urgent items bar chart (Altair)
-                        DOS_count_df = fetch_DOS_count(data.dock_status)
-                        st.markdown('### Urgent Items')
-                        st.altair_chart(DOS_count_df)
-                    with pie:
-                        # Display production pipeline pie chart (Altair)
-                        production_pipeline_pie_chart_altair(data)
-
-                # Apply conditional formatting to dock status
-                flagged_skus_df = data.dock_status.style.apply(flag_hot_sku, axis=1)
-                # Second row: alerts and filtered dock status table
-                col1, col2 = st.columns({1, 3})
-                with col1:
-                    # Display alerts table
-                    st.markdown('### Alerts')
-                    st.dataframe(data.alerts)
-                with col2:
-                    # Display dock status table with applied filters
-                    st.markdown('### Dock Status')
-                    filtered_df = data.dock_status
-                    # Apply filters for destination, dock location, and urgency to dock status
-                    if destination_filter != 'All':
-                        filtered_df = filtered_df[data.dock_status['Destination'] == destination_filter]
-                    if dock_filter != 'All':
-                        filtered_df = filtered_df[filtered_df['Dock Location'] == dock_filter]
-                    if urgency_filter == 'Urgent':
-                        filtered_df = filtered_df[filtered_df['Days of Service'] <= 7]
-                    elif urgency_filter == 'Not-Urgent':
-                        filtered_df = filtered_df[filtered_df['Days of Service'] > 7]
-                    # Apply conditional formatting to filtered dock status
-                    flagged_skus_df = filtered_df.style.apply(flag_hot_sku, axis=1)
-                    st.dataframe(flagged_skus_df)
-
-                # Loop every 2 seconds to simulate real-time dashboard
-                time.sleep(5)
-
-main()
+        with placeholder.container():
+            if not hidden:
+                charts_fragment()
+            tables_fragment(destination_filter, dock_filter, urgency_filter)
+
+# Streamlit runs page files as __main__; importing the module does no page work
+if __name__ == "__main__":
+    main()
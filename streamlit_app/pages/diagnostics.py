@@ -0,0 +1,43 @@
+import pandas as pd
+import streamlit as st
+
+from instrumentation import PERCENTILES, metrics
+
+
+def stage_table(summary):
+    """
+    Builds the per-stage timing table shown on the diagnostics page.
+    Args:
+        summary: Per-stage dict from `instrumentation.Metrics.summary`.
+    Returns:
+        DataFrame with one row per stage: count, then mean, percentiles and max in milliseconds.
+    """
+    columns = ['mean', *(f'p{percent}' for percent in PERCENTILES), 'max']
+    df = pd.DataFrame.from_dict(summary, orient='index', columns=['count', *columns])
+    df[columns] = df[columns] * 1000
+    df.index.name = 'Stage'
+    return df.rename(columns={column: f'{column} (ms)' for column in columns})
+
+
+def main():
+    """
+    Lists how long each instrumented stage takes in this server process. Not linked from the
+    navigation; open it at /diagnostics.
+    """
+    st.title("Diagnostics")
+    summary, counters = metrics.summary()
+    if st.button("Reset timings"):
+        metrics.reset()
+        st.rerun()
+
+    st.markdown('### Stage timings')
+    if summary:
+        st.dataframe(stage_table(summary).style.format(precision=2))
+    else:
+        st.info("Nothing has been timed yet.")
+
+    st.markdown('### Counters')
+    st.dataframe(pd.Series(counters, name='Value'))
+
+if __name__ == "__main__":
+    main()
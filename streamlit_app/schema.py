@@ -0,0 +1,349 @@
+"""
+Compact dtypes for the `WarehouseData` frames.
+
+SQLite results arrive as object, int64 and float64 columns. `apply_schema` converts a frame
+according to `FRAME_SCHEMAS`: repeated text becomes categorical, integers and floats are
+downcast and timestamps are parsed once, at load. A text column that holds the same attribute
+in several frames (the product name lives in `skus`, `skus_all`, `dock_status` and `alerts`)
+is a `Dimension`: every frame is cast to one `CategoricalDtype` from a shared `Dimensions`
+registry, so the distinct values are stored once and each frame only keeps integer codes.
+
+Usage:
+    python schema.py   # report memory per frame before and after compaction
+"""
+import threading
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+DATETIME = 'datetime'
+DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+@dataclass(frozen=True)
+class Dimension:
+    """A categorical attribute whose dtype is shared by every column holding it."""
+    name: str
+
+
+PRODUCT_NAME = Dimension('product_name')
+PRODUCT_NUMBER = Dimension('product_number')
+DESTINATION = Dimension('destination')
+STAGING_LANE = Dimension('staging_lane')
+DOCK_LOCATION = Dimension('dock_location')
+STATUS = Dimension('status')
+ALERT_TYPE = Dimension('alert_type')
+ALERT_MESSAGE = Dimension('alert_message')
+
+SKU_SCHEMA = {
+    'sku_id': 'int32',
+    'product_name': PRODUCT_NAME,
+    'product_number': PRODUCT_NUMBER,
+    'destination': DESTINATION,
+    'remortgage_gallons': 'float32',
+    'pallets': 'int32',
+    'weight_lbs': 'float32',
+}
+
+# Target dtype of each column, per WarehouseData frame; columns not listed are left alone
+FRAME_SCHEMAS = {
+    'alerts': {
+        'alert_id': 'int32',
+        'sku_id': 'int32',
+        'product_number': PRODUCT_NUMBER,
+        'product_name': PRODUCT_NAME,
+        'alert_type': ALERT_TYPE,
+        'alert_message': ALERT_MESSAGE,
+        'timestamp': DATETIME,
+    },
+    'skus': SKU_SCHEMA,
+    'skus_all': SKU_SCHEMA,
+    'dock_status': {
+        'sku_id': 'int32',
+        'dock_id': 'int32',
+        'Product Number': PRODUCT_NUMBER,
+        'Product Name': PRODUCT_NAME,
+        'Staging Lane': STAGING_LANE,
+        'Status': STATUS,
+        'Estimated Completion': DATETIME,
+        'Dock Location': DOCK_LOCATION,
+        'Last Refresh': DATETIME,
+        'Days of Service': 'int16',
+        'Destination': DESTINATION,
+        'Remortgage Gallons': 'float32',
+        'Pallets': 'int32',
+        'Weight (lbs)': 'float32',
+    },
+    'production_pipeline': {
+        'pipeline_id': 'int32',
+        'sku_id': 'int32',
+        'status': STATUS,
+        'estimated_completion': DATETIME,
+    },
+}
+
+
+def _distinct(values):
+    """Returns the distinct non-null values of `values` in order of appearance."""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return values.cat.categories
+    return pd.Index(values.dropna().unique())
+
+
+def _extend(categories, distinct):
+    """Returns `categories` followed by the values of the Index `distinct` it does not contain yet."""
+    if distinct is categories or not len(distinct):
+        return categories
+    # get_indexer reuses the hash table cached on `categories` across calls
+    unseen = categories.get_indexer(distinct) < 0
+    return categories.append(distinct[unseen]) if unseen.any() else categories
+
+
+def _fits(values, dtype):
+    """True if `values` can be cast to the numeric `dtype` without losing anything."""
+    dtype = np.dtype(dtype)
+    if dtype.kind == 'f':
+        return values.dtype.kind == 'f'
+    if values.dtype.kind not in 'iu':
+        return False
+    if values.empty:
+        return True
+    info = np.iinfo(dtype)
+    return info.min <= values.min() and values.max() <= info.max
+
+
+class Dimensions:
+    """
+    Registry of the shared categorical dtypes, one per `Dimension`.
+
+    Categories only ever grow by appending, so frames cast with an older dtype keep their
+    codes and are brought up to date by `align_categories`.
+    """
+
+    def __init__(self):
+        self._dtypes = {}
+        self._lock = threading.Lock()
+
+    def extend(self, dimension, values):
+        """Adds the values of `values` not seen yet to `dimension` and returns its dtype."""
+        with self._lock:
+            dtype = self._dtypes.get(dimension.name)
+            categories = dtype.categories if dtype is not None else pd.Index([], dtype=object)
+            extended = _extend(categories, _distinct(values))
+            if dtype is None or len(extended) != len(categories):
+                dtype = self._dtypes[dimension.name] = pd.CategoricalDtype(extended)
+            return dtype
+
+    def cast(self, dimension, values):
+        """Casts `values` to the shared dtype of `dimension`, adding any values it has not seen."""
+        # Encode the distinct values once against the shared categories instead of using
+        # `astype`, which compares and rehashes the whole dtype on every call
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            local, distinct = values.cat.codes.to_numpy(), values.cat.categories
+        else:
+            local, distinct = pd.factorize(values)
+            distinct = pd.Index(distinct, dtype=object)
+        with self._lock:
+            dtype = self._dtypes.get(dimension.name)
+            if values.dtype is dtype:
+                return values
+            categories = dtype.categories if dtype is not None else pd.Index([], dtype=object)
+            mapping = categories.get_indexer(distinct)
+            unseen = mapping < 0
+            if dtype is None or unseen.any():
+                mapping[unseen] = np.arange(len(categories), len(categories) + unseen.sum())
+                dtype = self._dtypes[dimension.name] = pd.CategoricalDtype(categories.append(distinct[unseen]))
+        codes = np.where(local >= 0, mapping[local], -1) if len(mapping) else np.full(len(local), -1)
+        return pd.Series(pd.Categorical.from_codes(codes, dtype=dtype, validate=False),
+                         index=values.index, name=values.name)
+
+
+def _is_prefix(dtype, other):
+    """True if the categories of `dtype` are the first categories of `other`."""
+    if dtype is other:
+        return True
+    size = len(dtype.categories)
+    return size <= len(other.categories) and other.categories[:size].equals(dtype.categories)
+
+
+def apply_schema(df, name, dimensions=None):
+    """
+    Converts `df` to the compact dtypes of `FRAME_SCHEMAS[name]`.
+
+    Integer columns are only downcast when every value fits, so a column read with nulls
+    (and therefore as float) is left as it is.
+
+    Args:
+        df: Frame to convert; it is not modified.
+        name: WarehouseData attribute the frame belongs to.
+        dimensions: Registry of shared categorical dtypes; a private one is used if omitted.
+
+    Returns:
+        pd.DataFrame: The converted frame.
+    """
+    dimensions = dimensions if dimensions is not None else Dimensions()
+    converted = {}
+    for column, target in FRAME_SCHEMAS[name].items():
+        if column not in df.columns:
+            continue
+        values = df[column]
+        if isinstance(target, Dimension):
+            converted[column] = dimensions.cast(target, values)
+        elif target == DATETIME:
+            if not pd.api.types.is_datetime64_dtype(values):
+                converted[column] = pd.to_datetime(values, format=DATETIME_FORMAT)
+        elif values.dtype != target and _fits(values, target):
+            converted[column] = values.astype(target)
+    return df.assign(**converted) if converted else df
+
+
+def compact_frames(frames, dimensions=None):
+    """
+    Applies `apply_schema` to a dict of frames keyed by WarehouseData attribute.
+
+    Every dimension is extended with the values of all frames before any frame is cast, so
+    the frames end up sharing a single dtype per dimension.
+    """
+    dimensions = dimensions if dimensions is not None else Dimensions()
+    for name, frame in frames.items():
+        for column, target in FRAME_SCHEMAS[name].items():
+            if frame is not None and isinstance(target, Dimension) and column in frame.columns:
+                dimensions.extend(target, frame[column])
+    return {name: apply_schema(frame, name, dimensions) if frame is not None else None
+            for name, frame in frames.items()}
+
+
+def conform(df, like):
+    """
+    Casts the columns `df` shares with `like` to `like`'s dtypes.
+
+    Categorical columns take on `like`'s categories plus any new values in `df`; the
+    difference is reconciled when the frames are combined with `align_categories`.
+    """
+    converted = {}
+    for column in df.columns.intersection(like.columns):
+        values, target = df[column], like[column].dtype
+        if values.dtype == target:
+            continue
+        if isinstance(target, pd.CategoricalDtype):
+            categories = _extend(target.categories, _distinct(values))
+            converted[column] = values.astype(target if len(categories) == len(target.categories)
+                                              else pd.CategoricalDtype(categories))
+        elif target.kind == 'M':
+            converted[column] = pd.to_datetime(values, format=DATETIME_FORMAT).astype(target)
+        elif _fits(values, target):
+            converted[column] = values.astype(target)
+    return df.assign(**converted) if converted else df
+
+
+def align_categories(frames):
+    """
+    Gives every column that is categorical in all of `frames` one common dtype.
+
+    Categories are merged in order of first appearance, so frames cast from the same
+    `Dimensions` registry keep their codes and only pick up newer categories. Frames are
+    returned unchanged when their dtypes already agree.
+
+    Returns:
+        list[pd.DataFrame]: The frames, in the order given.
+    """
+    frames = list(frames)
+    shared = [column for column in frames[0].columns if all(column in frame.columns for frame in frames[1:])]
+    for column in shared:
+        dtypes = [frame[column].dtype for frame in frames]
+        if not all(isinstance(dtype, pd.CategoricalDtype) for dtype in dtypes):
+            continue
+        categories = dtypes[0].categories
+        for dtype in dtypes[1:]:
+            categories = _extend(categories, dtype.categories)
+        if all(dtype.categories.equals(categories) for dtype in dtypes):
+            continue
+        dtype = pd.CategoricalDtype(categories)
+        frames = [frame if frame[column].dtype.categories.equals(categories)
+                  else frame.assign(**{column: frame[column].astype(dtype)}) for frame in frames]
+    return frames
+
+
+def concat_frames(frames):
+    """
+    Concatenates frames with a fresh index, keeping categorical columns categorical.
+
+    Frames cast from one `Dimensions` registry only ever gain categories at the end, so the
+    categories of earlier frames are a prefix of the last frame's and their codes can be
+    joined as they are. Other categorical columns are merged with `align_categories`.
+    """
+    frames = list(frames)
+    if len(frames) == 1:
+        return frames[0].reset_index(drop=True)
+    last = frames[-1]
+    if any(not frame.columns.equals(last.columns) for frame in frames):
+        return pd.concat(align_categories(frames), ignore_index=True)
+    joined = {}
+    for column in last.columns:
+        dtype = last[column].dtype
+        if isinstance(dtype, pd.CategoricalDtype) and all(
+                isinstance(frame[column].dtype, pd.CategoricalDtype) and _is_prefix(frame[column].dtype, dtype)
+                for frame in frames[:-1]):
+            codes = np.concatenate([frame[column].cat.codes.to_numpy() for frame in frames])
+            joined[column] = pd.Categorical.from_codes(codes, dtype=dtype, validate=False)
+    rest = pd.concat(align_categories([frame.drop(columns=list(joined)) for frame in frames]), ignore_index=True)
+    return rest.assign(**joined)[list(last.columns)]
+
+
+def shared_copy(frame):
+    """
+    Returns a copy of `frame` that later in-place changes to either frame never reach the other.
+
+    With pandas copy-on-write enabled (the entry points turn it on) this is a shallow copy that
+    shares memory until written to; without it, sharing memory would let writers change each
+    other's data in place, so the copy is deep.
+    """
+    return frame.copy(deep=not pd.get_option('mode.copy_on_write'))
+
+
+def memory_usage(frames):
+    """
+    Returns the deep memory usage of each frame, counting each shared set of categories once.
+
+    Args:
+        frames: dict of frames keyed by name; None entries are skipped.
+
+    Returns:
+        dict[str, int]: Bytes per frame (codes only for categorical columns) plus a
+        'shared categories' entry for the distinct categorical values.
+    """
+    usage, categories = {}, {}
+    for name, frame in frames.items():
+        if frame is None:
+            continue
+        total = frame.index.memory_usage(deep=True)
+        for column in frame.columns:
+            values = frame[column]
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                total += values.cat.codes.nbytes
+                categories.setdefault(id(values.cat.categories), values.cat.categories.memory_usage(deep=True))
+            else:
+                total += values.memory_usage(index=False, deep=True)
+        usage[name] = int(total)
+    usage['shared categories'] = int(sum(categories.values()))
+    return usage
+
+
+def memory_report(before, after):
+    """
+    Compares the memory of two sets of frames, e.g. as loaded and after `compact_frames`.
+
+    Returns:
+        pd.DataFrame: 'before' and 'after' bytes and the fraction 'saved', per frame and in total.
+    """
+    report = pd.DataFrame({'before': memory_usage(before), 'after': memory_usage(after)}).fillna(0).astype('int64')
+    report.loc['total'] = report.sum()
+    report['saved'] = (1 - report['after'] / report['before'].where(report['before'] > 0)).round(3)
+    return report
+
+
+if __name__ == '__main__':
+    from db import get_all_data
+    raw = get_all_data(compact=False).frames()
+    print(memory_report(raw, compact_frames(raw)).to_string())
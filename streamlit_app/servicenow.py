@@ -0,0 +1,236 @@
+"""
+Asynchronous ServiceNow incident dispatch.
+
+Alerts are queued by `submit` and sent by a small pool of background workers, so a slow or
+unreachable ServiceNow instance never blocks the dashboard. Each worker keeps its own pooled
+HTTP session, requests time out, transient failures are retried with exponential backoff and
+an alert that is still waiting to be sent absorbs duplicates for the same SKU and alert type.
+
+Without credentials (`config.SERVICENOW_USER` / `config.SERVICENOW_PASSWORD`) the dispatcher
+is disabled: it logs a warning when started and drops every alert submitted to it.
+"""
+import queue
+import statistics
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from _logger import log
+from config import config
+from instrumentation import count, timer
+
+# Responses worth retrying; anything else that is not a success is a permanent failure
+RETRY_STATUSES = {408, 429, 500, 502, 503, 504}
+
+
+def build_payload(alert_info):
+    """
+    Builds the incident body for an alert.
+
+    Args:
+        alert_info: dict with 'number', 'name', 'type' and 'message' keys, and optionally
+            'urgency' (1 high, 2 medium, 3 low).
+
+    Returns:
+        dict: The JSON payload for the ServiceNow incident table API.
+    """
+    payload = {
+        "short_description": f"ALERT - {alert_info['message']}, \"{alert_info['number']} - {alert_info['name']}\", Requires Your Attention"
+    }
+    if alert_info.get('urgency') is not None:
+        payload["urgency"] = str(alert_info['urgency'])
+    return payload
+
+
+@dataclass
+class _Pending:
+    alert_info: dict
+    enqueued_at: float
+    duplicates: int = 0
+
+
+class IncidentDispatcher:
+    """
+    Queue and worker pool that sends alerts to ServiceNow in the background.
+
+    Attributes:
+        url (str): Incident table endpoint.
+        workers (int): Number of sending threads.
+        timeout (float): Per-request timeout in seconds.
+        max_retries (int): Retries after the first attempt for transient failures.
+        backoff (float): Base delay in seconds; attempt n waits backoff * 2**n.
+    """
+
+    def __init__(self, url=config.SERVICENOW_URL, auth=(config.SERVICENOW_USER, config.SERVICENOW_PASSWORD),
+                 workers=config.SERVICENOW_WORKERS, timeout=config.SERVICENOW_TIMEOUT_SECONDS,
+                 max_retries=config.SERVICENOW_MAX_RETRIES, backoff=0.5, latency_window=1000):
+        self.url = url
+        self.auth = auth
+        self.workers = workers
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._queue = queue.Queue()
+        self._pending = {}
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._stop = threading.Event()
+        self._local = threading.local()
+        self._threads = []
+        self._latencies = deque(maxlen=latency_window)
+        self._counters = {'submitted': 0, 'coalesced': 0, 'sent': 0, 'failed': 0, 'retries': 0, 'disabled': 0}
+
+    @property
+    def enabled(self):
+        """Whether incidents are sent, i.e. a URL and both credentials are set."""
+        return bool(self.url and self.auth and all(self.auth))
+
+    def start(self):
+        """Starts the worker threads; a disabled dispatcher only logs a warning."""
+        if self._threads:
+            return self
+        if not self.enabled:
+            log.warning("ServiceNow credentials are not set (SERVICENOW_USER, SERVICENOW_PASSWORD); incidents will not be sent")
+            return self
+        self._stop.clear()
+        for number in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f'servicenow-{number}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self, timeout=None):
+        """Stops the workers once their current request finishes; queued alerts are dropped."""
+        self._stop.set()
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def submit(self, alert_info):
+        """
+        Queues an alert for sending.
+
+        Args:
+            alert_info: dict with 'number', 'name', 'type' and 'message' keys.
+
+        Returns:
+            bool: False if the alert was coalesced into one already waiting for the same SKU, or
+            dropped because the dispatcher is disabled.
+        """
+        if not self.enabled:
+            with self._lock:
+                self._counters['disabled'] += 1
+            return False
+        key = (alert_info['number'], alert_info['type'])
+        with self._lock:
+            self._counters['submitted'] += 1
+            pending = self._pending.get(key)
+            if pending is not None:
+                pending.duplicates += 1
+                self._counters['coalesced'] += 1
+                return False
+            self._pending[key] = _Pending(alert_info, time.monotonic())
+        self._queue.put(key)
+        return True
+
+    def flush(self, timeout=None):
+        """
+        Waits until every queued alert has been sent or has failed.
+
+        Returns:
+            bool: True if the queue drained before `timeout`.
+        """
+        with self._idle:
+            return self._idle.wait_for(lambda: not self._pending and not self._in_flight, timeout)
+
+    def metrics(self):
+        """
+        Returns queue and delivery metrics.
+
+        Returns:
+            dict: counters plus queue_depth, in_flight and end-to-end latency percentiles in seconds.
+        """
+        with self._lock:
+            latencies = list(self._latencies)
+            metrics = {**self._counters, 'queue_depth': len(self._pending), 'in_flight': self._in_flight}
+        if len(latencies) >= 2:
+            cuts = statistics.quantiles(latencies, n=100)
+            metrics.update(latency_p50=cuts[49], latency_p95=cuts[94])
+        elif latencies:
+            metrics.update(latency_p50=latencies[0], latency_p95=latencies[0])
+        return metrics
+
+    def _session(self):
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            session.auth = self.auth
+            session.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=1))
+            session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=1))
+            self._local.session = session
+        return session
+
+    def _work(self):
+        while not self._stop.is_set():
+            key = self._queue.get()
+            if key is None:
+                break
+            with self._lock:
+                pending = self._pending.pop(key)
+                self._in_flight += 1
+            try:
+                sent = self._send(pending)
+            except Exception:
+                log.exception("Unexpected error sending ServiceNow incident")
+                sent = False
+            with self._idle:
+                self._in_flight -= 1
+                self._counters['sent' if sent else 'failed'] += 1
+                count('servicenow.sent' if sent else 'servicenow.failed')
+                if sent:
+                    self._latencies.append(time.monotonic() - pending.enqueued_at)
+                self._idle.notify_all()
+
+    def _send(self, pending):
+        payload = build_payload(pending.alert_info)
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                with self._lock:
+                    self._counters['retries'] += 1
+                if self._stop.wait(self.backoff * 2 ** (attempt - 1)):
+                    return False
+            try:
+                with timer('servicenow.request'):
+                    response = self._session().post(self.url, json=payload, timeout=self.timeout)
+            except requests.RequestException as e:
+                log.warning("ServiceNow request failed (attempt %d): %s", attempt + 1, e)
+                continue
+            if response.status_code in (200, 201):
+                log.info("Created ServiceNow incident for %s (%d duplicates coalesced)",
+                         pending.alert_info['number'], pending.duplicates)
+                return True
+            if response.status_code not in RETRY_STATUSES:
+                break
+            log.warning("ServiceNow returned %d (attempt %d)", response.status_code, attempt + 1)
+        log.error("Error in creating ServiceNow incident for %s", pending.alert_info['number'])
+        return False
+
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_dispatcher():
+    """Returns the process-wide dispatcher, starting it on first use."""
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = IncidentDispatcher().start()
+        return _dispatcher
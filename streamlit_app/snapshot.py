@@ -0,0 +1,174 @@
+"""
+Columnar snapshots of the warehouse data for fast cold starts.
+
+A full load through `pd.read_sql` converts every row of every table to Python objects.
+`SnapshotStore` keeps the frames of a loaded `WarehouseData` in uncompressed Arrow IPC files,
+in a directory named after the database version (change-log watermark) they were read at.
+A starting worker memory-maps the newest snapshot instead of querying SQLite: numeric and
+datetime columns are used straight from the map and categorical columns come back from
+dictionary arrays, so nothing is parsed. Arrow IPC is used rather than Parquet because
+Parquet pages have to be decoded and cannot be mapped.
+
+The mapped buffers are read-only. Frames are handed out as copy-on-write views of them, so
+the first in-place write to a column (the real-time simulation, a delta merge) copies only
+that column out of the map.
+
+A snapshot older than the database is still usable: `loader.IncrementalLoader` catches it up
+through the change log, then writes a fresh snapshot in the background. Each snapshot records
+the `database_id` (see `migrations`) it was read from, and snapshots of any other database,
+e.g. one the file was replaced with, are discarded.
+"""
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+
+import pyarrow as pa
+
+from _logger import log
+from config import config
+from db import database_file
+from schema import shared_copy
+
+SNAPSHOT_FRAMES = ('alerts', 'skus', 'dock_status', 'skus_all', 'production_pipeline')
+# Bump when the layout of the frames changes so older snapshots are ignored
+SNAPSHOT_FORMAT = 1
+_PREFIX = f'v{SNAPSHOT_FORMAT}-'
+
+
+class SnapshotStore:
+    """
+    Versioned Arrow snapshots of the frames loaded from one database.
+
+    Attributes:
+        database (str): Path to the database file the snapshots belong to.
+        directory (Path): Where snapshots are written; one sub-directory per version.
+    """
+
+    def __init__(self, database=None, directory=None):
+        self.database = database or database_file
+        self.directory = Path(directory or f'{self.database}.snapshots')
+        self._mapped = []
+        self._writer = None
+        self._lock = threading.Lock()
+
+    def versions(self):
+        """Returns the versions of the complete snapshots on disk, oldest first."""
+        if not self.directory.is_dir():
+            return []
+        return sorted(int(path.name[len(_PREFIX):]) for path in self.directory.glob(f'{_PREFIX}*')
+                      if path.name[len(_PREFIX):].isdigit())
+
+    def database_id(self, version):
+        """Returns the database id recorded with the snapshot for `version`, or None."""
+        try:
+            return (self.directory / f'{_PREFIX}{version}' / 'database_id').read_text()
+        except OSError:
+            return None
+
+    def read(self, max_version, database_id=None):
+        """
+        Memory-maps the newest snapshot taken at or before `max_version`.
+
+        Args:
+            max_version: Current version of the database; newer snapshots (from a database
+                that has since been replaced) are ignored.
+            database_id: Id of the current database; snapshots of other databases are
+                discarded. None accepts any snapshot.
+
+        Returns:
+            tuple[int, dict[str, pd.DataFrame]]: The snapshot version and copy-on-write views of
+            its frames, or None if there is no usable snapshot.
+        """
+        versions = []
+        for version in self.versions():
+            if database_id is not None and self.database_id(version) != database_id:
+                log.info("Discarding snapshot %s of a different database", version)
+                shutil.rmtree(self.directory / f'{_PREFIX}{version}', ignore_errors=True)
+            elif version <= max_version:
+                versions.append(version)
+        if not versions:
+            return None
+        version = versions[-1]
+        path = self.directory / f'{_PREFIX}{version}'
+        try:
+            mapped = {}
+            for name in SNAPSHOT_FRAMES:
+                with pa.memory_map(str(path / f'{name}.arrow')) as source:
+                    mapped[name] = pa.ipc.open_file(source).read_all().to_pandas(split_blocks=True)
+        except (OSError, pa.ArrowException) as e:
+            log.warning("Discarding unreadable snapshot %s: %s", path, e)
+            shutil.rmtree(path, ignore_errors=True)
+            return None
+        # The mapped frames must outlive their views so writes to a view copy instead of failing;
+        # without copy-on-write the views would be written in place, so they are real copies
+        self._mapped = list(mapped.values())
+        return version, {name: shared_copy(frame) for name, frame in mapped.items()}
+
+    def write(self, frames, version, database_id=None):
+        """
+        Writes `frames` as the snapshot for `version` and removes older snapshots.
+
+        `database_id` is recorded with the snapshot for `read` to check.
+
+        The files are written to a temporary directory that is renamed into place, so
+        readers in other processes never see a partial snapshot.
+        """
+        path = self.directory / f'{_PREFIX}{version}'
+        if path.exists():
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        staging = Path(tempfile.mkdtemp(prefix='.staging-', dir=self.directory))
+        try:
+            for name in SNAPSHOT_FRAMES:
+                table = pa.Table.from_pandas(frames[name], preserve_index=False)
+                with pa.OSFile(str(staging / f'{name}.arrow'), 'wb') as sink:
+                    with pa.ipc.new_file(sink, table.schema) as writer:
+                        writer.write_table(table)
+            if database_id is not None:
+                (staging / 'database_id').write_text(database_id)
+            staging.rename(path)
+        except OSError:
+            if not path.exists():
+                raise
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+        for older in self.versions():
+            if older < version:
+                shutil.rmtree(self.directory / f'{_PREFIX}{older}', ignore_errors=True)
+        log.debug("Wrote snapshot %s", path)
+
+    def write_async(self, frames, version, database_id=None):
+        """
+        Writes a snapshot on a background thread; skipped if a write is already running.
+
+        `frames` should be copy-on-write views so later changes to the live frames do not
+        leak into the snapshot.
+        """
+        with self._lock:
+            if self._writer is not None and self._writer.is_alive():
+                return None
+            self._writer = threading.Thread(target=self._write_logged, args=(frames, version, database_id),
+                                            name='snapshot-writer', daemon=True)
+            self._writer.start()
+            return self._writer
+
+    def wait(self, timeout=None):
+        """Waits for a background write to finish."""
+        writer = self._writer
+        if writer is not None:
+            writer.join(timeout)
+
+    def _write_logged(self, frames, version, database_id):
+        try:
+            self.write(frames, version, database_id)
+        except Exception:
+            log.exception("Could not write snapshot for version %s", version)
+
+
+def snapshot_store(database=None):
+    """Returns a `SnapshotStore` for `database`, or None if snapshots are disabled in the config."""
+    if not config.SNAPSHOTS_ENABLED:
+        return None
+    directory = Path(config.SNAPSHOT_DIR) / Path(database or database_file).name if config.SNAPSHOT_DIR else None
+    return SnapshotStore(database, directory)
@@ -0,0 +1,165 @@
+"""
+Chunked, projected reads of the warehouse tables.
+
+`pd.read_sql` materializes a whole result set as Python objects before pandas converts it,
+so loading a large table briefly holds it several times over. `stream_query` walks a cursor
+with `fetchmany` instead and converts each chunk to the compact dtypes of `schema` (and drops
+rows rejected by an optional predicate) before fetching the next one, so the raw rows in
+memory never exceed one chunk. `stream_table` adds column projection and a time window,
+both pushed down into the SQL, for consumers that only render part of a table.
+
+Usage:
+    for chunk in stream_table(connection, 'alerts', columns=['alert_id', 'timestamp'], since=start):
+        ...
+    alerts = read_table(connection, 'alerts', since=start)
+"""
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+
+import pandas as pd
+
+from config import config
+from instrumentation import metrics
+from db import DOCK_STATUS_COLUMNS
+from schema import DATETIME_FORMAT, apply_schema, concat_frames
+
+
+@dataclass(frozen=True)
+class TableSpec:
+    """
+    How a source table is streamed.
+
+    Attributes:
+        frame (str): `schema.FRAME_SCHEMAS` entry whose dtypes the chunks are converted to.
+        time_column (str): Column a time window is applied to, if any.
+        rename (dict): Display names given to the columns before conversion.
+    """
+    frame: str
+    time_column: str = None
+    rename: dict = field(default_factory=dict)
+
+
+TABLES = {
+    'skus': TableSpec('skus_all'),
+    'dock_status': TableSpec('dock_status', 'last_refresh', DOCK_STATUS_COLUMNS),
+    'production_pipeline': TableSpec('production_pipeline', 'estimated_completion'),
+    'alerts': TableSpec('alerts', 'timestamp'),
+}
+
+
+def _sql_time(value):
+    """Formats a time bound the way timestamps are stored in the database."""
+    return value.strftime(DATETIME_FORMAT) if isinstance(value, datetime) else str(value)
+
+
+def stream_query(connection, query, params=(), frame=None, dimensions=None, predicate=None,
+                 rename=None, chunksize=config.STREAM_CHUNK_ROWS):
+    """
+    Runs `query` and yields its result in chunks of at most `chunksize` rows.
+
+    Args:
+        connection: Open sqlite3 connection.
+        query: SQL to run.
+        params: Parameters for `query`.
+        frame: `schema.FRAME_SCHEMAS` entry to convert each chunk with, if any.
+        dimensions: Shared `schema.Dimensions` registry, so every chunk uses the same categories.
+        predicate: Optional function of a chunk returning a boolean mask of the rows to keep.
+        rename: Optional column renames applied before conversion.
+        chunksize: Rows fetched per chunk.
+
+    Yields:
+        pd.DataFrame: Converted and filtered chunks. A chunk may be empty after filtering, and an
+        empty result yields a single empty chunk.
+
+    The time spent in SQLite (excluding conversion and the consumer) is recorded as
+    `sql.<frame>` once the result is exhausted or the generator is closed.
+    """
+    started = time.perf_counter()
+    cursor = connection.execute(query, params)
+    sql_seconds = time.perf_counter() - started
+    columns = [description[0] for description in cursor.description]
+    first = True
+    try:
+        while True:
+            started = time.perf_counter()
+            rows = cursor.fetchmany(chunksize)
+            sql_seconds += time.perf_counter() - started
+            # An empty result still yields one empty chunk so consumers see the columns
+            if not rows and not first:
+                break
+            first = False
+            chunk = pd.DataFrame.from_records(rows, columns=columns)
+            del rows
+            if rename:
+                chunk = chunk.rename(columns=rename)
+            if frame is not None:
+                chunk = apply_schema(chunk, frame, dimensions)
+            if predicate is not None:
+                chunk = chunk[predicate(chunk)]
+            yield chunk
+    finally:
+        metrics.record(f"sql.{frame or 'query'}", sql_seconds)
+
+
+def stream_table(connection, table, columns=None, since=None, until=None, predicate=None,
+                 dimensions=None, chunksize=config.STREAM_CHUNK_ROWS):
+    """
+    Streams the rows of one table, optionally projected onto `columns` and limited to a time window.
+
+    Args:
+        connection: Open sqlite3 connection.
+        table: A table in `TABLES`.
+        columns: Source column names to read; all columns if omitted.
+        since: Only rows whose time column is at or after this datetime or string.
+        until: Only rows whose time column is before this datetime or string.
+        predicate: Optional function of a chunk returning a boolean mask of the rows to keep.
+        dimensions: Shared `schema.Dimensions` registry.
+        chunksize: Rows fetched per chunk.
+
+    Yields:
+        pd.DataFrame: Converted chunks, see `stream_query`.
+
+    Raises:
+        ValueError: For an unknown table or column, or a time window on a table without a time column.
+    """
+    spec = TABLES.get(table)
+    if spec is None:
+        raise ValueError(f"Cannot stream table {table!r}")
+    known = [row[1] for row in connection.execute(f'PRAGMA table_info({table})')]
+    unknown = set(columns or ()) - set(known)
+    if unknown:
+        raise ValueError(f"Unknown columns for {table}: {', '.join(sorted(unknown))}")
+
+    clauses, params = [], []
+    if since is not None or until is not None:
+        if spec.time_column is None:
+            raise ValueError(f"Table {table} has no time column")
+        if since is not None:
+            clauses.append(f'{spec.time_column} >= ?')
+            params.append(_sql_time(since))
+        if until is not None:
+            clauses.append(f'{spec.time_column} < ?')
+            params.append(_sql_time(until))
+    query = f"SELECT {', '.join(columns) if columns else '*'} FROM {table}"
+    if clauses:
+        query += ' WHERE ' + ' AND '.join(clauses)
+    yield from stream_query(connection, query, params, spec.frame, dimensions, predicate, spec.rename, chunksize)
+
+
+def concat_chunks(chunks):
+    """Combines streamed chunks into one frame with a fresh index."""
+    return concat_frames(chunks)
+
+
+def read_table(connection, table, **kwargs):
+    """
+    Reads a whole (projected, windowed) table through `stream_table`.
+
+    Peak memory is the converted result plus one raw chunk, instead of the full raw result
+    set that `pd.read_sql` holds.
+
+    Returns:
+        pd.DataFrame: The converted rows.
+    """
+    return concat_chunks(stream_table(connection, table, **kwargs))
@@ -0,0 +1,299 @@
+"""
+Seeded synthetic warehouse data for load testing.
+
+`generate` writes a database with the same schema as `warehouse_data.db` at any scale from a
+thousand to tens of millions of rows. Every column is drawn with one vectorized NumPy call per
+chunk and inserted with `executemany`, so memory stays bounded by `chunk_rows` and the same
+seed always produces the same database. Migrations are applied after the bulk insert so the
+change-log triggers do not record the generated rows.
+
+`UpdateStream` produces a replayable stream of dock status updates: the same database and
+seed always yield the same batches, which `replay` writes at a fixed rate to load-test the
+loader and dashboard.
+
+    python streamlit_app/synthetic.py load_test.db --skus 1000000 --seed 7
+    python streamlit_app/synthetic.py load_test.db --replay --rate 5000 --seconds 60
+"""
+import argparse
+import sqlite3
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+from _logger import log
+from db import pooled_connection
+from migrations import migrate
+from updates import DAYS_OF_SERVICE_RESET
+
+# Same tables as the bundled warehouse_data.db
+SCHEMA = [
+    """CREATE TABLE skus (
+        sku_id INTEGER PRIMARY KEY,
+        product_name TEXT NOT NULL,
+        product_number TEXT NOT NULL,
+        destination TEXT NOT NULL,
+        remortgage_gallons REAL,
+        pallets INTEGER,
+        weight_lbs REAL
+    )""",
+    """CREATE TABLE dock_status (
+        dock_id INTEGER PRIMARY KEY,
+        sku_id INTEGER NOT NULL,
+        staging_lane TEXT,
+        days_of_service INTEGER,
+        dock_location TEXT,
+        last_refresh DATETIME,
+        FOREIGN KEY (sku_id) REFERENCES skus(sku_id)
+    )""",
+    """CREATE TABLE production_pipeline (
+        pipeline_id INTEGER PRIMARY KEY,
+        sku_id INTEGER NOT NULL,
+        status TEXT CHECK(status IN ('Backlog', 'In Production', 'Ready to Ship')),
+        estimated_completion DATETIME,
+        FOREIGN KEY (sku_id) REFERENCES skus(sku_id)
+    )""",
+    """CREATE TABLE alerts (
+        alert_id INTEGER PRIMARY KEY,
+        sku_id INTEGER NOT NULL,
+        alert_type TEXT,
+        alert_message TEXT,
+        timestamp DATETIME,
+        FOREIGN KEY (sku_id) REFERENCES skus(sku_id)
+    )""",
+]
+
+PRODUCT_TYPES = np.array(['Detergent', 'Cleaner', 'Soap', 'Disinfectant', 'Degreaser', 'Polish', 'Bleach',
+                          'Sanitizer', 'Softener', 'Rinse', 'Solvent', 'Wax'])
+VARIANTS = np.array(list('ABCDEFGHIJKLMNOPQRSTUVWXYZ'))
+STATUSES = np.array(['Backlog', 'In Production', 'Ready to Ship'])
+ALERT_TYPES = np.array(['Urgent SKU', 'Dock Aging'])
+ALERT_MESSAGES = np.array(['Low days of service', 'SKU has been staged for over 48 hours'])
+
+START = np.datetime64('2025-08-01T00:00:00', 's')
+WEEK_SECONDS = 7 * 24 * 3600
+
+
+def _timestamps(rng, size, start=START, span=WEEK_SECONDS):
+    """Returns `size` random 'YYYY-MM-DD HH:MM:SS' strings within `span` seconds of `start`."""
+    seconds = rng.integers(0, span, size=size)
+    return np.char.replace(np.datetime_as_string(start + seconds.astype('timedelta64[s]'), unit='s'), 'T', ' ')
+
+
+def _labels(prefix, numbers):
+    """Returns prefix + number strings for an integer array, e.g. 'Dock 12'."""
+    return np.char.add(prefix, numbers.astype(str))
+
+
+def _skus(rng, ids, destinations):
+    return {
+        'sku_id': ids,
+        'product_name': np.char.add(np.char.add(rng.choice(PRODUCT_TYPES, len(ids)), ' '),
+                                    rng.choice(VARIANTS, len(ids))),
+        'product_number': np.char.add('PN-', np.char.zfill(ids.astype(str), 8)),
+        'destination': _labels('Warehouse ', rng.integers(1, destinations + 1, len(ids))),
+        'remortgage_gallons': rng.integers(500, 2000, len(ids)).astype(float),
+        'pallets': rng.integers(1, 30, len(ids)),
+        'weight_lbs': rng.integers(1000, 12000, len(ids)).astype(float),
+    }
+
+
+def _dock_status(rng, ids, skus, lanes, docks):
+    return {
+        'dock_id': ids,
+        'sku_id': rng.integers(1, skus + 1, len(ids)),
+        'staging_lane': np.char.add('Lane ', rng.choice(VARIANTS[:lanes], len(ids))),
+        'days_of_service': rng.integers(1, DAYS_OF_SERVICE_RESET + 1, len(ids)),
+        'dock_location': _labels('Dock ', rng.integers(1, docks + 1, len(ids))),
+        'last_refresh': _timestamps(rng, len(ids)),
+    }
+
+
+def _production_pipeline(rng, ids):
+    return {
+        'pipeline_id': ids,
+        'sku_id': ids,
+        'status': rng.choice(STATUSES, len(ids)),
+        'estimated_completion': _timestamps(rng, len(ids), START + WEEK_SECONDS),
+    }
+
+
+def _alerts(rng, ids, skus):
+    kinds = rng.integers(0, len(ALERT_TYPES), len(ids))
+    return {
+        'alert_id': ids,
+        'sku_id': rng.integers(1, skus + 1, len(ids)),
+        'alert_type': ALERT_TYPES[kinds],
+        'alert_message': ALERT_MESSAGES[kinds],
+        'timestamp': _timestamps(rng, len(ids)),
+    }
+
+
+def _insert(connection, table, columns):
+    """Inserts a dict of equal-length arrays with a single executemany."""
+    names = list(columns)
+    rows = zip(*(columns[name].tolist() for name in names), strict=True)
+    connection.executemany(f"INSERT INTO {table} ({', '.join(names)}) VALUES ({', '.join('?' * len(names))})", rows)
+
+
+def generate(database, skus=1000, docks_per_sku=1.0, alerts_per_sku=0.05, destinations=None, lanes=26,
+             docks=None, seed=0, chunk_rows=100_000, overwrite=False):
+    """
+    Writes a synthetic warehouse database.
+
+    Args:
+        database: Path of the database to create.
+        skus: Number of SKUs (and production pipeline rows).
+        docks_per_sku: Dock status rows per SKU.
+        alerts_per_sku: Alerts per SKU.
+        destinations: Distinct destinations; defaults to about sqrt(skus) / 4.
+        lanes: Distinct staging lanes, at most 26.
+        docks: Distinct dock locations; defaults to about sqrt(skus).
+        seed: Seed for the NumPy generator; the same arguments (including `chunk_rows`) always
+            produce the same rows.
+        chunk_rows: Rows generated and inserted per batch.
+        overwrite: Replace `database` if it exists.
+
+    Returns:
+        dict[str, int]: Rows written per table.
+
+    Raises:
+        FileExistsError: If `database` exists and `overwrite` is False.
+    """
+    path = Path(database)
+    if path.exists():
+        if not overwrite:
+            raise FileExistsError(f"{database} already exists")
+        for stale in (path, Path(f'{database}-wal'), Path(f'{database}-shm')):
+            stale.unlink(missing_ok=True)
+    destinations = destinations or max(3, int(skus ** 0.5) // 4)
+    docks = docks or max(3, int(skus ** 0.5))
+    counts = {'skus': skus, 'dock_status': int(skus * docks_per_sku),
+              'production_pipeline': skus, 'alerts': int(skus * alerts_per_sku)}
+    builders = {
+        'skus': lambda rng, ids: _skus(rng, ids, destinations),
+        'dock_status': lambda rng, ids: _dock_status(rng, ids, skus, lanes, docks),
+        'production_pipeline': _production_pipeline,
+        'alerts': lambda rng, ids: _alerts(rng, ids, skus),
+    }
+
+    started = time.perf_counter()
+    connection = sqlite3.connect(database)
+    try:
+        # Nothing to protect until the file is complete
+        connection.execute('PRAGMA journal_mode = OFF')
+        connection.execute('PRAGMA synchronous = OFF')
+        for statement in SCHEMA:
+            connection.execute(statement)
+        for number, (table, total) in enumerate(counts.items()):
+            # One independent stream per table so changing one table's size leaves the others alone
+            rng = np.random.default_rng([seed, number])
+            for first in range(1, total + 1, chunk_rows):
+                ids = np.arange(first, min(first + chunk_rows, total + 1))
+                _insert(connection, table, builders[table](rng, ids))
+                connection.commit()
+        connection.execute('PRAGMA journal_mode = DELETE')
+        migrate(connection)
+    finally:
+        connection.close()
+    log.info("Generated %s in %.1fs: %s", database, time.perf_counter() - started, counts)
+    return counts
+
+
+class UpdateStream:
+    """
+    A deterministic stream of dock status updates.
+
+    Each batch decrements the Days of Service of `batch_size` random dock rows, wrapping back
+    to `updates.DAYS_OF_SERVICE_RESET` after 1, like `updates.simulate_updates` does in memory.
+
+    Attributes:
+        dock_ids (np.ndarray): Dock rows the stream updates.
+        days_of_service (np.ndarray): Current Days of Service of each row, as the stream sees it.
+        batch_size (int): Updates per batch.
+    """
+
+    def __init__(self, dock_ids, days_of_service, batch_size=1000, seed=0, start=None):
+        self.dock_ids = np.asarray(dock_ids)
+        self.days_of_service = np.array(days_of_service, dtype=np.int64)
+        self.batch_size = min(batch_size, len(self.dock_ids))
+        self._rng = np.random.default_rng(seed)
+        self._clock = np.datetime64(start or datetime(2025, 8, 8), 's')
+
+    @classmethod
+    def from_database(cls, database, **kwargs):
+        """Starts a stream from the current dock status rows of `database`."""
+        with sqlite3.connect(database) as connection:
+            rows = np.array(connection.execute('SELECT dock_id, days_of_service FROM dock_status ORDER BY dock_id')
+                            .fetchall(), dtype=np.int64).reshape(-1, 2)
+        return cls(rows[:, 0], rows[:, 1], **kwargs)
+
+    def next_batch(self):
+        """
+        Returns the next batch of updates.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray, str]: Dock ids, their new Days of Service and the refresh time.
+        """
+        positions = self._rng.choice(len(self.dock_ids), size=self.batch_size, replace=False)
+        current = self.days_of_service[positions]
+        updated = np.where(current > 1, current - 1, DAYS_OF_SERVICE_RESET)
+        self.days_of_service[positions] = updated
+        self._clock += 1
+        return self.dock_ids[positions], updated, str(self._clock).replace('T', ' ')
+
+    def batches(self, count):
+        """Yields `count` batches."""
+        for _ in range(count):
+            yield self.next_batch()
+
+
+def replay(database, stream, batches, rate=None):
+    """
+    Writes `batches` batches of `stream` to `database`, one transaction per batch.
+
+    Args:
+        database: Database to update.
+        stream: An `UpdateStream`.
+        batches: Number of batches to write.
+        rate: Target updates per second; as fast as possible if omitted.
+
+    Returns:
+        float: Updates per second achieved.
+    """
+    started = time.perf_counter()
+    # Pooled connections get the same WAL and pragma setup as the app's own writers
+    with pooled_connection(database) as connection:
+        for number, (dock_ids, days_of_service, refreshed) in enumerate(stream.batches(batches), start=1):
+            connection.executemany('UPDATE dock_status SET days_of_service = ?, last_refresh = ? WHERE dock_id = ?',
+                                   zip(days_of_service.tolist(), [refreshed] * len(dock_ids), dock_ids.tolist(), strict=True))
+            connection.commit()
+            if rate:
+                # Sleep off any time ahead of schedule
+                ahead = number * stream.batch_size / rate - (time.perf_counter() - started)
+                if ahead > 0:
+                    time.sleep(ahead)
+    return batches * stream.batch_size / (time.perf_counter() - started)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('database')
+    parser.add_argument('--skus', type=int, default=1000)
+    parser.add_argument('--docks-per-sku', type=float, default=1.0)
+    parser.add_argument('--alerts-per-sku', type=float, default=0.05)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--overwrite', action='store_true')
+    parser.add_argument('--replay', action='store_true', help='stream updates into an existing database')
+    parser.add_argument('--rate', type=float, help='updates per second when replaying')
+    parser.add_argument('--seconds', type=float, default=60, help='replay duration at --rate')
+    parser.add_argument('--batch-size', type=int, default=1000)
+    args = parser.parse_args()
+    if args.replay:
+        stream = UpdateStream.from_database(args.database, batch_size=args.batch_size, seed=args.seed)
+        batches = max(1, int((args.rate or 10_000) * args.seconds / stream.batch_size))
+        print(f"{replay(args.database, stream, batches, args.rate):,.0f} updates/s")
+    else:
+        print(generate(args.database, args.skus, args.docks_per_sku, args.alerts_per_sku,
+                       seed=args.seed, overwrite=args.overwrite))
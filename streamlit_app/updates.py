@@ -0,0 +1,109 @@
+"""
+Real-time update engine for the dock status data.
+
+Updates are applied in batches: every stage works on whole NumPy arrays, so applying N
+simulated or real changes per tick costs one pass rather than N row-by-row writes, and the
+frames keep their native int64/datetime64 dtypes.
+"""
+from datetime import datetime
+
+import numpy as np
+
+from config import config
+from db import WarehouseData
+from alert_engine import get_alert_engine
+from instrumentation import metrics, timed
+from pages.alerts import alert_threshold
+
+# Days of Service a SKU wraps back to after it reaches 1
+DAYS_OF_SERVICE_RESET = 20
+HOUR = np.timedelta64(1, 'h')
+
+
+def _now64(now=None):
+    return np.datetime64(now or datetime.now(), 'ns')
+
+
+def refresh_dock_aging(dock_status, now=None):
+    """
+    Recomputes 'Dock Aging Hours' for every row from 'Time Created' in one vectorized pass.
+
+    Args:
+        dock_status: The dock status frame to update in place.
+        now: Reference time; defaults to the current time.
+    """
+    elapsed = _now64(now) - dock_status['Time Created'].to_numpy(dtype='datetime64[ns]')
+    dock_status['Dock Aging Hours'] = (elapsed // HOUR).astype(np.int64)
+
+
+def apply_updates(dock_status, positions, days_of_service, now=None, aggregates=None):
+    """
+    Writes new Days of Service values for a batch of rows and stamps their Last Refresh.
+
+    Args:
+        dock_status: The dock status frame to update in place.
+        positions: Integer row positions to update.
+        days_of_service: New Days of Service value for each position.
+        now: Refresh time; defaults to the current time.
+        aggregates: Optional WarehouseAggregates to adjust for the changed rows.
+
+    Returns:
+        np.ndarray: Positions of the rows that dropped to the alert threshold in this batch.
+    """
+    positions = np.asarray(positions, dtype=np.int64)
+    days_column = dock_status.columns.get_loc('Days of Service')
+    previous = dock_status.iloc[positions, days_column].to_numpy()
+    days_of_service = np.asarray(days_of_service, dtype=previous.dtype)
+
+    dock_status.iloc[positions, days_column] = days_of_service
+    dock_status.iloc[positions, dock_status.columns.get_loc('Last Refresh')] = _now64(now)
+    if aggregates is not None:
+        aggregates.days_of_service.update(previous, days_of_service)
+
+    crossed = (days_of_service <= alert_threshold) & (previous > alert_threshold)
+    return positions[crossed]
+
+
+def simulate_updates(warehouse_data: WarehouseData, count=config.SIMULATED_UPDATES_PER_TICK, rng=None, now=None, database=None):
+    """
+    Simulates `count` real-time changes to the dock status data in one batch.
+
+    Decrements the Days of Service of `count` distinct random rows (wrapping back to 20
+    after 1), evaluates the alert rules over the changed rows (see `alert_engine`) and
+    refreshes the Dock Aging Hours of every row.
+
+    Args:
+        warehouse_data: The WarehouseData to update in place.
+        count: Number of rows to change.
+        rng: Optional numpy Generator, for reproducible runs.
+        now: Reference time; defaults to the current time.
+        database: Database the alerts are persisted to; defaults to `db.database_file`.
+
+    Returns:
+        np.ndarray: Positions of the updated rows.
+    """
+    rng = rng or np.random.default_rng()
+    dock_status = warehouse_data.dock_status
+    positions = rng.choice(len(dock_status), size=min(count, len(dock_status)), replace=False)
+
+    current = dock_status['Days of Service'].to_numpy()[positions]
+    days_of_service = np.where(current > 1, current - 1, DAYS_OF_SERVICE_RESET)
+    apply_updates(dock_status, positions, days_of_service, now, warehouse_data.aggregates)
+    refresh_dock_aging(dock_status, now)
+
+    metrics.count('updates.rows', len(positions))
+    # Crossings raise alerts and rows rising back above the threshold close them
+    get_alert_engine(database).raise_alerts(warehouse_data, dock_status.iloc[positions], current, days_of_service, database)
+    return positions
+
+
+@timed('real_time_update')
+def real_time_update(warehouse_data: WarehouseData, count=config.SIMULATED_UPDATES_PER_TICK, rng=None, now=None, database=None):
+    """
+    Applies one tick of simulated updates; see `simulate_updates`.
+
+    Returns:
+        WarehouseData: The updated data.
+    """
+    simulate_updates(warehouse_data, count, rng, now, database)
+    return warehouse_data
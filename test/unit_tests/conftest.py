@@ -0,0 +1,29 @@
+import shutil
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from loader import prepare_database
+
+# The app enables copy-on-write in app.main; the shared views under test rely on it
+pd.set_option('mode.copy_on_write', True)
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+
+@pytest.fixture
+def warehouse_db(tmp_path):
+    """A scratch copy of the bundled warehouse database, prepared as at startup."""
+    database = tmp_path / 'warehouse_data.db'
+    shutil.copy(REPO_ROOT / 'warehouse_data.db', database)
+    prepare_database(str(database))
+    return str(database)
+
+
+@pytest.fixture(autouse=True)
+def _close_pools():
+    """Keeps pooled connections from outliving the scratch databases they point at."""
+    yield
+    from db import close_pools
+    close_pools()
@@ -0,0 +1,67 @@
+"""
+Local stand-in for the ServiceNow incident table API.
+
+Records every request it receives and can be told to fail or stall, so the dispatcher can be
+exercised without network access.
+"""
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients that time out hang up before the response is written
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class StubServiceNow:
+    """
+    Serves POST /api/now/table/incident on a free localhost port.
+
+    Attributes:
+        incidents (list[dict]): JSON bodies of the incidents accepted so far.
+        fail_next (list[int]): Status codes to answer the next requests with, in order.
+        delay (float): Seconds to wait before answering each request.
+    """
+
+    def __init__(self):
+        self.incidents = []
+        self.fail_next = []
+        self.delay = 0.0
+        self.requests = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                time.sleep(stub.delay)
+                stub.requests += 1
+                status = stub.fail_next.pop(0) if stub.fail_next else 201
+                if status == 201:
+                    stub.incidents.append(body)
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', '2')
+                self.end_headers()
+                self.wfile.write(b'{}')
+
+            def log_message(self, *args):
+                pass
+
+        self._server = _Server(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self._server.server_port}/api/now/table/incident'
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,54 @@
+import sqlite3
+from datetime import datetime
+
+import numpy as np
+
+from aggregates import WarehouseAggregates
+from loader import IncrementalLoader
+from updates import apply_updates
+
+
+def _scanned(data):
+    return (data.dock_status['Days of Service'].value_counts().to_dict(),
+            data.production_pipeline['status'].value_counts().to_dict())
+
+
+def _maintained(aggregates):
+    return aggregates.days_of_service.counts(), aggregates.production_status.counts()
+
+
+def test_from_sql_matches_loaded_frames(warehouse_db):
+    # Arrange
+    data = IncrementalLoader(warehouse_db).load()
+    # Act
+    with sqlite3.connect(warehouse_db) as connection:
+        aggregates = WarehouseAggregates.from_sql(connection)
+    # Assert
+    assert _maintained(aggregates) == _scanned(data)
+
+
+def test_aggregates_follow_updates_and_refreshes(warehouse_db):
+    # Arrange
+    loader = IncrementalLoader(warehouse_db)
+    data = loader.load()
+    positions = np.arange(0, len(data.dock_status), 7)
+    with sqlite3.connect(warehouse_db) as connection:
+        connection.execute("UPDATE dock_status SET days_of_service = 3 WHERE dock_id = 1")
+        connection.execute("DELETE FROM dock_status WHERE dock_id = 2")
+        connection.execute("UPDATE production_pipeline SET status = 'Ready to Ship' WHERE sku_id IN (3, 4)")
+    # Act
+    apply_updates(data.dock_status, positions, np.zeros(len(positions), dtype=np.int64),
+                  now=datetime(2025, 8, 3), aggregates=data.aggregates)
+    loader.refresh()
+    # Assert
+    assert _maintained(data.aggregates) == _scanned(data)
+
+
+def test_days_of_service_frame_filters_and_sorts():
+    # Arrange
+    aggregates = WarehouseAggregates()
+    aggregates.days_of_service.add([1, 1, 2, 9, 9, 9])
+    # Act
+    frame = aggregates.days_of_service_frame(max_days=7)
+    # Assert
+    assert frame.to_dict('list') == {'Days of Service': [1, 2], 'count': [2, 1]}
@@ -0,0 +1,60 @@
+import sqlite3
+
+import pandas as pd
+
+import pages.alerts
+from alert_engine import AlertEngine
+from events import ChangeFeed
+
+
+def _rows(sku_ids):
+    return pd.DataFrame({'sku_id': sku_ids,
+                         'Product Number': [f'P-{sku_id}' for sku_id in sku_ids],
+                         'Product Name': [f'Product {sku_id}' for sku_id in sku_ids]})
+
+
+def test_batch_crossings_are_deduplicated_per_sku_and_alert_type():
+    # Arrange
+    engine = AlertEngine()
+    engine.evaluate(_rows([4]), [8], [7])
+    rows = _rows([1, 1, 2, 3, 4, 5])
+    # Act
+    alerts = engine.evaluate(rows, [9, 8, 8, 7, 10, 20], [7, 3, 2, 6, 5, 19])
+    # Assert
+    assert alerts['sku_id'].tolist() == [1, 2]
+    assert alerts['days_of_service'].tolist() == [7, 2]
+    assert alerts['urgency'].tolist() == [3, 1]
+    assert engine.open_alerts() == {(1, 'Urgent SKU'), (2, 'Urgent SKU'), (4, 'Urgent SKU')}
+
+
+def test_recovery_closes_the_open_alert():
+    # Arrange
+    engine = AlertEngine()
+    engine.evaluate(_rows([1]), [8], [7])
+    # Act
+    engine.evaluate(_rows([1]), [1], [20])
+    alerts = engine.evaluate(_rows([1]), [8], [7])
+    # Assert
+    assert alerts['sku_id'].tolist() == [1]
+
+
+def test_database_changes_raise_alerts(warehouse_db, monkeypatch):
+    # Arrange
+    submitted = []
+    monkeypatch.setattr(pages.alerts, 'create_SN_incident', submitted.append)
+    feed = ChangeFeed(warehouse_db, interval=3600, simulate=False)
+    feed.tick()
+    with sqlite3.connect(warehouse_db) as connection:
+        connection.execute('UPDATE dock_status SET days_of_service = 10 WHERE dock_id = 2')
+    feed.tick()
+    with sqlite3.connect(warehouse_db) as connection:
+        connection.execute('UPDATE dock_status SET days_of_service = 6 WHERE dock_id = 2')
+    # Act
+    delta = feed.tick()
+    # Assert
+    with sqlite3.connect(warehouse_db) as connection:
+        stored = connection.execute("SELECT sku_id FROM alerts WHERE alert_type = 'Urgent SKU' AND alert_id > 5").fetchall()
+    assert stored == [(2,)]
+    assert 'alerts' in delta.topics
+    assert [alert['urgency'] for alert in submitted] == [3]
+    assert 2 in set(feed.snapshot().data.alerts['sku_id'])
@@ -0,0 +1,65 @@
+import sqlite3
+
+import pandas as pd
+
+import pages.alerts
+from alert_store import AlertStore
+from db import WarehouseData
+
+
+def test_flush_persists_buffered_alerts_in_one_batch(warehouse_db):
+    # Arrange
+    store = AlertStore(warehouse_db, batch_size=100)
+    data = WarehouseData(alerts=pd.DataFrame({'alert_id': [5], 'sku_id': [1]}))
+    for sku_id in (1, 2, 3):
+        store.add(sku_id, f'P-{sku_id}', f'Product {sku_id}', 'Urgent SKU', 'Low days of service', data)
+    # Act
+    pending = store.pending()
+    persisted = store.flush()
+    # Assert
+    with sqlite3.connect(warehouse_db) as connection:
+        stored = connection.execute('SELECT alert_id, sku_id FROM alerts WHERE alert_id > 5 ORDER BY alert_id').fetchall()
+    assert pending == 3
+    assert store.pending() == 0
+    assert persisted['alert_id'].tolist() == [6, 7, 8]
+    assert stored == [(6, 1), (7, 2), (8, 3)]
+    assert data.alerts['alert_id'].tolist() == [5, 6, 7, 8]
+
+
+def test_batch_size_triggers_flush(warehouse_db):
+    # Arrange
+    store = AlertStore(warehouse_db, batch_size=2)
+    # Act
+    store.add(1, 'P-1', 'Product 1', 'Urgent SKU', 'Low days of service')
+    store.add(2, 'P-2', 'Product 2', 'Urgent SKU', 'Low days of service')
+    # Assert
+    assert store.pending() == 0
+    with sqlite3.connect(warehouse_db) as connection:
+        assert connection.execute('SELECT COUNT(*) FROM alerts').fetchone()[0] == 7
+
+
+def test_append_alerts_defers_concat_until_read():
+    # Arrange
+    data = WarehouseData(alerts=pd.DataFrame({'alert_id': [1]}))
+    # Act
+    for alert_id in range(2, 6):
+        data.append_alerts(pd.DataFrame({'alert_id': [alert_id]}))
+    # Assert
+    assert len(data._alert_chunks) == 5
+    assert data.alerts['alert_id'].tolist() == [1, 2, 3, 4, 5]
+    assert len(data._alert_chunks) == 1
+
+
+def test_add_new_alert_persists_and_submits_immediately(warehouse_db, monkeypatch):
+    # Arrange
+    submitted = []
+    monkeypatch.setattr(pages.alerts, 'create_SN_incident', submitted.append)
+    data = WarehouseData(alerts=pd.DataFrame({'alert_id': [5], 'sku_id': [1]}))
+    # Act
+    pages.alerts.add_new_alert(2, 'P-2', 'Product 2', 'Urgent SKU', 'Low days of service', data, warehouse_db)
+    # Assert
+    with sqlite3.connect(warehouse_db) as connection:
+        stored = connection.execute('SELECT sku_id FROM alerts WHERE alert_id > 5').fetchall()
+    assert stored == [(2,)]
+    assert data.alerts['sku_id'].tolist() == [1, 2]
+    assert [alert['urgency'] for alert in submitted] == [None]
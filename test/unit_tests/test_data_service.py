@@ -0,0 +1,92 @@
+import sqlite3
+import threading
+
+import pandas as pd
+import pytest
+
+import pages.alerts
+from data_service import DataService, ServiceFeed, start_service
+from loader import IncrementalLoader
+
+AUTHKEY = 'test-secret'
+
+
+@pytest.fixture
+def service(warehouse_db, tmp_path, monkeypatch):
+    monkeypatch.setattr(pages.alerts, 'create_SN_incident', lambda alert_info: None)
+    service = DataService(str(tmp_path / 'service.sock'), warehouse_db, authkey=AUTHKEY, interval=3600)
+    thread = threading.Thread(target=service.serve_forever, daemon=True)
+    thread.start()
+    assert service.ready.wait(30)
+    yield service
+    service.close()
+    thread.join(5)
+
+
+@pytest.fixture
+def reader(service):
+    reader = ServiceFeed(service.address, AUTHKEY, poll_timeout=0.1)
+    # Synced by hand below instead of from the background thread
+    reader.sync(5)
+    yield reader
+    reader.stop()
+
+
+def _assert_mirrors(reader, service):
+    for name, frame in service.feed.snapshot().data.frames().items():
+        pd.testing.assert_frame_equal(reader.snapshot().data.frames()[name], frame, check_categorical=False)
+
+
+def test_reader_replays_simulated_ticks(service, reader):
+    # Arrange
+    service.feed.tick()
+    service.feed.tick()
+    # Act
+    published = reader.sync(5)
+    # Assert
+    assert published == 2
+    assert [delta.replayable for delta in reader.since(1)] == [True, True]
+    assert reader.snapshot().topic_versions['production_pipeline'] == 1
+    _assert_mirrors(reader, service)
+
+
+def test_reader_reloads_snapshot_after_database_change(service, reader, warehouse_db):
+    # Arrange
+    service.feed.simulate = False
+    with sqlite3.connect(warehouse_db) as connection:
+        connection.execute("UPDATE production_pipeline SET status = 'Backlog' WHERE pipeline_id = 2")
+    service.feed.tick()
+    # Act
+    reader.sync(5)
+    # Assert
+    topics = reader.since(1)[0].topics
+    assert 'production_pipeline' in topics and 'alerts' not in topics
+    assert reader.snapshot().data.aggregates.production_status.counts() == \
+        service.feed.snapshot().data.aggregates.production_status.counts()
+    _assert_mirrors(reader, service)
+
+
+def test_service_process_serves_readers(warehouse_db, tmp_path):
+    # Arrange
+    address = str(tmp_path / 'process.sock')
+    process = start_service(address, warehouse_db, authkey=AUTHKEY, interval=0.2, simulate=False)
+    try:
+        # Act
+        reader = ServiceFeed(address, AUTHKEY, poll_timeout=0.1).start(timeout=60)
+        snapshot = reader.snapshot()
+        reader.stop()
+    finally:
+        process.terminate()
+        process.join(10)
+    # Assert
+    expected = IncrementalLoader(warehouse_db).load()
+    assert snapshot.version == 1
+    pd.testing.assert_frame_equal(snapshot.data.production_pipeline, expected.production_pipeline, check_categorical=False)
+
+
+def test_service_and_reader_require_an_authkey(warehouse_db, tmp_path):
+    # Act / Assert
+    with pytest.raises(ValueError):
+        DataService(str(tmp_path / 'service.sock'), warehouse_db, authkey='')
+    with pytest.raises(ValueError):
+        ServiceFeed(str(tmp_path / 'service.sock'), authkey='')
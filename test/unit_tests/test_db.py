@@ -0,0 +1,47 @@
+import sqlite3
+import threading
+
+import pytest
+
+from db import ConnectionPool
+
+
+def test_pool_reuses_connections(warehouse_db):
+    # Arrange
+    pool = ConnectionPool(warehouse_db, size=2)
+    # Act
+    with pool.connection() as first:
+        pass
+    with pool.connection() as second:
+        pass
+    # Assert
+    assert first is second
+    assert second.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+
+
+def test_read_only_pool_rejects_writes(warehouse_db):
+    # Arrange
+    pool = ConnectionPool(warehouse_db, read_only=True)
+    # Act / Assert
+    with pool.connection() as connection, pytest.raises(sqlite3.OperationalError):
+        connection.execute("DELETE FROM alerts")
+
+
+def test_pool_never_exceeds_size(warehouse_db):
+    # Arrange
+    pool = ConnectionPool(warehouse_db, read_only=True, size=2)
+    seen = set()
+
+    def worker():
+        for _ in range(20):
+            with pool.connection() as connection:
+                seen.add(id(connection))
+                connection.execute('SELECT COUNT(*) FROM dock_status').fetchone()
+    # Act
+    threads = [threading.Thread(target=worker) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # Assert
+    assert len(seen) <= 2
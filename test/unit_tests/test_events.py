@@ -0,0 +1,55 @@
+import sqlite3
+
+import pytest
+
+import pages.alerts
+from events import ChangeFeed
+
+
+@pytest.fixture
+def feed(warehouse_db, monkeypatch):
+    monkeypatch.setattr(pages.alerts, 'create_SN_incident', lambda alert_info: None)
+    return ChangeFeed(warehouse_db, interval=3600)
+
+
+def test_simulated_tick_publishes_dock_status_delta(feed):
+    # Arrange
+    first = feed.tick()
+    # Act
+    delta = feed.tick()
+    # Assert
+    snapshot = feed.snapshot()
+    assert first.topics >= {'dock_status', 'alerts', 'production_pipeline'}
+    assert 'dock_status' in delta.topics
+    assert len(delta.dock_ids) == 1
+    assert snapshot.version == 2
+    assert snapshot.topic_versions['dock_status'] == 2
+    assert snapshot.topic_versions['production_pipeline'] == 1
+    assert feed.since(1) == [delta]
+
+
+def test_database_change_rebases_all_topics(feed, warehouse_db):
+    # Arrange
+    feed.simulate = False
+    feed.tick()
+    idle = feed.tick()
+    with sqlite3.connect(warehouse_db) as connection:
+        connection.execute("UPDATE production_pipeline SET status = 'Backlog' WHERE pipeline_id = 2")
+    # Act
+    delta = feed.tick()
+    # Assert
+    assert idle is None
+    assert 'production_pipeline' in delta.topics
+    assert feed.wait(0, timeout=0).version == delta.version
+
+
+def test_published_snapshots_are_isolated_from_later_ticks(feed):
+    # Arrange
+    feed.tick()
+    snapshot = feed.snapshot()
+    days_of_service = snapshot.data.dock_status['Days of Service'].copy()
+    # Act
+    for _ in range(5):
+        feed.tick()
+    # Assert
+    assert snapshot.data.dock_status['Days of Service'].equals(days_of_service)
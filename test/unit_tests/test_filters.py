@@ -0,0 +1,75 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from filters import ALL, FilterIndex
+
+
+@pytest.fixture
+def dock_status():
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        'Dock Location': rng.choice(['Dock A', 'Dock B', 'Dock C'], 500),
+        'Destination': rng.choice(['Chicago', 'Dallas', None], 500),
+        'Staging Lane': rng.choice(['L1', 'L2'], 500),
+        'Status': rng.choice(['Backlog', 'In Production'], 500),
+        'Product Name': rng.choice(['Widget', 'Gadget'], 500),
+        'Days of Service': rng.integers(0, 20, 500),
+    })
+
+
+def _masked(df, destination, dock, urgency):
+    if destination != ALL:
+        df = df[df['Destination'] == destination]
+    if dock != ALL:
+        df = df[df['Dock Location'] == dock]
+    if urgency == 'Urgent':
+        df = df[df['Days of Service'] <= 7]
+    elif urgency == 'Not-Urgent':
+        df = df[df['Days of Service'] > 7]
+    return df
+
+
+def test_select_matches_boolean_masks(dock_status):
+    # Arrange
+    index = FilterIndex(dock_status)
+    combinations = itertools.product(index.options('Destination'), index.options('Dock Location'),
+                                     index.options('Urgency'))
+    for destination, dock, urgency in combinations:
+        # Act
+        result = index.select({'Destination': destination, 'Dock Location': dock, 'Urgency': urgency})
+        # Assert
+        pd.testing.assert_frame_equal(result, _masked(dock_status, destination, dock, urgency))
+
+
+def test_options_follow_order_of_appearance(dock_status):
+    # Act
+    index = FilterIndex(dock_status)
+    # Assert
+    assert index.options('Dock Location') == [ALL, *dock_status['Dock Location'].unique()]
+    assert index.options('Destination') == [ALL, *dock_status['Destination'].dropna().unique()]
+    assert index.options('Urgency') == [ALL, 'Urgent', 'Not-Urgent']
+
+
+def test_select_is_memoized_and_ignores_inactive_filters(dock_status):
+    # Arrange
+    index = FilterIndex(dock_status)
+    # Act
+    first = index.select({'Dock Location': 'Dock A', 'Status': 'Backlog', 'Destination': ALL})
+    second = index.select({'Status': 'Backlog', 'Dock Location': 'Dock A'})
+    # Assert
+    assert first is second
+    assert index.select({}) is dock_status
+    assert index.select({'Dock Location': 'Dock Z'}).empty
+
+
+def test_column_without_values_has_no_options(dock_status):
+    # Arrange
+    dock_status['Destination'] = None
+    # Act
+    index = FilterIndex(dock_status)
+    # Assert
+    assert index.options('Destination') == [ALL]
+    assert index.select({'Destination': 'Chicago'}).empty
@@ -0,0 +1,111 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import pages.alerts
+from events import ChangeFeed
+from history import CHANGED_DOCKS, DockHistory
+
+START = datetime(2025, 8, 1)
+
+
+@pytest.fixture
+def history(tmp_path):
+    return DockHistory(str(tmp_path / 'history.db'), capacity=50, batch_size=20)
+
+
+def _record_hours(history, hours):
+    """Records docks 1 and 2 every 10 minutes; dock 1 loses a day of service per sample."""
+    times = [START + timedelta(minutes=10 * step) for step in range(6 * hours)]
+    for step, time in enumerate(times):
+        history.record(time, [1, 2], [100 - step, 5], [step, 1])
+    return times
+
+
+def test_rollups_match_the_raw_samples(history):
+    # Arrange
+    _record_hours(history, 4)
+    history.flush()
+    # Act
+    raw = history.query(START, START + timedelta(hours=4), dock_ids=[1, 2], resolution='raw')
+    hourly = history.query(START, START + timedelta(hours=4), dock_ids=[1], resolution='hour')
+    fleet = history.query(START, START + timedelta(days=7))
+    # Assert
+    expected = raw[raw['dock_id'] == 1].groupby(raw['time'].dt.floor('h'))['Days of Service'].agg(['mean', 'min', 'max'])
+    assert len(raw) == 48
+    assert history.pending() == 0
+    assert hourly['Days of Service'].tolist() == expected['mean'].tolist()
+    assert hourly['Min Days of Service'].tolist() == expected['min'].tolist()
+    assert hourly['Dock Aging Hours'].tolist() == [5, 11, 17, 23]
+    assert fleet['dock_id'].tolist() == [CHANGED_DOCKS] * 4
+    assert fleet['samples'].tolist() == [12] * 4
+
+
+def test_queries_include_samples_not_spilled_yet(history):
+    # Arrange
+    _record_hours(history, 2)
+    history.record(START + timedelta(hours=1, minutes=55), [1], [0], [0])
+    # Act
+    pending = history.pending()
+    hourly = history.query(START, START + timedelta(hours=2), dock_ids=[1], resolution='hour')
+    raw = history.query(START + timedelta(hours=1), START + timedelta(hours=2), dock_ids=[1], resolution='raw')
+    # Assert
+    assert 0 < pending < 20
+    assert hourly['samples'].tolist() == [6, 7]
+    assert hourly['Min Days of Service'].tolist() == [95, 0]
+    assert raw['Days of Service'].tolist() == [94, 93, 92, 91, 90, 89, 0]
+
+
+def test_ring_buffer_spills_before_overwriting(history):
+    # Act
+    history.record(START, np.arange(1, 121), np.full(120, 3), np.zeros(120))
+    # Assert
+    raw = history.query(START, START + timedelta(minutes=1), resolution='raw')
+    assert len(raw) == 120
+    assert raw['dock_id'].tolist() == list(range(1, 121))
+
+
+def test_spills_drop_samples_and_rollups_past_their_retention(tmp_path):
+    # Arrange
+    history = DockHistory(str(tmp_path / 'history.db'), retention=timedelta(days=1), hour_retention=timedelta(days=3))
+    history.record(START, [1], [5], [0])
+    history.flush()
+    # Act
+    history.record(START + timedelta(days=2), [1], [6], [0])
+    history.flush()
+    history.record(START + timedelta(days=4), [1], [7], [0])
+    history.flush()
+    # Assert
+    end = START + timedelta(days=5)
+    assert history.query(START, end, resolution='raw')['Days of Service'].tolist() == [7]
+    assert history.query(START, end, dock_ids=[1], resolution='minute')['Days of Service'].tolist() == [7]
+    assert history.query(START, end, dock_ids=[1], resolution='hour')['Days of Service'].tolist() == [6, 7]
+    assert history.query(START, end, dock_ids=[1], resolution='day')['Days of Service'].tolist() == [5, 6, 7]
+
+
+def test_failed_spill_keeps_the_samples(tmp_path):
+    # Arrange
+    history = DockHistory(str(tmp_path / 'missing' / 'history.db'))
+    history.record(START, [1, 2], [5, 6], [0, 0])
+    # Act
+    spilled = history.flush()
+    (tmp_path / 'missing').mkdir()
+    # Assert
+    assert spilled == 0
+    assert history.pending() == 2
+    assert history.flush() == 2
+
+
+def test_change_feed_samples_changed_docks(warehouse_db, monkeypatch):
+    # Arrange
+    monkeypatch.setattr(pages.alerts, 'create_SN_incident', lambda alert_info: None)
+    feed = ChangeFeed(warehouse_db, interval=3600)
+    feed.tick()
+    # Act
+    delta = feed.tick()
+    # Assert
+    raw = feed.dock_history.query(pd.Timestamp.now() - timedelta(minutes=1), pd.Timestamp.now(), resolution='raw')
+    assert len(raw) == 2
+    assert delta.dock_ids[0] in set(raw['dock_id'])
@@ -0,0 +1,59 @@
+import sqlite3
+
+import pytest
+
+from instrumentation import Histogram, Metrics, TimesStore
+
+
+def test_histogram_percentiles_are_within_one_bucket():
+    # Arrange
+    histogram = Histogram()
+    samples = [n / 1000 for n in range(1, 1001)]  # 1 ms to 1 s
+    # Act
+    for seconds in samples:
+        histogram.record(seconds)
+    summary = histogram.summary()
+    # Assert
+    assert summary['count'] == 1000
+    assert summary['max'] == 1.0
+    for percent, exact in ((50, 0.5), (95, 0.95), (99, 0.99)):
+        assert exact <= summary[f'p{percent}'] <= exact * 2 ** (1 / 8)
+
+
+def test_timed_records_calls_that_raise():
+    # Arrange
+    metrics = Metrics()
+
+    @metrics.timed('stage')
+    def fail():
+        raise ValueError
+
+    # Act
+    with metrics.timer('stage'):
+        pass
+    with pytest.raises(ValueError):
+        fail()
+    metrics.count('events', 3)
+    summary, counters = metrics.summary()
+    # Assert
+    assert summary['stage']['count'] == 2
+    assert counters == {'events': 3}
+
+
+def test_times_store_extends_times_table_and_writes_batches(tmp_path):
+    # Arrange
+    database = str(tmp_path / 'times.db')
+    with sqlite3.connect(database) as connection:
+        connection.execute('CREATE TABLE times (id INTEGER PRIMARY KEY AUTOINCREMENT, time TEXT)')
+    metrics = Metrics(TimesStore(database, batch_size=2))
+    # Act
+    for seconds in (0.1, 0.2, 0.3):
+        metrics.record('load', seconds)
+    with sqlite3.connect(database) as connection:
+        before_flush = connection.execute('SELECT stage, seconds FROM times ORDER BY id').fetchall()
+    metrics.store.flush()
+    with sqlite3.connect(database) as connection:
+        after_flush = connection.execute('SELECT stage, seconds FROM times ORDER BY id').fetchall()
+    # Assert
+    assert before_flush == [('load', 0.1), ('load', 0.2)]
+    assert after_flush == [('load', 0.1), ('load', 0.2), ('load', 0.3)]
@@ -0,0 +1,106 @@
+import sqlite3
+
+import pytest
+
+import db
+from config import config
+from loader import IncrementalLoader, prepare_database
+
+
+def test_refresh_without_changes_is_empty(warehouse_db):
+    # Arrange
+    loader = IncrementalLoader(warehouse_db)
+    loader.load()
+    # Act
+    report = loader.refresh()
+    # Assert
+    assert not report.changed
+    assert report.deltas == []
+
+
+def test_refresh_merges_updates_inserts_and_deletes(warehouse_db):
+    # Arrange
+    loader = IncrementalLoader(warehouse_db)
+    data = loader.load()
+    rows_before = len(data.dock_status)
+    time_created = data.dock_status.set_index('dock_id').loc[1, 'Time Created']
+    with sqlite3.connect(warehouse_db) as connection:
+        connection.execute("UPDATE dock_status SET days_of_service = 15 WHERE dock_id = 1")
+        connection.execute("UPDATE production_pipeline SET status = 'Ready to Ship' WHERE sku_id = 2")
+        connection.execute("DELETE FROM dock_status WHERE dock_id = 3")
+        connection.execute("INSERT INTO alerts (sku_id, alert_type, alert_message, timestamp) "
+                           "VALUES (2, 'Urgent SKU', 'Low days of service', '2025-08-01 08:00:00')")
+    # Act
+    report = loader.refresh()
+    # Assert
+    dock_status = data.dock_status.set_index('dock_id')
+    deltas = {delta.table: delta for delta in report.deltas}
+    assert report.changed
+    assert len(data.dock_status) == rows_before - 1
+    assert 3 not in dock_status.index
+    assert dock_status.loc[1, 'Days of Service'] == 15
+    assert dock_status.loc[1, 'Time Created'] == time_created
+    assert dock_status.loc[dock_status['sku_id'] == 2, 'Status'].eq('Ready to Ship').all()
+    assert deltas['alerts'].upserted == 1
+    assert data.alerts['alert_id'].is_unique
+    assert 2 in set(data.skus['sku_id'])
+
+
+def test_refresh_prunes_the_change_log(warehouse_db, monkeypatch):
+    # Arrange
+    monkeypatch.setattr(config, 'CHANGE_LOG_KEEP', 1)
+    loader = IncrementalLoader(warehouse_db, prune=True)
+    loader.load()
+    with sqlite3.connect(warehouse_db) as connection:
+        for days in (10, 11, 12):
+            connection.execute('UPDATE dock_status SET days_of_service = ? WHERE dock_id = 1', (days,))
+    # Act
+    loader.refresh()
+    # Assert
+    with sqlite3.connect(warehouse_db) as connection:
+        remaining = connection.execute('SELECT change_id FROM change_log').fetchall()
+    assert remaining == [(loader.watermark,)]
+    assert loader.refresh().deltas == []
+
+
+def test_loader_behind_the_pruned_change_log_reloads(warehouse_db, monkeypatch):
+    # Arrange
+    monkeypatch.setattr(config, 'CHANGE_LOG_KEEP', 0)
+    lagging = IncrementalLoader(warehouse_db)
+    lagging.load()
+    current = IncrementalLoader(warehouse_db, prune=True)
+    current.load()
+    with sqlite3.connect(warehouse_db) as connection:
+        connection.execute('UPDATE dock_status SET days_of_service = 15 WHERE dock_id = 1')
+    current.refresh()
+    # Act
+    report = lagging.refresh()
+    # Assert
+    assert report.reloaded
+    assert lagging.watermark == current.watermark
+    assert lagging.data.dock_status.set_index('dock_id').loc[1, 'Days of Service'] == 15
+
+
+def test_loader_without_prune_only_reads(warehouse_db):
+    # Arrange
+    loader = IncrementalLoader(warehouse_db)
+    loader.load()
+    with sqlite3.connect(warehouse_db) as connection:
+        connection.execute('UPDATE dock_status SET days_of_service = 10 WHERE dock_id = 1')
+    # Act
+    loader.refresh()
+    # Assert
+    with sqlite3.connect(warehouse_db) as connection:
+        logged = connection.execute('SELECT COUNT(*) FROM change_log').fetchone()[0]
+    assert logged > 0
+    assert all(read_only for _, read_only in db._pools)
+
+
+def test_prepare_database_does_not_create_a_missing_database(tmp_path):
+    # Arrange
+    missing = tmp_path / 'warehouse_data.db'
+    # Act
+    with pytest.raises(FileNotFoundError):
+        prepare_database(str(missing))
+    # Assert
+    assert not missing.exists()
@@ -0,0 +1,49 @@
+import pytest
+
+from db import ALERTED_SKUS_QUERY, ALERTS_QUERY, DOCK_STATUS_QUERY, pooled_connection
+from migrations import LATEST_VERSION, migrate, query_plan, schema_version
+
+
+@pytest.fixture
+def migrated(warehouse_db):
+    with pooled_connection(warehouse_db) as connection:
+        migrate(connection)
+        yield connection
+
+
+def test_migrate_is_idempotent(migrated):
+    # Act
+    version = migrate(migrated)
+    # Assert
+    assert version == schema_version(migrated) == LATEST_VERSION
+    assert migrated.execute("SELECT COUNT(*) FROM sqlite_stat1").fetchone()[0] > 0
+
+
+@pytest.mark.parametrize('query', [DOCK_STATUS_QUERY, ALERTS_QUERY])
+def test_joins_scan_only_the_driving_table(migrated, query):
+    # Act
+    plan = query_plan(migrated, query)
+    # Assert
+    scans = [step for step in plan if step.startswith('SCAN')]
+    assert len(scans) == 1, plan
+    assert all('INDEX' in step or 'PRIMARY KEY' in step for step in plan if step not in scans), plan
+
+
+def test_alerted_skus_subquery_uses_covering_index(migrated):
+    # Act
+    plan = query_plan(migrated, ALERTED_SKUS_QUERY)
+    # Assert
+    assert any('idx_alerts_sku_timestamp' in step for step in plan), plan
+
+
+@pytest.mark.parametrize('query, index', [
+    ("SELECT * FROM dock_status WHERE days_of_service <= 7", 'idx_dock_status_days_of_service'),
+    ("SELECT * FROM dock_status WHERE sku_id = 3", 'idx_dock_status_sku'),
+    ("SELECT status FROM production_pipeline WHERE sku_id = 3", 'idx_production_pipeline_sku_status'),
+    ("SELECT * FROM alerts WHERE sku_id = 3 ORDER BY timestamp", 'idx_alerts_sku_timestamp'),
+])
+def test_filters_search_by_index(migrated, query, index):
+    # Act
+    plan = query_plan(migrated, query)
+    # Assert
+    assert any(step.startswith('SEARCH') and index in step for step in plan), plan
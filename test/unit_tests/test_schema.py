@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+
+from db import WarehouseData
+from loader import IncrementalLoader
+from schema import Dimensions, apply_schema, compact_frames, memory_report, shared_copy
+
+
+def test_loaded_frames_share_sku_dimensions(warehouse_db):
+    # Act
+    data = IncrementalLoader(warehouse_db).load()
+    # Assert
+    product_names = data.skus_all['product_name'].cat.categories
+    assert data.dock_status['Product Name'].cat.categories is product_names
+    assert data.skus['product_name'].cat.categories is product_names
+    assert data.alerts['product_name'].cat.categories is product_names
+    assert data.dock_status['Days of Service'].dtype == np.int16
+    assert pd.api.types.is_datetime64_dtype(data.production_pipeline['estimated_completion'])
+
+
+def test_apply_schema_only_downcasts_lossless_columns():
+    # Arrange
+    skus = pd.DataFrame({'sku_id': [1, 2], 'pallets': [3.0, np.nan], 'weight_lbs': [1.5, 2.5]})
+    # Act
+    compact = apply_schema(skus, 'skus_all', Dimensions())
+    # Assert
+    assert compact['sku_id'].dtype == np.int32
+    assert compact['pallets'].dtype == np.float64
+    assert compact['weight_lbs'].dtype == np.float32
+    assert skus['sku_id'].dtype == np.int64
+
+
+def test_appended_alerts_keep_compact_dtypes():
+    # Arrange
+    alerts = apply_schema(pd.DataFrame({'alert_id': [1], 'alert_type': ['Urgent SKU'],
+                                        'timestamp': ['2025-08-01 08:00:00']}), 'alerts')
+    data = WarehouseData(alerts=alerts)
+    # Act
+    data.append_alerts(pd.DataFrame({'alert_id': [2], 'alert_type': ['Dock Aging'],
+                                     'timestamp': ['2025-08-01 09:00:00']}))
+    # Assert
+    assert data.alerts['alert_type'].tolist() == ['Urgent SKU', 'Dock Aging']
+    assert isinstance(data.alerts['alert_type'].dtype, pd.CategoricalDtype)
+    assert data.alerts['alert_id'].dtype == np.int32
+    assert pd.api.types.is_datetime64_dtype(data.alerts['timestamp'])
+
+
+def test_memory_report_counts_shared_categories_once():
+    # Arrange
+    rng = np.random.default_rng(0)
+    names = rng.choice([f'Product {i}' for i in range(50)], 10_000)
+    frames = {'skus_all': pd.DataFrame({'product_name': names}),
+              'dock_status': pd.DataFrame({'Product Name': names})}
+    # Act
+    report = memory_report(frames, compact_frames(frames))
+    # Assert
+    assert report.loc['shared categories', 'after'] > 0
+    assert report.loc['total', 'after'] < report.loc['total', 'before'] / 10
+
+
+def test_shared_copy_is_isolated_without_copy_on_write():
+    # Arrange
+    frame = pd.DataFrame({'Days of Service': [5, 6]})
+    with pd.option_context('mode.copy_on_write', False):
+        copy = shared_copy(frame)
+        # Act
+        copy.loc[0, 'Days of Service'] = 1
+    # Assert
+    assert frame['Days of Service'].tolist() == [5, 6]
@@ -0,0 +1,86 @@
+import pytest
+from servicenow_stub import StubServiceNow
+
+from servicenow import IncidentDispatcher
+
+
+def alert(number, alert_type='Urgent SKU'):
+    return {'number': number, 'name': f'Product {number}', 'type': alert_type, 'message': 'Low days of service'}
+
+
+@pytest.fixture
+def stub():
+    with StubServiceNow() as server:
+        yield server
+
+
+@pytest.fixture
+def dispatcher(stub):
+    dispatcher = IncidentDispatcher(url=stub.url, auth=('user', 'password'), workers=2, timeout=2, backoff=0.01).start()
+    yield dispatcher
+    dispatcher.stop()
+
+
+def test_incidents_are_sent_in_background(stub, dispatcher):
+    # Act
+    for number in ('DA-1001', 'CB-1002', 'GC-1003'):
+        dispatcher.submit(alert(number))
+    # Assert
+    assert dispatcher.flush(timeout=5)
+    metrics = dispatcher.metrics()
+    assert len(stub.incidents) == 3
+    assert (metrics['sent'], metrics['failed'], metrics['queue_depth']) == (3, 0, 0)
+    assert metrics['latency_p95'] >= metrics['latency_p50'] > 0
+    assert 'DA-1001' in {incident['short_description'].split('"')[1].split(' ')[0] for incident in stub.incidents}
+
+
+def test_duplicate_alerts_for_a_waiting_sku_are_coalesced(stub, dispatcher):
+    # Arrange
+    stub.delay = 0.2
+    dispatcher.submit(alert('BUSY-1'))
+    dispatcher.submit(alert('BUSY-2'))
+    # Act
+    accepted = [dispatcher.submit(alert('DA-1001')) for _ in range(5)]
+    # Assert
+    assert dispatcher.flush(timeout=5)
+    assert accepted == [True, False, False, False, False]
+    assert dispatcher.metrics()['coalesced'] == 4
+    assert len(stub.incidents) == 3
+
+
+def test_transient_failures_are_retried(stub, dispatcher):
+    # Arrange
+    stub.fail_next = [503, 500]
+    # Act
+    dispatcher.submit(alert('DA-1001'))
+    # Assert
+    assert dispatcher.flush(timeout=5)
+    metrics = dispatcher.metrics()
+    assert (metrics['sent'], metrics['retries'], stub.requests) == (1, 2, 3)
+
+
+def test_permanent_failures_and_timeouts_are_not_sent(stub, dispatcher):
+    # Arrange
+    stub.fail_next = [401]
+    dispatcher.timeout = 0.1
+    # Act
+    dispatcher.submit(alert('DA-1001'))
+    assert dispatcher.flush(timeout=5)
+    stub.delay = 0.5
+    dispatcher.max_retries = 0
+    dispatcher.submit(alert('CB-1002'))
+    # Assert
+    assert dispatcher.flush(timeout=5)
+    assert dispatcher.metrics()['failed'] == 2
+
+
+def test_dispatcher_without_credentials_sends_nothing(stub):
+    # Arrange
+    dispatcher = IncidentDispatcher(url=stub.url, auth=('', ''), workers=1).start()
+    # Act
+    submitted = dispatcher.submit(alert('DA-1001'))
+    # Assert
+    assert not dispatcher.enabled
+    assert not submitted
+    assert dispatcher.metrics()['disabled'] == 1
+    assert stub.incidents == []
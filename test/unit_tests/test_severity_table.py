@@ -0,0 +1,23 @@
+import pandas as pd
+
+from components.severity_table import get_page, page_count, severity_styles
+from pages.alerts import flag_hot_sku
+
+
+def test_severity_styles_match_flag_hot_sku():
+    # Arrange
+    df = pd.DataFrame({'Product Name': list('abcdefghij'), 'Days of Service': [1, 2, 3, 4, 5, 6, 7, 8, 15, 20]})
+    # Act
+    styles = severity_styles(df)
+    # Assert
+    expected = df.apply(flag_hot_sku, axis=1, result_type='expand')
+    assert styles.to_numpy().tolist() == expected.to_numpy().tolist()
+
+
+def test_pagination_bounds():
+    # Arrange
+    df = pd.DataFrame({'Days of Service': range(1001)})
+    # Act / Assert
+    assert page_count(1001, 500) == 3
+    assert page_count(0, 500) == 1
+    assert get_page(df, 3, 500)['Days of Service'].tolist() == [1000]
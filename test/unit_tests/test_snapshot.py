@@ -0,0 +1,92 @@
+import shutil
+import sqlite3
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from conftest import REPO_ROOT
+
+from db import close_pools
+from loader import IncrementalLoader, prepare_database
+from snapshot import SnapshotStore
+from updates import apply_updates
+
+
+def _load(database):
+    store = SnapshotStore(database)
+    loader = IncrementalLoader(database, store)
+    loader.load()
+    store.wait()
+    return loader, store
+
+
+def test_second_load_maps_snapshot_with_same_frames(warehouse_db):
+    # Arrange
+    first, store = _load(warehouse_db)
+    # Act
+    second, _ = _load(warehouse_db)
+    # Assert
+    assert first.snapshot_version is None
+    assert second.snapshot_version == first.watermark == store.versions()[-1]
+    for name, frame in first.data.frames().items():
+        pd.testing.assert_frame_equal(second.data.frames()[name], frame)
+
+
+def test_stale_snapshot_is_caught_up_and_rewritten(warehouse_db):
+    # Arrange
+    first, store = _load(warehouse_db)
+    with sqlite3.connect(warehouse_db) as connection:
+        connection.execute("UPDATE dock_status SET days_of_service = 15 WHERE dock_id = 1")
+    # Act
+    second, _ = _load(warehouse_db)
+    # Assert
+    assert second.snapshot_version == first.watermark
+    assert second.watermark > first.watermark
+    assert second.data.dock_status.set_index('dock_id').loc[1, 'Days of Service'] == 15
+    assert store.versions() == [second.watermark]
+
+
+def test_mapped_frames_accept_in_place_updates(warehouse_db):
+    # Arrange
+    _load(warehouse_db)
+    loader, store = _load(warehouse_db)
+    dock_status = loader.data.dock_status
+    # Act
+    apply_updates(dock_status, [0, 1], np.array([1, 1]))
+    # Assert
+    assert dock_status['Days of Service'].iloc[:2].tolist() == [1, 1]
+    assert store._mapped[2]['Days of Service'].iloc[:2].tolist() != [1, 1]
+
+
+def test_unreadable_snapshot_falls_back_to_sql(warehouse_db):
+    # Arrange
+    first, store = _load(warehouse_db)
+    path = store.directory / f'v1-{first.watermark}' / 'dock_status.arrow'
+    path.write_bytes(b'not arrow')
+    # Act
+    second = IncrementalLoader(warehouse_db, store)
+    second.load()
+    # Assert
+    store.wait()
+    assert second.snapshot_version is None
+    assert len(second.data.dock_status) == len(first.data.dock_status)
+    assert store.read(first.watermark) is not None
+
+
+def test_snapshot_of_a_replaced_database_is_discarded(warehouse_db):
+    # Arrange
+    first, store = _load(warehouse_db)
+    close_pools()
+    for suffix in ('-wal', '-shm'):
+        Path(f'{warehouse_db}{suffix}').unlink(missing_ok=True)
+    shutil.copy(REPO_ROOT / 'warehouse_data.db', warehouse_db)
+    prepare_database(warehouse_db)
+    with sqlite3.connect(warehouse_db) as connection:
+        connection.execute("UPDATE dock_status SET days_of_service = 15 WHERE dock_id = 1")
+    # Act
+    second, _ = _load(warehouse_db)
+    # Assert
+    assert second.snapshot_version is None
+    assert second.database_id != first.database_id
+    assert second.data.dock_status.set_index('dock_id').loc[1, 'Days of Service'] == 15
+    assert store.versions() == [second.watermark]
@@ -0,0 +1,33 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+APP = Path(__file__).resolve().parents[2] / 'streamlit_app'
+
+# Generous for CI machines; importing the dashboard takes under a second on a developer laptop
+IMPORT_BUDGET_SECONDS = 3.0
+# Loaded on first use only, never by importing a page
+LAZY_MODULES = ('altair', 'requests', 'streamlit_extras', 'servicenow', 'components.DOS_bar_chart',
+                'components.PP_pie_chart', 'components.severity_table')
+
+
+def _import(module):
+    """Imports `module` in a fresh interpreter; returns its -X importtime total and the modules it loaded."""
+    code = f'import sys, {module}; print(" ".join(sys.modules))'
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                            cwd=APP, capture_output=True, text=True, check=True)
+    total = sum(int(line.split('|')[1]) for line in result.stderr.splitlines()
+                if line.startswith('import time:') and 'self [us]' not in line
+                and not line.split('|')[2].startswith('  ')) / 1e6
+    return total, set(result.stdout.split())
+
+
+@pytest.mark.parametrize('module', ['app', 'pages.dashboard', 'pages.alerts'])
+def test_page_import_is_lazy_and_within_budget(module):
+    # Act
+    total, loaded = _import(module)
+    # Assert
+    assert not loaded & set(LAZY_MODULES)
+    assert total < IMPORT_BUDGET_SECONDS
@@ -0,0 +1,72 @@
+import sqlite3
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from schema import Dimensions
+from streaming import read_table, stream_table
+
+
+@pytest.fixture
+def connection(warehouse_db):
+    connection = sqlite3.connect(warehouse_db)
+    yield connection
+    connection.close()
+
+
+def test_chunks_are_bounded_and_compact(connection):
+    # Act
+    chunks = list(stream_table(connection, 'skus', chunksize=7, dimensions=Dimensions()))
+    # Assert
+    assert [len(chunk) for chunk in chunks] == [7, 7, 6]
+    assert all(chunk['sku_id'].dtype == np.int32 for chunk in chunks)
+    assert chunks[0]['destination'].cat.categories is chunks[-1]['destination'].cat.categories
+
+
+def test_projection_and_time_window_are_pushed_down(connection):
+    # Act
+    alerts = read_table(connection, 'alerts', columns=['alert_id', 'timestamp'],
+                        since=datetime(2023, 11, 1, 9), until='2023-11-01 10:00:00')
+    # Assert
+    expected = connection.execute("SELECT alert_id FROM alerts WHERE timestamp >= '2023-11-01 09:00:00' "
+                                  "AND timestamp < '2023-11-01 10:00:00'").fetchall()
+    assert list(alerts.columns) == ['alert_id', 'timestamp']
+    assert alerts['alert_id'].tolist() == [alert_id for alert_id, in expected]
+    assert pd.api.types.is_datetime64_dtype(alerts['timestamp'])
+
+
+def test_predicate_and_renames_apply_per_chunk(connection):
+    # Act
+    dock_status = read_table(connection, 'dock_status', chunksize=3,
+                             predicate=lambda chunk: chunk['Days of Service'] <= 7)
+    # Assert
+    assert (dock_status['Days of Service'] <= 7).all()
+    assert dock_status['Days of Service'].dtype == np.int16
+    assert isinstance(dock_status['Dock Location'].dtype, pd.CategoricalDtype)
+
+
+def test_empty_window_keeps_columns(connection):
+    # Act
+    alerts = read_table(connection, 'alerts', columns=['alert_id', 'sku_id'], since='2999-01-01 00:00:00')
+    # Assert
+    assert alerts.empty
+    assert list(alerts.columns) == ['alert_id', 'sku_id']
+
+
+def test_rejects_unknown_columns_and_windows(connection):
+    with pytest.raises(ValueError):
+        read_table(connection, 'skus', columns=['sku_id; DROP TABLE skus'])
+    with pytest.raises(ValueError):
+        read_table(connection, 'skus', since='2023-11-01 00:00:00')
+
+
+def test_chunked_read_matches_single_read(connection):
+    # Act
+    chunked = read_table(connection, 'skus', chunksize=3, dimensions=Dimensions())
+    # Assert
+    expected = pd.read_sql('SELECT * FROM skus', connection)
+    assert chunked['product_number'].tolist() == expected['product_number'].tolist()
+    assert chunked['destination'].tolist() == expected['destination'].tolist()
+    assert isinstance(chunked['product_number'].dtype, pd.CategoricalDtype)
@@ -0,0 +1,57 @@
+import sqlite3
+
+import numpy as np
+import pytest
+
+from loader import IncrementalLoader
+from synthetic import UpdateStream, generate, replay
+
+
+def _rows(database, table):
+    with sqlite3.connect(database) as connection:
+        return connection.execute(f'SELECT * FROM {table} ORDER BY 1').fetchall()
+
+
+def test_generate_writes_requested_rows_reproducibly(tmp_path):
+    # Arrange
+    first, second = str(tmp_path / 'first.db'), str(tmp_path / 'second.db')
+    # Act
+    counts = generate(first, skus=500, alerts_per_sku=0.1, seed=3, chunk_rows=128)
+    generate(second, skus=500, alerts_per_sku=0.1, seed=3, chunk_rows=128)
+    # Assert
+    assert counts == {'skus': 500, 'dock_status': 500, 'production_pipeline': 500, 'alerts': 50}
+    for table, count in counts.items():
+        assert _rows(first, table) == _rows(second, table)
+        assert len(_rows(first, table)) == count
+    with pytest.raises(FileExistsError):
+        generate(first, skus=10)
+
+
+def test_generated_database_loads(tmp_path):
+    # Arrange
+    database = str(tmp_path / 'synthetic.db')
+    generate(database, skus=300, seed=1)
+    loader = IncrementalLoader(database)
+    # Act
+    loader.load()
+    # Assert
+    assert len(loader.data.dock_status) == 300
+    assert loader.watermark == 0
+    assert sum(loader.data.aggregates.production_status.counts().values()) == 300
+
+
+def test_update_stream_replays_deterministically(tmp_path):
+    # Arrange
+    database = str(tmp_path / 'synthetic.db')
+    generate(database, skus=200, seed=2)
+    streams = [UpdateStream.from_database(database, batch_size=50, seed=9) for _ in range(2)]
+    # Act
+    batches = [list(stream.batches(5)) for stream in streams]
+    replay(database, UpdateStream.from_database(database, batch_size=50, seed=9), 5)
+    # Assert
+    for (ids, days, refreshed), (other_ids, other_days, other_refreshed) in zip(*batches):
+        np.testing.assert_array_equal(ids, other_ids)
+        np.testing.assert_array_equal(days, other_days)
+        assert refreshed == other_refreshed
+    expected = dict(zip(streams[0].dock_ids.tolist(), streams[0].days_of_service.tolist()))
+    assert {dock_id: days for dock_id, _, _, days, _, _ in _rows(database, 'dock_status')} == expected
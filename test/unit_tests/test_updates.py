@@ -0,0 +1,61 @@
+import sqlite3
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import pages.alerts
+from db import WarehouseData
+from updates import apply_updates, real_time_update
+
+
+@pytest.fixture
+def data(monkeypatch):
+    monkeypatch.setattr(pages.alerts, 'create_SN_incident', lambda alert_info: None)
+    dock_status = pd.DataFrame({
+        'sku_id': np.arange(1, 101),
+        'dock_id': np.arange(1, 101),
+        'Product Number': [f'P-{i}' for i in range(100)],
+        'Product Name': [f'Product {i}' for i in range(100)],
+        'Last Refresh': pd.Timestamp('2025-08-01 00:00:00'),
+        'Days of Service': np.full(100, 12),
+        'Time Created': pd.Timestamp('2025-08-01 00:00:00'),
+    })
+    alerts = pd.DataFrame({'alert_id': [1], 'sku_id': [1]})
+    return WarehouseData(alerts=alerts, dock_status=dock_status)
+
+
+def test_batch_update_keeps_native_dtypes(data):
+    # Act
+    real_time_update(data, count=10, rng=np.random.default_rng(0), now=datetime(2025, 8, 3, 12))
+    # Assert
+    dock_status = data.dock_status
+    assert (dock_status['Days of Service'] == 11).sum() == 10
+    assert (dock_status['Last Refresh'] == pd.Timestamp('2025-08-03 12:00:00')).sum() == 10
+    assert dock_status['Days of Service'].dtype == np.int64
+    assert pd.api.types.is_datetime64_dtype(dock_status['Last Refresh'])
+    assert dock_status['Dock Aging Hours'].dtype == np.int64
+    assert (dock_status['Dock Aging Hours'] == 60).all()
+
+
+def test_apply_updates_reports_threshold_crossings(data):
+    # Arrange
+    data.dock_status.loc[:4, 'Days of Service'] = 7
+    # Act
+    crossed = apply_updates(data.dock_status, np.arange(10), np.full(10, 7))
+    # Assert
+    assert crossed.tolist() == [5, 6, 7, 8, 9]
+
+
+def test_rows_reaching_threshold_raise_persisted_alerts(data, warehouse_db):
+    # Arrange
+    data.dock_status.loc[:4, 'Days of Service'] = 8
+    # Act
+    real_time_update(data, count=100, rng=np.random.default_rng(0), database=warehouse_db)
+    # Assert
+    with sqlite3.connect(warehouse_db) as connection:
+        stored = connection.execute("SELECT COUNT(*) FROM alerts WHERE alert_message = 'Low days of service' AND sku_id <= 5").fetchone()[0]
+    assert len(data.alerts) == 6
+    assert data.alerts['alert_id'].is_unique
+    assert stored >= 5